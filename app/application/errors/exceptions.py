@@ -33,6 +33,11 @@ class ValidationError(AppException):
         super().__init__(code=422, status_code=422, msg=msg)
 
 
+class ConflictError(AppException):
+    def __init__(self, msg: str = '资源已被修改，请刷新后重试。'):
+        super().__init__(code=409, status_code=409, msg=msg)
+
+
 class TooManyRequestsError(AppException):
     def __init__(self, msg: str = '请求频率过快，请稍后重试。'):
         super().__init__(code=429, status_code=429, msg=msg)
@@ -1,33 +1,60 @@
-from typing import List
+from typing import List, Callable
 
 from app.domain.models.app_config import AppConfig, LLMConfig, AgentConfig, \
     McpConfig
 from app.domain.repositories.app_config_repository import AppConfigRepository
-from app.application.errors.exceptions import NotFoundError
-from app.domain.services.tools.mcp import MCPClientManager
+from app.application.errors.exceptions import NotFoundError, ConflictError
+from app.domain.services.tools.mcp import MCPSessionPool
 from app.interfaces.schemas.app_config import ListMCPServerItem
 
 
 class AppConfigService:
-    def __init__(self, app_config_repository: AppConfigRepository):
+    # 保存时其他进程已修改配置，重新读取并修改后重试的次数
+    _save_retries = 3
+
+    def __init__(self, app_config_repository: AppConfigRepository,
+                 mcp_session_pool: MCPSessionPool):
         self._app_config_repository = app_config_repository
+        self._mcp_session_pool = mcp_session_pool
 
     async def _load_app_config(self) -> AppConfig:
         return self._app_config_repository.load()
 
+    async def _load_app_config_for_update(self) -> AppConfig:
+        # 仓库返回的是缓存的配置，修改前复制一份，保存失败时不会污染缓存
+        return self._app_config_repository.load().model_copy(deep=True)
+
+    async def _update_app_config(
+            self, update: Callable[[AppConfig], None]) -> AppConfig:
+        """读取配置、修改后以读取时的版本为基础保存，版本冲突时重新读取后重试"""
+        for attempt in range(self._save_retries):
+            version = self._app_config_repository.get_version()
+            app_config = await self._load_app_config_for_update()
+            update(app_config)
+            try:
+                await self._app_config_repository.save(
+                    app_config, base_version=version)
+                return app_config
+            except ConflictError:
+                if attempt == self._save_retries - 1:
+                    raise
+
+    async def get_version(self) -> int:
+        return self._app_config_repository.get_version()
+
     async def get_llm_config(self) -> LLMConfig:
         app_config = await self._load_app_config()
         return app_config.llm_config
 
     async def update_llm_config(self, llm_config: LLMConfig) -> LLMConfig:
-        app_config = await self._load_app_config()
+        keep_api_key = not llm_config.api_key.strip()
 
-        if not llm_config.api_key.strip():
-            llm_config.api_key = app_config.llm_config.api_key
-
-        app_config.llm_config = llm_config
-        self._app_config_repository.save(app_config)
+        def update(app_config: AppConfig):
+            if keep_api_key:
+                llm_config.api_key = app_config.llm_config.api_key
+            app_config.llm_config = llm_config
 
+        app_config = await self._update_app_config(update)
         return app_config.llm_config
 
     async def get_agent_config(self) -> AgentConfig:
@@ -36,60 +63,57 @@ class AppConfigService:
 
     async def update_agent_config(
             self, agent_config: AgentConfig) -> AgentConfig:
-        app_config = await self._load_app_config()
-        app_config.agent_config = agent_config
-        self._app_config_repository.save(app_config)
+        def update(app_config: AppConfig):
+            app_config.agent_config = agent_config
 
+        app_config = await self._update_app_config(update)
         return app_config.agent_config
 
     async def get_mcp_servers(self) -> List[ListMCPServerItem]:
         app_config = await self._load_app_config()
 
+        # 会话池已连接时直接返回，只有首次连接时等待
+        await self._mcp_session_pool.sync(app_config.mcp_config)
+        await self._mcp_session_pool.wait_ready()
+
         mcp_servers = []
-        mcp_client_manager = MCPClientManager(mcp_config=app_config.mcp_config)
-
-        try:
-            await mcp_client_manager.initialize()
-
-            tools = mcp_client_manager.tools
-            for server_name, server_config in app_config.mcp_config.mcpServers.items():
-                mcp_servers.append(ListMCPServerItem(
-                    server_name=server_name,
-                    enabled=server_config.enabled,
-                    transport=server_config.transport,
-                    tools=[t.name for t in tools.get(server_name, [])]
-                ))
-        finally:
-            await mcp_client_manager.cleanup()
+        tools = self._mcp_session_pool.tools
+        for server_name, server_config in app_config.mcp_config.mcpServers.items():
+            mcp_servers.append(ListMCPServerItem(
+                server_name=server_name,
+                enabled=server_config.enabled,
+                transport=server_config.transport,
+                tools=[t.name for t in tools.get(server_name, [])]
+            ))
 
         return mcp_servers
 
     async def update_and_create_mcp_servers(
             self, mcp_config: McpConfig) -> McpConfig:
-        app_config = await self._load_app_config()
-
-        app_config.mcp_config.mcpServers.update(mcp_config.mcpServers)
+        def update(app_config: AppConfig):
+            app_config.mcp_config.mcpServers.update(mcp_config.mcpServers)
 
-        self._app_config_repository.save(app_config)
+        app_config = await self._update_app_config(update)
+        await self._mcp_session_pool.sync(app_config.mcp_config)
         return app_config.mcp_config
 
     async def delete_mcp_server(self, server_name):
-        app_config = await self._load_app_config()
+        def update(app_config: AppConfig):
+            if server_name not in app_config.mcp_config.mcpServers:
+                raise NotFoundError(f'该MCP服务[{server_name}]不存在，请核实后重试')
+            del app_config.mcp_config.mcpServers[server_name]
 
-        if server_name not in app_config.mcp_config.mcpServers:
-            raise NotFoundError(f'该MCP服务[{server_name}]不存在，请核实后重试')
-
-        del app_config.mcp_config.mcpServers[server_name]
-        self._app_config_repository.save(app_config)
+        app_config = await self._update_app_config(update)
+        await self._mcp_session_pool.sync(app_config.mcp_config)
 
         return app_config.mcp_config
 
     async def set_mcp_server_enabled(self, server_name, enabled: bool):
-        app_config = await self._load_app_config()
-
-        if server_name not in app_config.mcp_config.mcpServers:
-            raise NotFoundError(f'该MCP服务[{server_name}]不存在，请核实后重试')
+        def update(app_config: AppConfig):
+            if server_name not in app_config.mcp_config.mcpServers:
+                raise NotFoundError(f'该MCP服务[{server_name}]不存在，请核实后重试')
+            app_config.mcp_config.mcpServers[server_name].enabled = enabled
 
-        app_config.mcp_config.mcpServers[server_name].enabled = enabled
-        self._app_config_repository.save(app_config)
+        app_config = await self._update_app_config(update)
+        await self._mcp_session_pool.sync(app_config.mcp_config)
         return app_config.mcp_config
@@ -1,12 +1,20 @@
 import asyncio
-from typing import List
+from typing import List, Optional
 from app.domain.external.health_checker import HealthChecker
+from app.domain.external.pool_monitor import PoolMonitor
+from app.domain.models.connection_pool import ConnectionPoolStats
 from app.domain.models.health_status import HealthStatus
 
 
 class StatusService:
-    def __init__(self, checkers: List[HealthChecker]) -> None:
+    def __init__(self, checkers: List[HealthChecker],
+                 pool_monitors: Optional[List[PoolMonitor]] = None) -> None:
         self.checkers = checkers
+        self.pool_monitors = pool_monitors or []
+
+    def get_pool_stats(self) -> List[ConnectionPoolStats]:
+        return [stats for monitor in self.pool_monitors
+                for stats in monitor.stats()]
 
     async def check_all(self) -> List[HealthStatus]:
         results = await asyncio.gather(
@@ -0,0 +1,336 @@
+import logging
+import weakref
+from typing import Callable, Type, List, Optional, AsyncIterator, Tuple, \
+    Literal, Dict
+
+from app.application.errors.exceptions import NotFoundError, \
+    TooManyRequestsError, BadRequestError
+from app.domain.external.json_parser import JSONParser
+from app.domain.external.llm import LLM
+from app.domain.external.search import SearchEngine
+from app.domain.external.task import Task, TaskRunner
+from app.domain.external.task_queue import TaskQueue
+from app.domain.external.task_scheduler import TaskScheduler
+from app.domain.models.event import QueueEvent, PlanDeltaEvent
+from app.domain.models.message import Message
+from app.domain.models.task_queue import TaskQueueStats, \
+    StreamConsumerStats
+from app.domain.models.task_history import TaskEventPage, \
+    TaskHistoryPage, ArchivedTask
+from app.domain.models.task_snapshot import TaskSnapshot
+from app.domain.repositories.app_config_repository import AppConfigRepository
+from app.domain.repositories.memory_repository import MemoryRepository
+from app.domain.repositories.task_checkpoint_repository import \
+    TaskCheckpointRepository
+from app.domain.repositories.task_event_archive_repository import \
+    TaskEventArchiveRepository
+from app.domain.repositories.task_snapshot_repository import \
+    TaskSnapshotRepository
+from app.domain.services.agent_task_runner import AgentTaskRunner
+from app.domain.services.event_delta import EventDeltaDecoder, parse_event, \
+    event_type
+from app.domain.services.event_flow_control import EventFlowController, \
+    is_stream_id
+from app.domain.services.tools.mcp import MCPSessionPool
+
+logger = logging.getLogger(__name__)
+
+_DECODED_EVENT_TYPES = ('plan', 'plan_delta', 'tool')
+
+
+class TaskService:
+    def __init__(
+            self,
+            app_config_repository: AppConfigRepository,
+            memory_repository: MemoryRepository,
+            checkpoint_repository: TaskCheckpointRepository,
+            snapshot_repository: TaskSnapshotRepository,
+            json_parser: JSONParser,
+            search_engine: SearchEngine,
+            llm_factory: Callable[..., LLM],
+            task_cls: Type[Task],
+            task_queue: Optional[TaskQueue] = None,
+            task_scheduler: Optional[TaskScheduler] = None,
+            event_delta_encoding: bool = False,
+            output_window: int = 1000,
+            event_archive_repository: Optional[
+                TaskEventArchiveRepository] = None,
+            mcp_session_pool: Optional[MCPSessionPool] = None,
+    ):
+        """未传递作业队列与调度器时为单机模式，任务直接在当前进程执行"""
+        self._app_config_repository = app_config_repository
+        self._memory_repository = memory_repository
+        self._checkpoint_repository = checkpoint_repository
+        self._snapshot_repository = snapshot_repository
+        self._json_parser = json_parser
+        self._search_engine = search_engine
+        self._llm_factory = llm_factory
+        self._task_cls = task_cls
+        self._task_queue = task_queue
+        self._task_scheduler = task_scheduler
+        self._event_delta_encoding = event_delta_encoding
+        self._output_window = output_window
+        self._event_archive_repository = event_archive_repository
+        self._mcp_session_pool = mcp_session_pool or MCPSessionPool()
+        self._consumers: weakref.WeakSet[EventFlowController] = \
+            weakref.WeakSet()
+
+    def _create_task_runner(self, tenant_id: str) -> TaskRunner:
+        app_config = self._app_config_repository.load()
+
+        async def record_tokens(tokens: int) -> None:
+            if self._task_scheduler is not None:
+                await self._task_scheduler.record_tokens(tenant_id, tokens)
+
+        return AgentTaskRunner(
+            llm=self._llm_factory(app_config.llm_config,
+                                  usage_callback=record_tokens),
+            agent_config=app_config.agent_config,
+            mcp_config=app_config.mcp_config,
+            mcp_session_pool=self._mcp_session_pool,
+            json_parser=self._json_parser,
+            search_engine=self._search_engine,
+            memory_repository=self._memory_repository,
+            checkpoint_repository=self._checkpoint_repository,
+            snapshot_repository=self._snapshot_repository,
+            delta_encoding=self._event_delta_encoding,
+        )
+
+    async def _get_tenant(self, task_id: str) -> str:
+        if self._task_scheduler is None:
+            return 'default'
+        return await self._task_scheduler.get_tenant(task_id)
+
+    async def _submit(self, task: Task, tenant_id: str) -> None:
+        """提交任务到调度器排队，并将排队位置写入任务输出流"""
+        if self._task_scheduler is None:
+            task = self._task_cls.create(self._create_task_runner(tenant_id),
+                                         task_id=task.id)
+            await task.invoke()
+            return
+
+        position = await self._task_scheduler.submit(task.id, tenant_id)
+        if position is None:
+            raise TooManyRequestsError('当前排队任务过多，请稍后重试')
+
+        await task.output_stream.put(
+            QueueEvent(position=position).model_dump_json())
+
+    async def create_task(self, message: Message,
+                          tenant_id: str = 'default') -> str:
+        """创建任务并提交调度器排队，出队后由Worker进程执行"""
+        task = self._task_cls.create(None)
+        await task.input_stream.put(message.model_dump_json())
+        try:
+            await self._submit(task, tenant_id)
+        except TooManyRequestsError:
+            # 未被调度器接收的新任务直接销毁，不留下孤儿任务与输入流
+            await self._task_cls.destroy(task.id)
+            raise
+        return task.id
+
+    async def send_message(self, task_id: str, message: Message) -> None:
+        """向已有任务发送用户消息，并重新提交调度唤醒任务"""
+        task = await self._task_cls.get(task_id)
+        if task is None:
+            raise NotFoundError(f'该任务[{task_id}]不存在，请核实后重试')
+
+        message_id = await task.input_stream.put(message.model_dump_json())
+        try:
+            await self._submit(task, await self._get_tenant(task_id))
+        except TooManyRequestsError:
+            # 被拒绝的消息从输入流删除，避免客户端重试后任务收到重复消息
+            await task.input_stream.delete_message(message_id)
+            raise
+
+    async def stream_events(
+            self, task_id: str, last_event_id: Optional[str] = None,
+            mode: Literal['full', 'delta'] = 'full',
+    ) -> EventFlowController:
+        """订阅任务输出流，返回last_event_id之后的事件ID与事件JSON，
+        full模式下将增量事件还原为完整事件，delta模式下原样返回；
+        每个订阅经过独立的流控窗口，客户端落后时合并被取代的事件"""
+        if last_event_id is not None and not is_stream_id(last_event_id):
+            raise BadRequestError(
+                f'事件ID[{last_event_id}]格式错误，应为<毫秒时间戳>-<序号>')
+
+        task = await self._task_cls.get(task_id)
+        if task is None:
+            raise NotFoundError(f'该任务[{task_id}]不存在，请核实后重试')
+
+        events = task.output_stream.subscribe(start_id=last_event_id)
+        if mode == 'full' and self._event_delta_encoding:
+            # 未开启增量编码时输出流中都是完整事件，无需还原
+            events = self._decode_events(task_id, events)
+
+        controller = EventFlowController(task_id, events, self._output_window)
+        self._consumers.add(controller)
+        return controller
+
+    async def _decode_events(self, task_id: str,
+                             events: AsyncIterator[Tuple[str, str]]) -> \
+            AsyncIterator[Tuple[str, str]]:
+        decoder = EventDeltaDecoder()
+        async for event_id, data in events:
+            # 只有计划与工具事件可能需要还原，其余事件直接透传不做解析
+            if event_type(data) not in _DECODED_EVENT_TYPES:
+                yield event_id, data
+                continue
+
+            event = parse_event(data)
+            if isinstance(event, PlanDeltaEvent) and not decoder.has_plan:
+                # 从流中间开始订阅时缺少基础版本，使用快照中的计划作为基础
+                snapshot = await self._snapshot_repository.get(task_id)
+                if snapshot is not None:
+                    decoder.seed(snapshot.plan, snapshot.plan_version)
+
+            decoded = decoder.decode(event)
+            if decoded is event:
+                yield event_id, data
+            elif decoded is not None:
+                yield event_id, decoded.model_dump_json()
+
+    async def get_snapshot(self, task_id: str) -> TaskSnapshot:
+        """获取任务状态快照，客户端据此重建界面后从快照的last_event_id订阅后续事件"""
+        task = await self._task_cls.get(task_id)
+        if task is None:
+            raise NotFoundError(f'该任务[{task_id}]不存在，请核实后重试')
+
+        snapshot = await self._snapshot_repository.get(task_id)
+        return snapshot or TaskSnapshot(task_id=task_id)
+
+    def _require_archive(self) -> TaskEventArchiveRepository:
+        if self._event_archive_repository is None:
+            raise BadRequestError('未开启任务事件归档，无法查询历史记录')
+        return self._event_archive_repository
+
+    async def get_event_history(self, task_id: str, after_seq: Optional[int],
+                                limit: int) -> TaskEventPage:
+        """按seq顺序分页查询任务的历史事件，下一页以next_seq作为after_seq"""
+        events = await self._require_archive().list_events(
+            task_id, after_seq, limit)
+        return TaskEventPage(
+            items=events,
+            next_seq=events[-1].seq if len(events) == limit else None,
+        )
+
+    async def list_task_history(self, cursor: Optional[str],
+                                limit: int) -> TaskHistoryPage:
+        """按最后活跃时间倒序分页查询历史任务，游标由上一页的next_cursor给出"""
+        before = None
+        if cursor:
+            try:
+                before = ArchivedTask.parse_cursor(cursor)
+            except Exception:
+                raise BadRequestError('分页游标无效，请检查后重试')
+
+        tasks = await self._require_archive().list_tasks(before, limit)
+        next_cursor = tasks[-1].cursor if len(tasks) == limit else None
+        return TaskHistoryPage(items=tasks, next_cursor=next_cursor)
+
+    async def dispatch_tasks(self) -> int:
+        """按配额从调度队列投递任务到作业队列，并向仍在排队的任务推送最新排队位置"""
+        if self._task_scheduler is None:
+            return 0
+
+        dispatched = await self._task_scheduler.dispatch()
+        if not dispatched:
+            return 0
+
+        updates = [(task_id, 0) for task_id in dispatched]
+        updates.extend(await self._task_scheduler.positions())
+        for task_id, position in updates:
+            task = self._task_cls.create(None, task_id=task_id)
+            await task.output_stream.put(
+                QueueEvent(position=position).model_dump_json())
+
+        return len(dispatched)
+
+    async def acquire_task(self, task_id: str) -> None:
+        """任务开始执行，确认占用调度器中的并发配额"""
+        if self._task_scheduler is not None:
+            await self._task_scheduler.acquire(task_id)
+
+    async def release_task(self, task_id: str) -> None:
+        """任务执行结束，释放调度器中占用的并发配额"""
+        if self._task_scheduler is not None:
+            await self._task_scheduler.release(task_id)
+
+    async def heartbeat_tasks(self, task_ids: List[str]) -> None:
+        if self._task_scheduler is not None:
+            await self._task_scheduler.heartbeat(task_ids)
+
+    async def run_task(self, task_id: str) -> None:
+        """在当前进程执行任务直到结束，任务已在其他进程运行时直接返回"""
+        tenant_id = await self._get_tenant(task_id)
+        task = self._task_cls.create(self._create_task_runner(tenant_id),
+                                     task_id=task_id)
+        await task.invoke()
+        await task.wait()
+
+    async def get_queue_stats(self) -> TaskQueueStats:
+        if self._task_queue is None:
+            return TaskQueueStats()
+        return await self._task_queue.stats()
+
+    def get_consumer_stats(self) -> List[StreamConsumerStats]:
+        """统计当前进程中各任务输出流订阅者的落后情况"""
+        stats: Dict[str, StreamConsumerStats] = {}
+        for controller in list(self._consumers):
+            if controller.closed:
+                continue
+            item = stats.setdefault(
+                controller.task_id,
+                StreamConsumerStats(task_id=controller.task_id))
+            item.consumers += 1
+            item.max_lag_ms = max(item.max_lag_ms, controller.lag_ms)
+            item.max_pending = max(item.max_pending, controller.pending)
+            item.coalesced += controller.coalesced
+
+        return sorted(stats.values(), key=lambda item: -item.max_lag_ms)
+
+    async def recover_tasks(self) -> int:
+        """扫描存在检查点的孤儿任务并从检查点恢复执行
+
+        使用调度器时孤儿任务为既不在调度器中、也没有未确认作业的任务，重新提交调度器排队，
+        与其他任务一样经过准入控制后由Worker领取执行；单机模式下认领租约已过期的任务直接恢复执行
+        """
+        task_ids = await self._checkpoint_repository.list_task_ids()
+        # 先读取作业再逐个检查调度器，任务在两次读取之间出队时仍会被调度器检查发现
+        pending = set(await self._task_queue.list_task_ids()) \
+            if self._task_queue is not None else set()
+
+        recovered = 0
+        for task_id in task_ids:
+            try:
+                tenant_id = await self._get_tenant(task_id)
+                if self._task_scheduler is None:
+                    task = await self._task_cls.resume(
+                        task_id, self._create_task_runner(tenant_id))
+                    if task is not None:
+                        recovered += 1
+                    continue
+
+                if task_id in pending or \
+                        await self._task_scheduler.is_scheduled(task_id):
+                    continue
+                await self._submit(self._task_cls.create(None, task_id=task_id),
+                                   tenant_id)
+                recovered += 1
+            except Exception as e:
+                logger.error(f'恢复任务[{task_id}]失败: {e}')
+
+        logger.info(f'任务恢复扫描完成，共恢复{recovered}个孤儿任务')
+        return recovered
+
+    async def cancel_task(self, task_id: str) -> bool:
+        """取消任务，任务可能运行在任意进程中"""
+        task = await self._task_cls.get(task_id)
+        if task is None:
+            raise NotFoundError(f'该任务[{task_id}]不存在，请核实后重试')
+
+        cancelled = await task.cancel()
+
+        # 用户主动取消的任务不应再被恢复扫描认领
+        await self._checkpoint_repository.delete(task_id)
+        return cancelled
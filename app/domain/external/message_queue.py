@@ -1,10 +1,15 @@
-from typing import Protocol, Any, Tuple
+from typing import Protocol, Any, Tuple, List, AsyncIterator, Optional
 
 
 class MessageQueue(Protocol):
     """消息队列协议"""
 
-    async def put(self, message: Any) -> None:
+    async def put(self, message: Any) -> str:
+        """放入消息并返回消息ID"""
+        ...
+
+    async def put_batch(self, messages: List[Any]) -> List[str]:
+        """按顺序批量放入消息并返回消息ID列表"""
         ...
 
     async def get(self, start_id: str = None, block_ms: int = None) -> Tuple[
@@ -12,14 +17,34 @@ class MessageQueue(Protocol):
         """根据传递的start_id + 阻塞实践，获取第一条消息"""
         ...
 
+    async def get_batch(self, start_id: str = None, count: int = 100,
+                        block_ms: int = None) -> List[Tuple[str, Any]]:
+        """获取start_id之后的至多count条消息，没有消息时阻塞block_ms毫秒"""
+        ...
+
+    def subscribe(self, start_id: str = None, batch_size: int = None) -> \
+            AsyncIterator[Tuple[str, Any]]:
+        """订阅队列，按批次持续读取start_id之后的消息，消费方处理完一批后才会读取下一批，
+        没有新消息时一直等待，等待方式由实现决定"""
+        ...
+
     async def pop(self) -> Tuple[str, Any]:
-        """获取并删除队列中的第一条消息"""
+        """取出队列中的第一条未被消费的消息，处理完成后需调用ack确认删除，
+        未确认的消息超时后会被重新投递给其他消费者"""
+        ...
+
+    async def ack(self, message_id: str) -> None:
+        """确认消息已处理完成并从队列中删除"""
         ...
 
     async def clear(self) -> None:
         """清空队列"""
         ...
 
+    async def expire(self, ttl_seconds: Optional[int]) -> None:
+        """设置队列过期时间，传递None表示取消过期"""
+        ...
+
     async def is_empty(self) -> bool:
         """判断队列是否为空"""
         ...
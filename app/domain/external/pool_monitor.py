@@ -0,0 +1,8 @@
+from typing import Protocol, List
+
+from app.domain.models.connection_pool import ConnectionPoolStats
+
+
+class PoolMonitor(Protocol):
+    def stats(self) -> List[ConnectionPoolStats]:
+        ...
@@ -27,8 +27,12 @@ class Task(Protocol):
     async def invoke(self) -> None:
         ...
 
-    def cancel(self) -> bool:
-        """取消任务"""
+    async def wait(self) -> None:
+        """等待任务执行结束，等待方被取消时中断任务执行并等待其结束"""
+        ...
+
+    async def cancel(self) -> bool:
+        """取消任务，任务运行在其他进程时投递取消请求给该进程"""
         ...
 
     @property
@@ -49,14 +53,26 @@ class Task(Protocol):
         """任务是否完成"""
         ...
 
+    @property
+    def cancel_requested(self) -> bool:
+        """任务是否被用户取消，用于区分用户取消与进程退出导致的中断"""
+        ...
+
+    @classmethod
+    async def get(cls, task_id: str) -> Optional['Task']:
+        """获取任务，支持查找其他进程创建/运行的任务"""
+        ...
+
     @classmethod
-    def get(cls, task_id: str) -> Optional['Task']:
-        """获取任务"""
+    def create(cls, task_runner: Optional[TaskRunner],
+               task_id: Optional[str] = None) -> 'Task':
+        """根据传递的任务运行器创建任务，task_runner为空时只创建任务句柄"""
         ...
 
     @classmethod
-    def create(cls, task_runner: TaskRunner) -> 'Task':
-        """根据传递的任务运行器创建任务"""
+    async def resume(cls, task_id: str,
+                     task_runner: TaskRunner) -> Optional['Task']:
+        """认领租约已过期的任务并从检查点恢复执行，认领失败时返回None"""
         ...
 
     @classmethod
@@ -0,0 +1,31 @@
+from typing import Protocol, List, Tuple
+
+from app.domain.models.task_queue import TaskQueueStats
+
+
+class TaskQueue(Protocol):
+    """任务作业队列，API进程投递任务，Worker进程领取并执行"""
+
+    async def enqueue(self, task_id: str) -> str:
+        """投递任务作业并返回作业ID"""
+        ...
+
+    async def dequeue(self, count: int, block_ms: int = None) -> List[
+        Tuple[str, str]]:
+        """领取最多count个作业，返回(作业ID, 任务ID)列表"""
+        ...
+
+    async def heartbeat(self, job_ids: List[str]) -> None:
+        """刷新执行中作业的空闲时间，避免被其他Worker认领"""
+        ...
+
+    async def ack(self, job_id: str) -> None:
+        """确认作业执行完成"""
+        ...
+
+    async def list_task_ids(self) -> List[str]:
+        """尚未确认的作业(排队中或执行中)对应的任务ID"""
+        ...
+
+    async def stats(self) -> TaskQueueStats:
+        ...
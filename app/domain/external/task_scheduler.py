@@ -0,0 +1,40 @@
+from typing import Protocol, Optional, List, Tuple
+
+
+class TaskScheduler(Protocol):
+    """任务调度器，负责准入控制与租户间的加权公平排队"""
+
+    async def submit(self, task_id: str, tenant_id: str) -> Optional[int]:
+        """提交任务排队，返回排队位置(从1开始)，队列已满时返回None"""
+        ...
+
+    async def dispatch(self) -> List[str]:
+        """在全局与租户配额允许的范围内将排队任务投递给Worker，返回出队的任务ID"""
+        ...
+
+    async def positions(self) -> List[Tuple[str, int]]:
+        """获取所有排队任务及其排队位置"""
+        ...
+
+    async def is_scheduled(self, task_id: str) -> bool:
+        """任务是否正在排队或占用着并发配额"""
+        ...
+
+    async def acquire(self, task_id: str) -> None:
+        """任务开始执行时确认占用并发配额，占用已因超时被回收(如认领崩溃Worker的作业)时重新占用"""
+        ...
+
+    async def heartbeat(self, task_ids: List[str]) -> None:
+        """刷新执行中任务的占用时间，超时未刷新的占用会被自动回收"""
+        ...
+
+    async def release(self, task_id: str) -> None:
+        """任务执行结束，释放占用的并发配额"""
+        ...
+
+    async def record_tokens(self, tenant_id: str, tokens: int) -> None:
+        """记录租户消耗的token数量，用于每分钟token配额"""
+        ...
+
+    async def get_tenant(self, task_id: str) -> str:
+        ...
@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+
+
+class ConnectionPoolStats(BaseModel):
+    """连接池统计信息，用于按数据库最大连接数规划连接池大小并提前发现连接池饱和"""
+    service: str = Field(default='', description='连接池所属的服务名字')
+    pool_size: int = Field(default=0, description='连接池常驻连接数上限')
+    max_overflow: int = Field(default=0, description='允许超出常驻连接数的连接数量')
+    checked_out: int = Field(default=0, description='当前被借出使用中的连接数')
+    idle: int = Field(default=0, description='当前空闲的连接数')
+    overflow: int = Field(default=0, description='当前超出常驻连接数的连接数')
+    saturation: float = Field(
+        default=0, description='借出连接数占连接上限的比例，接近1表示连接池即将耗尽')
+    wait_count: int = Field(default=0, description='累计获取连接的次数')
+    avg_wait_ms: float = Field(default=0, description='获取连接的平均耗时')
+    max_wait_ms: float = Field(default=0, description='获取连接的最大耗时')
+    timeouts: int = Field(default=0, description='获取连接超时的次数')
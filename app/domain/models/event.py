@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 from enum import Enum
-from typing import Literal, Any, Union, Optional, Dict
+from typing import Literal, Any, Union, Optional, Dict, List
 
 from pydantic import BaseModel, Field
 from app.domain.models.plan import Plan, Step
@@ -38,6 +38,24 @@ class PlanEvent(BaseEvent):
     type: Literal['plan'] = 'plan'
     plan: Plan
     status: PlanEventStatus = PlanEventStatus.CREATED
+    version: int = Field(default=0, description='计划版本号，每次计划变更递增')
+
+
+class PatchOperation(BaseModel):
+    """JSON-Patch风格的变更操作"""
+    op: Literal['add', 'remove', 'replace']
+    path: str
+    value: Any = None
+
+
+class PlanDeltaEvent(BaseEvent):
+    """计划增量事件，记录相对于base_version版本计划的变更"""
+    type: Literal['plan_delta'] = 'plan_delta'
+    plan_id: str
+    status: PlanEventStatus = PlanEventStatus.UPDATED
+    version: int
+    base_version: int
+    ops: List[PatchOperation] = Field(default_factory=list)
 
 
 class TitleEvent(BaseEvent):
@@ -78,6 +96,14 @@ class ToolEvent(BaseEvent):
     function_args: Dict[str, Any]
     function_result: Optional[ToolResult] = None
     status: ToolEventStatus = ToolEventStatus.CALLING
+    calling_event_id: Optional[str] = Field(
+        default=None, description='增量模式下CALLED事件引用的CALLING事件ID，此时省略function_args')
+
+
+class QueueEvent(BaseEvent):
+    """排队事件，告知任务在调度队列中的位置，position为0表示已出队开始执行"""
+    type: Literal['queue'] = 'queue'
+    position: int = 0
 
 
 class WaitEvent(BaseEvent):
@@ -91,12 +117,17 @@ class ErrorEvent(BaseEvent):
     error: str = ''
 
 
+class CancelEvent(BaseEvent):
+    """取消事件，任务被用户取消后输出的最后一个事件"""
+    type: Literal['cancel'] = 'cancel'
+
+
 class DoneEvent(BaseEvent):
     """完成事件，记录任务完成的情况"""
     type: Literal['done'] = 'done'
 
 
 Event = Union[
-    PlanEvent, TitleEvent, StepEvent, MessageEvent, ToolEvent,
-    WaitEvent, ErrorEvent, DoneEvent,
+    PlanEvent, PlanDeltaEvent, TitleEvent, StepEvent, MessageEvent, ToolEvent,
+    QueueEvent, WaitEvent, ErrorEvent, CancelEvent, DoneEvent,
 ]
@@ -1,6 +1,6 @@
 import logging
 from typing import Dict, Any
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 logger = logging.getLogger(__name__)
 
@@ -8,15 +8,22 @@ logger = logging.getLogger(__name__)
 class Memory(BaseModel):
     messages: list[Dict[str, Any]] = Field(default_factory=list)
 
+    # 记忆变更日志，记录自上次持久化以来的增量操作(add/rollback/reset)
+    _changes: list[Dict[str, Any]] = PrivateAttr(default_factory=list)
+
     @classmethod
     def get_message_role(cls, message: Dict[str, Any]) -> str:
         return message.get('role')
 
     def add_message(self, message: Dict[str, Any]) -> None:
         self.messages.append(message)
+        self._changes.append({'op': 'add', 'messages': [message]})
 
     def add_messages(self, messages: list[Dict[str, Any]]) -> None:
+        if not messages:
+            return
         self.messages.extend(messages)
+        self._changes.append({'op': 'add', 'messages': list(messages)})
 
     def get_messages(self) -> list[Dict[str, Any]]:
         return self.messages
@@ -25,21 +32,37 @@ class Memory(BaseModel):
         return self.messages[-1] if self.messages else None
 
     def roll_back(self) -> None:
+        if self.messages:
+            self._changes.append({'op': 'rollback'})
         self.messages = self.messages[:-1]
 
     def compact(self) -> None:
         """
         压缩内存，将记忆中已经执行的工具（搜索、网页获取、浏览器访问结果等）这类已经执行过的消息移除
         """
-
+        compacted = False
         for message in self.messages:
             if self.get_message_role(message) != 'tool':
                 # todo 工具名称待定
                 if message.get('function_name') in []:
                     message['content'] = '(removed)'
+                    compacted = True
                     logger.debug(
                         f'从记忆中移除工具执行结果：{message["function_name"]}')
 
+        # 压缩会原地修改历史消息，增量日志无法表达，需要整体重写快照
+        if compacted:
+            self.mark_reset()
+
+    def mark_reset(self) -> None:
+        """标记记忆需要整体重写(例如增量写入失败后)"""
+        self._changes.append({'op': 'reset'})
+
+    def pop_changes(self) -> list[Dict[str, Any]]:
+        """取出并清空自上次持久化以来的变更日志"""
+        changes, self._changes = self._changes, []
+        return changes
+
     @property
     def empty(self) -> bool:
         return len(self.messages) == 0
@@ -1,7 +1,6 @@
-from dataclasses import Field
 from typing import List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class Message(BaseModel):
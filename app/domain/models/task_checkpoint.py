@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import Optional, Dict
+
+from pydantic import BaseModel, Field
+
+from app.domain.models.message import Message
+from app.domain.models.plan import Plan
+
+
+class TaskCheckpoint(BaseModel):
+    """任务检查点，在每个步骤事件边界写入，用于进程崩溃后恢复任务"""
+    task_id: str
+    message: Message = Field(default_factory=Message)
+    plan: Optional[Plan] = None
+    memory_cursors: Dict[str, int] = Field(
+        default_factory=dict, description='各Agent记忆在检查点时的消息数量')
+    pending_update_step_id: Optional[str] = Field(
+        default=None, description='已执行结束但尚未据此更新计划的步骤ID')
+    last_event_id: Optional[str] = Field(
+        default=None, description='检查点对应的输出流事件ID')
+    updated_at: datetime = Field(default_factory=datetime.now)
@@ -0,0 +1,64 @@
+import base64
+from datetime import datetime
+from typing import Optional, Dict, Any, List, ClassVar, Tuple
+
+from pydantic import BaseModel, Field
+
+
+class ArchivedEvent(BaseModel):
+    """归档到数据库中的任务事件"""
+    task_id: str
+    seq: int = Field(description='由流ID编码得到的递增序号，用于分页游标')
+    event_id: str = Field(description='输出流中的事件ID，可用于从该事件之后继续订阅')
+    type: str = ''
+    data: Dict[str, Any] = Field(default_factory=dict)
+    created_at: datetime
+
+    # 流ID形如<毫秒时间戳>-<序号>，序号占低20位
+    seq_bits: ClassVar[int] = 20
+
+    @classmethod
+    def seq_from_event_id(cls, event_id: str) -> int:
+        ms, _, seq = event_id.partition('-')
+        return (int(ms) << cls.seq_bits) | int(seq or 0)
+
+    @classmethod
+    def seq_to_ms(cls, seq: int) -> int:
+        return seq >> cls.seq_bits
+
+
+class ArchivedTask(BaseModel):
+    """已归档任务的概要信息"""
+    task_id: str
+    first_event_at: datetime
+    last_event_at: datetime
+    event_count: int = 0
+    last_event_type: str = ''
+
+    @property
+    def cursor(self) -> str:
+        """以该任务作为上一页最后一条时的分页游标"""
+        return base64.urlsafe_b64encode(
+            f'{self.last_event_at.isoformat()}|{self.task_id}'.encode()
+        ).decode()
+
+    @classmethod
+    def parse_cursor(cls, cursor: str) -> Tuple[datetime, str]:
+        """将分页游标还原为(最后活跃时间, 任务ID)，游标无效时抛出ValueError"""
+        last_event_at, sep, task_id = base64.urlsafe_b64decode(
+            cursor.encode()).decode().partition('|')
+        if not sep:
+            raise ValueError(f'分页游标[{cursor}]格式错误')
+        return datetime.fromisoformat(last_event_at), task_id
+
+
+class TaskEventPage(BaseModel):
+    """任务历史事件分页，next_seq为空表示没有更多事件"""
+    items: List[ArchivedEvent] = Field(default_factory=list)
+    next_seq: Optional[int] = None
+
+
+class TaskHistoryPage(BaseModel):
+    """历史任务分页，next_cursor为空表示没有更多任务"""
+    items: List[ArchivedTask] = Field(default_factory=list)
+    next_cursor: Optional[str] = None
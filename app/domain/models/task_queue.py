@@ -0,0 +1,20 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class TaskQueueStats(BaseModel):
+    """任务队列统计信息，可作为Worker扩缩容的指标"""
+    length: int = Field(default=0, description='队列中的任务数量')
+    pending: int = Field(default=0, description='已被Worker领取但未确认的任务数量')
+    lag: Optional[int] = Field(default=None, description='尚未被任何Worker领取的任务数量')
+    consumers: int = Field(default=0, description='消费该队列的Worker数量')
+
+
+class StreamConsumerStats(BaseModel):
+    """任务输出流消费者统计信息，用于观察慢客户端"""
+    task_id: str
+    consumers: int = Field(default=0, description='当前进程中订阅该任务事件的客户端数量')
+    max_lag_ms: int = Field(default=0, description='落后最多的客户端的延迟毫秒数，按流ID时间戳计算')
+    max_pending: int = Field(default=0, description='客户端流控窗口中未发送的最大事件数量')
+    coalesced: int = Field(default=0, description='因客户端落后而被合并的事件数量')
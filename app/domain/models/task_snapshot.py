@@ -0,0 +1,70 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional, List
+
+from pydantic import BaseModel, Field
+
+from app.domain.models.event import Event, PlanEvent, TitleEvent, StepEvent, \
+    MessageEvent, ToolEvent, WaitEvent, ErrorEvent, CancelEvent, DoneEvent
+from app.domain.models.plan import Plan
+
+
+class TaskStatus(str, Enum):
+    """任务状态"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    WAITING = 'waiting'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+
+class TaskSnapshot(BaseModel):
+    """任务状态快照，由事件发布器按事件增量维护，客户端重连时读取快照后从last_event_id继续订阅"""
+    task_id: str
+    status: TaskStatus = TaskStatus.PENDING
+    title: str = ''
+    plan: Optional[Plan] = None
+    plan_version: int = Field(default=0, description='快照中计划的版本号')
+    messages: List[MessageEvent] = Field(
+        default_factory=list, description='最近的消息事件')
+    last_tool_event: Optional[ToolEvent] = None
+    error: Optional[str] = None
+    last_event_id: Optional[str] = Field(
+        default=None, description='快照已包含的最后一个输出流事件ID')
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+    def apply(self, event: Event, max_messages: int = 20) -> None:
+        """将事件合并到快照中"""
+        if isinstance(event, PlanEvent):
+            self.plan = event.plan.model_copy(deep=True)
+            self.plan_version = event.version
+            self.title = self.title or event.plan.title
+            self.status = TaskStatus.RUNNING
+        elif isinstance(event, TitleEvent):
+            self.title = event.title
+        elif isinstance(event, StepEvent):
+            self.status = TaskStatus.RUNNING
+            if self.plan is not None:
+                self.plan.steps = [
+                    event.step.model_copy(deep=True)
+                    if step.id == event.step.id else step
+                    for step in self.plan.steps
+                ]
+        elif isinstance(event, MessageEvent):
+            self.messages = [*self.messages, event][-max_messages:]
+            if self.status == TaskStatus.WAITING:
+                self.status = TaskStatus.RUNNING
+        elif isinstance(event, ToolEvent):
+            self.last_tool_event = event
+        elif isinstance(event, WaitEvent):
+            self.status = TaskStatus.WAITING
+        elif isinstance(event, ErrorEvent):
+            self.status = TaskStatus.FAILED
+            self.error = event.error
+        elif isinstance(event, CancelEvent):
+            self.status = TaskStatus.CANCELLED
+        elif isinstance(event, DoneEvent):
+            self.status = TaskStatus.COMPLETED
+
+        self.updated_at = datetime.now()
@@ -5,7 +5,14 @@ from app.domain.models.app_config import AppConfig
 
 class AppConfigRepository(Protocol):
     def load(self) -> Optional[AppConfig]:
+        """读取配置，实现方可以返回内存中缓存的配置，调用方修改前需要复制"""
         ...
 
-    def save(self, app_config: AppConfig):
+    def get_version(self) -> int:
+        """获取当前配置的版本，配置内容变化后版本随之变化"""
+        ...
+
+    async def save(self, app_config: AppConfig,
+                   base_version: Optional[int] = None):
+        """保存配置，传递base_version时只有当前版本与之相同才写入，否则抛出ConflictError"""
         ...
@@ -0,0 +1,19 @@
+from typing import Protocol
+
+from app.domain.models.memory import Memory
+
+
+class MemoryRepository(Protocol):
+    """Agent记忆仓库，以追加日志的方式持久化记忆"""
+
+    async def load(self, memory_id: str) -> Memory:
+        """根据记忆ID加载记忆，不存在时返回空记忆"""
+        ...
+
+    async def save(self, memory_id: str, memory: Memory) -> None:
+        """将记忆自上次保存以来的增量变更追加写入"""
+        ...
+
+    async def delete(self, memory_id: str) -> None:
+        """删除记忆"""
+        ...
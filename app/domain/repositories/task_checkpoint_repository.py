@@ -0,0 +1,20 @@
+from typing import Protocol, Optional, List
+
+from app.domain.models.task_checkpoint import TaskCheckpoint
+
+
+class TaskCheckpointRepository(Protocol):
+    """任务检查点仓库"""
+
+    async def get(self, task_id: str) -> Optional[TaskCheckpoint]:
+        ...
+
+    async def save(self, checkpoint: TaskCheckpoint) -> None:
+        ...
+
+    async def delete(self, task_id: str) -> None:
+        ...
+
+    async def list_task_ids(self) -> List[str]:
+        """获取所有存在检查点的任务ID"""
+        ...
@@ -0,0 +1,22 @@
+from datetime import datetime
+from typing import Protocol, List, Optional, Tuple
+
+from app.domain.models.task_history import ArchivedEvent, ArchivedTask
+
+
+class TaskEventArchiveRepository(Protocol):
+    """任务事件归档仓库，保存任务事件的完整历史供查询"""
+
+    async def save_events(self, events: List[ArchivedEvent]) -> int:
+        """批量保存事件，已存在的事件会被忽略，返回实际写入的数量"""
+        ...
+
+    async def list_events(self, task_id: str, after_seq: Optional[int],
+                          limit: int) -> List[ArchivedEvent]:
+        """按seq升序返回after_seq之后的事件"""
+        ...
+
+    async def list_tasks(self, before: Optional[Tuple[datetime, str]],
+                         limit: int) -> List[ArchivedTask]:
+        """按最后事件时间倒序返回(last_event_at, task_id)位于before之前的任务"""
+        ...
@@ -0,0 +1,16 @@
+from typing import Protocol, Optional
+
+from app.domain.models.task_snapshot import TaskSnapshot
+
+
+class TaskSnapshotRepository(Protocol):
+    """任务状态快照仓库"""
+
+    async def get(self, task_id: str) -> Optional[TaskSnapshot]:
+        ...
+
+    async def save(self, snapshot: TaskSnapshot) -> None:
+        ...
+
+    async def delete(self, task_id: str) -> None:
+        ...
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+from typing import Optional, Tuple, List
+
+from app.domain.external.json_parser import JSONParser
+from app.domain.external.llm import LLM
+from app.domain.external.search import SearchEngine
+from app.domain.external.task import TaskRunner, Task
+from app.domain.models.app_config import AgentConfig, McpConfig
+from app.domain.models.event import ErrorEvent, StepEvent, CancelEvent, \
+    StepEventStatus, PlanEvent, PlanEventStatus
+from app.domain.models.memory import Memory
+from app.domain.models.message import Message
+from app.domain.models.task_checkpoint import TaskCheckpoint
+from app.domain.models.task_snapshot import TaskSnapshot
+from app.domain.repositories.memory_repository import MemoryRepository
+from app.domain.repositories.task_checkpoint_repository import \
+    TaskCheckpointRepository
+from app.domain.repositories.task_snapshot_repository import \
+    TaskSnapshotRepository
+from app.domain.services.agents.base import BaseAgent
+from app.domain.services.agents.planner import PlannerAgent
+from app.domain.services.agents.react import ReactAgent
+from app.domain.services.event_delta import EventDeltaEncoder
+from app.domain.services.event_publisher import EventPublisher
+from app.domain.services.flows.planner_react import PlannerReActFlow
+from app.domain.services.tools.mcp import MCPTool, MCPSessionPool
+from app.domain.services.tools.search import SearchTool
+
+logger = logging.getLogger(__name__)
+
+
+class AgentTaskRunner(TaskRunner):
+    """Agent任务运行器，从输入流读取用户消息执行流程，并将事件写入输出流"""
+
+    def __init__(
+            self,
+            llm: LLM,
+            agent_config: AgentConfig,
+            mcp_config: McpConfig,
+            mcp_session_pool: MCPSessionPool,
+            json_parser: JSONParser,
+            search_engine: SearchEngine,
+            memory_repository: MemoryRepository,
+            checkpoint_repository: TaskCheckpointRepository,
+            snapshot_repository: TaskSnapshotRepository,
+            delta_encoding: bool = False,
+    ):
+        self._llm = llm
+        self._agent_config = agent_config
+        self._mcp_config = mcp_config
+        self._json_parser = json_parser
+        self._memory_repository = memory_repository
+        self._checkpoint_repository = checkpoint_repository
+        self._snapshot_repository = snapshot_repository
+        self._delta_encoding = delta_encoding
+
+        self._mcp_tool = MCPTool(mcp_session_pool)
+        self._tools = [SearchTool(search_engine), self._mcp_tool]
+
+    @classmethod
+    def memory_ids(cls, task_id: str) -> List[str]:
+        """任务中各Agent的记忆ID，任务被回收时据此删除记忆"""
+        return [f'{task_id}:{agent_cls.name}'
+                for agent_cls in (PlannerAgent, ReactAgent)]
+
+    async def _load_memory(self, memory_id: str,
+                           cursor: Optional[int] = None) -> Memory:
+        memory = await self._memory_repository.load(memory_id)
+
+        # 从检查点恢复时丢弃检查点之后(未完成步骤)产生的消息
+        if cursor is not None and len(memory.messages) > cursor:
+            memory.messages = memory.messages[:cursor]
+            memory.mark_reset()
+
+        return memory
+
+    async def _create_agents(
+            self, task_id: str, checkpoint: Optional[TaskCheckpoint] = None
+    ) -> Tuple[PlannerAgent, ReactAgent]:
+        cursors = checkpoint.memory_cursors if checkpoint else {}
+
+        agents = []
+        for agent_cls, memory_id in zip((PlannerAgent, ReactAgent),
+                                        self.memory_ids(task_id)):
+            memory = await self._load_memory(
+                memory_id, cursors.get(agent_cls.name))
+            agents.append(agent_cls(
+                agent_config=self._agent_config,
+                llm=self._llm,
+                memory=memory,
+                json_parser=self._json_parser,
+                tools=self._tools,
+                memory_repository=self._memory_repository,
+                memory_id=memory_id,
+            ))
+
+        planner, react = agents
+        return planner, react
+
+    @classmethod
+    def _memory_cursors(cls, *agents: BaseAgent) -> dict[str, int]:
+        return {agent.name: len(agent.memory.messages) for agent in agents}
+
+    async def _run_flow(self, task: Task, message: Message,
+                        checkpoint: Optional[TaskCheckpoint] = None,
+                        message_id: Optional[str] = None) -> None:
+        planner, react = await self._create_agents(task.id, checkpoint)
+        flow = PlannerReActFlow(planner=planner, react=react)
+
+        # 写入初始检查点，保证取出的用户消息在崩溃后不会丢失
+        if checkpoint is None:
+            checkpoint = TaskCheckpoint(
+                task_id=task.id,
+                message=message,
+                memory_cursors=self._memory_cursors(planner, react),
+            )
+            await self._checkpoint_repository.save(checkpoint)
+
+        # 消息已写入检查点，确认后从输入流删除
+        if message_id is not None:
+            await task.input_stream.ack(message_id)
+
+        snapshot = await self._snapshot_repository.get(task.id) or \
+                   TaskSnapshot(task_id=task.id)
+        encoder = None
+        if self._delta_encoding:
+            # 从快照恢复编码状态，增量以客户端已收到的最新计划为基础
+            encoder = EventDeltaEncoder()
+            encoder.seed(snapshot.plan, snapshot.plan_version)
+
+        publisher = EventPublisher(
+            task.output_stream,
+            snapshot_repository=self._snapshot_repository,
+            snapshot=snapshot,
+            encoder=encoder,
+        )
+        try:
+            async for event in flow.invoke(
+                    message, plan=checkpoint.plan,
+                    pending_update_step_id=checkpoint.pending_update_step_id):
+                event_id = await publisher.publish(event)
+
+                # 在步骤事件与计划更新事件边界写入检查点：计划、步骤状态、记忆游标、事件ID；
+                # 步骤结束后规划Agent才会更新计划，记录待更新的步骤，恢复时补做计划更新
+                if isinstance(event, StepEvent):
+                    checkpoint.pending_update_step_id = None \
+                        if event.status == StepEventStatus.STARTED \
+                        else event.step.id
+                elif isinstance(event, PlanEvent) and \
+                        event.status == PlanEventStatus.UPDATED:
+                    checkpoint.pending_update_step_id = None
+                else:
+                    continue
+
+                checkpoint.plan = flow.plan
+                checkpoint.memory_cursors = self._memory_cursors(
+                    planner, react)
+                checkpoint.last_event_id = await event_id
+                await self._checkpoint_repository.save(checkpoint)
+        except asyncio.CancelledError:
+            # 进程退出导致的中断不输出事件，任务稍后从检查点恢复
+            if task.cancel_requested:
+                logger.info(f'任务[{task.id}]已被用户取消')
+                await publisher.publish(CancelEvent())
+                # 运行器可能在取消请求删除检查点之后再次写入，这里删除避免已取消的任务被恢复
+                await self._checkpoint_repository.delete(task.id)
+            raise
+        except Exception as e:
+            logger.exception(f'任务[{task.id}]执行流程出错: {e}')
+            await publisher.publish(ErrorEvent(error=f'任务执行出错: {e}'))
+        finally:
+            await publisher.close()
+
+        await self._checkpoint_repository.delete(task.id)
+
+    async def invoke(self, task: Task) -> None:
+        try:
+            await self._mcp_tool.initialize(self._mcp_config)
+        except Exception as e:
+            logger.error(f'任务[{task.id}]初始化MCP工具失败: {e}')
+
+        try:
+            checkpoint = await self._checkpoint_repository.get(task.id)
+            if checkpoint is not None:
+                logger.info(
+                    f'任务[{task.id}]从检查点恢复，最后事件ID: {checkpoint.last_event_id}')
+                await self._run_flow(task, checkpoint.message, checkpoint)
+
+            while not await task.input_stream.is_empty():
+                message_id, data = await task.input_stream.pop()
+                if data is None:
+                    break
+
+                message = Message.model_validate_json(data)
+                logger.info(f'任务[{task.id}]收到消息: {message.message}')
+                await self._run_flow(task, message, message_id=message_id)
+        finally:
+            await self.destroy()
+
+    async def destroy(self) -> None:
+        await self._mcp_tool.cleanup()
+
+    async def on_done(self, task: Task) -> None:
+        logger.info(f'任务[{task.id}]运行结束，释放运行器资源')
+        await self.destroy()
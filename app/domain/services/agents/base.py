@@ -14,6 +14,7 @@ from app.domain.models.event import Event, ToolEvent, ToolEventStatus, \
 from app.domain.models.memory import Memory
 from app.domain.models.message import Message
 from app.domain.models.tool_result import ToolResult
+from app.domain.repositories.memory_repository import MemoryRepository
 from app.domain.services.tools.base import BaseTool
 
 logger = logging.getLogger(__name__)
@@ -33,12 +34,16 @@ class BaseAgent(ABC):
             memory: Memory,
             json_parser: JSONParser,
             tools: List[BaseTool],
+            memory_repository: Optional[MemoryRepository] = None,
+            memory_id: Optional[str] = None,
     ):
         self._agent_config = agent_config
         self._llm = llm
         self._memory = memory
         self._json_parser = json_parser
         self._tools = tools
+        self._memory_repository = memory_repository
+        self._memory_id = memory_id
 
     @property
     def memory(self) -> Memory:
@@ -66,7 +71,7 @@ class BaseAgent(ABC):
         for _ in range(self._agent_config.max_retries):
             try:
                 message = await self._llm.invoke(
-                    messages,
+                    self._memory.get_messages(),
                     self._get_available_tools(),
                     response_format=response_format,
                     tool_choice=self._tool_choice,
@@ -81,6 +86,7 @@ class BaseAgent(ABC):
                             {'role': 'user', 'content': 'AI无响应内容，请继续'},
                         ])
                         await asyncio.sleep(self._retry_interval)
+                        continue
 
                     filtered_message = {'role': 'assistant',
                                         'content': message.get('content')}
@@ -94,11 +100,15 @@ class BaseAgent(ABC):
                     filtered_message = message
 
                 await self._add_to_memory([filtered_message])
+                return filtered_message
             except Exception as e:
                 logger.error(f'调用 LLM 发生错误：{str(e)}')
                 await asyncio.sleep(self._retry_interval)
                 continue
 
+        raise RuntimeError(
+            f'调用 LLM 超过最大重试次数：{self._agent_config.max_retries}')
+
     async def _invoke_tool(self, tool: BaseTool, tool_name: str,
                            tool_args: Dict[str, Any]) -> ToolResult:
         error = ''
@@ -120,9 +130,21 @@ class BaseAgent(ABC):
             })
 
         self._memory.add_messages(messages)
+        await self._save_memory()
+
+    async def _save_memory(self) -> None:
+        """将记忆的增量变更追加写入记忆仓库，未配置仓库时跳过"""
+        if not self._memory_repository or not self._memory_id:
+            return
+
+        try:
+            await self._memory_repository.save(self._memory_id, self._memory)
+        except Exception as e:
+            logger.error(f'持久化 Agent[{self.name}] 记忆失败：{str(e)}')
 
     async def compact_memory(self):
         self._memory.compact()
+        await self._save_memory()
 
     async def roll_back(self, message: Message) -> None:
         last_message = self._memory.get_last_message()
@@ -145,6 +167,8 @@ class BaseAgent(ABC):
         else:
             self._memory.roll_back()
 
+        await self._save_memory()
+
     async def invoke(self, query: str, format: Optional[str] = None) -> \
             AsyncGenerator[Event, None]:
         format = format or self._format
@@ -154,7 +178,7 @@ class BaseAgent(ABC):
             format
         )
 
-        for _ in range(self._agent_config.max_retries):
+        for _ in range(self._agent_config.max_iterations):
             if not message.get('tool_calls'):
                 break
 
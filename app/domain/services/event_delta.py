@@ -0,0 +1,214 @@
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, List, Dict, Optional, Annotated
+
+from pydantic import Field, TypeAdapter
+
+from app.domain.models.event import Event, PlanEvent, PlanDeltaEvent, \
+    PlanEventStatus, ToolEvent, ToolEventStatus, PatchOperation
+from app.domain.models.plan import Plan
+
+logger = logging.getLogger(__name__)
+
+_event_adapter = TypeAdapter(Annotated[Event, Field(discriminator='type')])
+
+
+def parse_event(data: str) -> Event:
+    """根据type字段将JSON解析为对应的事件"""
+    return _event_adapter.validate_json(data)
+
+
+_TYPE_FIELD = '"type":"'
+# 事件由模型序列化，type字段紧跟在id之后，只需在开头查找
+_TYPE_SNIFF_LENGTH = 128
+
+
+def event_type(data: str) -> str:
+    """返回事件JSON的type字段，只查看开头的字段而不解析整个事件，找不到时才完整解析"""
+    start = data.find(_TYPE_FIELD, 0, _TYPE_SNIFF_LENGTH)
+    if start < 0:
+        parsed = json.loads(data)
+        return parsed.get('type', '') if isinstance(parsed, dict) else ''
+    start += len(_TYPE_FIELD)
+    return data[start:data.find('"', start)]
+
+
+def diff_plan(old: Dict[str, Any], new: Dict[str, Any]) -> List[PatchOperation]:
+    """比较两个版本的计划，生成JSON-Patch风格的变更操作，步骤按下标逐字段比较"""
+    ops = []
+    for key, value in new.items():
+        if key == 'steps':
+            continue
+        if old.get(key) != value:
+            ops.append(PatchOperation(op='replace', path=f'/{key}', value=value))
+
+    old_steps, new_steps = old.get('steps', []), new.get('steps', [])
+    for index, step in enumerate(new_steps):
+        if index >= len(old_steps):
+            ops.append(PatchOperation(op='add', path=f'/steps/{index}',
+                                      value=step))
+            continue
+        for key, value in step.items():
+            if old_steps[index].get(key) != value:
+                ops.append(PatchOperation(
+                    op='replace', path=f'/steps/{index}/{key}', value=value))
+
+    # 从后往前删除，保证下标有效
+    for index in range(len(old_steps) - 1, len(new_steps) - 1, -1):
+        ops.append(PatchOperation(op='remove', path=f'/steps/{index}'))
+    return ops
+
+
+def apply_patch(document: Dict[str, Any], ops: List[PatchOperation]) -> None:
+    """将变更操作应用到文档上(原地修改)"""
+    for op in ops:
+        keys = op.path.strip('/').split('/')
+        parent = document
+        for key in keys[:-1]:
+            parent = parent[int(key)] if isinstance(parent, list) else \
+                parent[key]
+
+        key = keys[-1]
+        if isinstance(parent, list):
+            index = int(key)
+            if op.op == 'add':
+                parent.insert(index, op.value)
+            elif op.op == 'remove':
+                parent.pop(index)
+            else:
+                parent[index] = op.value
+        elif op.op == 'remove':
+            parent.pop(key, None)
+        else:
+            parent[key] = op.value
+
+
+class EventDeltaEncoder:
+    """事件增量编码器，计划变更编码为相对上一版本的增量，CALLED工具事件引用CALLING事件
+
+    创建计划时以及每隔snapshot_interval个版本发送一次完整计划
+    """
+
+    def __init__(self, snapshot_interval: int = 10, max_tool_calls: int = 100):
+        self._snapshot_interval = snapshot_interval
+        self._max_tool_calls = max_tool_calls
+        self._plan_id: Optional[str] = None
+        self._plan_version = 0
+        self._plan_data: Optional[Dict[str, Any]] = None
+        self._full_version = 0
+        self._tool_calls: OrderedDict[str, str] = OrderedDict()
+
+    def seed(self, plan: Optional[Plan], version: int) -> None:
+        """从快照恢复编码状态，使恢复执行后的版本号保持递增"""
+        self._plan_version = version
+        if plan is not None:
+            self._plan_id = plan.id
+            self._plan_data = plan.model_dump(mode='json')
+
+    def encode(self, event: Event) -> Event:
+        """返回编码后的事件，PlanEvent的version会被原地赋值"""
+        if isinstance(event, PlanEvent):
+            return self._encode_plan(event)
+        if isinstance(event, ToolEvent):
+            return self._encode_tool(event)
+        return event
+
+    def _encode_plan(self, event: PlanEvent) -> Event:
+        self._plan_version += 1
+        event.version = self._plan_version
+
+        plan_data = event.plan.model_dump(mode='json')
+        base_data, base_version = self._plan_data, self._plan_version - 1
+        self._plan_data = plan_data
+
+        send_full = base_data is None or \
+                    self._plan_id != event.plan.id or \
+                    event.status == PlanEventStatus.CREATED or \
+                    self._plan_version - self._full_version >= \
+                    self._snapshot_interval
+        self._plan_id = event.plan.id
+        if send_full:
+            self._full_version = self._plan_version
+            return event
+
+        return PlanDeltaEvent(
+            id=event.id,
+            created_at=event.created_at,
+            plan_id=event.plan.id,
+            status=event.status,
+            version=self._plan_version,
+            base_version=base_version,
+            ops=diff_plan(base_data, plan_data),
+        )
+
+    def _encode_tool(self, event: ToolEvent) -> Event:
+        if event.status == ToolEventStatus.CALLING:
+            self._tool_calls[event.tool_call_id] = event.id
+            while len(self._tool_calls) > self._max_tool_calls:
+                self._tool_calls.popitem(last=False)
+            return event
+
+        calling_event_id = self._tool_calls.pop(event.tool_call_id, None)
+        if calling_event_id is None:
+            return event
+        return event.model_copy(update={
+            'function_args': {},
+            'calling_event_id': calling_event_id,
+        })
+
+
+class EventDeltaDecoder:
+    """事件增量解码器，将增量事件还原为完整事件，供不支持增量模式的客户端使用"""
+
+    def __init__(self, max_tool_calls: int = 100):
+        self._max_tool_calls = max_tool_calls
+        self._plan_data: Optional[Dict[str, Any]] = None
+        self._plan_version = 0
+        self._tool_args: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+
+    def seed(self, plan: Optional[Plan], version: int) -> None:
+        if plan is not None:
+            self._plan_data = plan.model_dump(mode='json')
+            self._plan_version = version
+
+    @property
+    def has_plan(self) -> bool:
+        return self._plan_data is not None
+
+    def decode(self, event: Event) -> Optional[Event]:
+        """返回还原后的完整事件，增量事件无法还原(缺少基础版本)时返回None"""
+        if isinstance(event, PlanEvent):
+            self._plan_data = event.plan.model_dump(mode='json')
+            self._plan_version = event.version
+            return event
+
+        if isinstance(event, PlanDeltaEvent):
+            if self._plan_data is None or \
+                    self._plan_version != event.base_version:
+                if self._plan_version < event.version:
+                    logger.warning(
+                        f'计划增量事件基础版本[{event.base_version}]与当前版本[{self._plan_version}]不一致，跳过')
+                return None
+
+            apply_patch(self._plan_data, event.ops)
+            self._plan_version = event.version
+            return PlanEvent(
+                id=event.id,
+                created_at=event.created_at,
+                plan=Plan.model_validate(self._plan_data),
+                status=event.status,
+                version=event.version,
+            )
+
+        if isinstance(event, ToolEvent):
+            if event.status == ToolEventStatus.CALLING:
+                self._tool_args[event.id] = event.function_args
+                while len(self._tool_args) > self._max_tool_calls:
+                    self._tool_args.popitem(last=False)
+            elif event.calling_event_id:
+                return event.model_copy(update={
+                    'function_args': self._tool_args.pop(
+                        event.calling_event_id, {}),
+                })
+        return event
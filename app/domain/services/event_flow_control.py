@@ -0,0 +1,200 @@
+import asyncio
+import itertools
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Tuple, List, Optional, Dict
+
+from app.domain.models.event import PlanEvent, PlanDeltaEvent
+from app.domain.models.plan import Plan
+from app.domain.services.event_delta import parse_event, apply_patch, \
+    event_type
+
+logger = logging.getLogger(__name__)
+
+_STREAM_ID = re.compile(r'^\d+(-\d+)?$')
+
+
+def is_stream_id(value: str) -> bool:
+    """判断字符串是否为合法的流ID(<毫秒时间戳>-<序号>或<毫秒时间戳>)"""
+    return _STREAM_ID.match(value) is not None
+
+
+def stream_id_ms(event_id: str) -> int:
+    """流ID形如<毫秒时间戳>-<序号>，返回其中的时间戳"""
+    return int(event_id.partition('-')[0])
+
+
+def _coalesce_kind(data: str) -> Optional[str]:
+    # 完整计划与计划增量互相取代，排队位置只有最新的有意义
+    kind = event_type(data)
+    if kind in ('plan', 'plan_delta'):
+        return 'plan'
+    if kind == 'queue':
+        return 'queue'
+    return None
+
+
+class EventFlowController:
+    """单个消费者的事件流控，位于输出流订阅与客户端连接之间
+
+    - 有界窗口: 未被消费者取走的事件最多保留window条，窗口满时暂停读取上游，
+      由上游订阅的有界缓冲区溢出后从消息流补读，慢客户端占用的内存有上限
+    - 延迟度量: 以最新读到的事件与最早未取走的事件的流ID时间戳之差作为消费者落后的毫秒数，
+      窗口满暂停读取上游期间再加上暂停的时长
+    - 合并: 消费者落后(被取代的事件仍未取走)时，旧版本完整计划、相邻的计划增量、排队位置
+      合并为一条并移到窗口末尾，使用最新事件的ID，保证事件ID递增、断线重连不丢事件
+    跟得上的消费者窗口中最多只有一条事件，不会触发合并
+    """
+
+    def __init__(self, task_id: str, events: AsyncIterator[Tuple[str, str]],
+                 window: int = 1000):
+        self._task_id = task_id
+        self._events = events
+        self._window = window
+        self._pending: OrderedDict[int, Tuple[str, str]] = OrderedDict()
+        self._latest: Dict[str, int] = {}
+        self._counter = itertools.count()
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._pump_task: Optional[asyncio.Task] = None
+        self._finished = False
+        self._error: Optional[BaseException] = None
+        self._received_id: Optional[str] = None
+        self._blocked_at: Optional[float] = None
+        self.coalesced = 0
+
+    @property
+    def task_id(self) -> str:
+        return self._task_id
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @property
+    def lag_ms(self) -> int:
+        if not self._pending or self._received_id is None:
+            return 0
+        oldest_id = next(iter(self._pending.values()))[0]
+        lag = stream_id_ms(self._received_id) - stream_id_ms(oldest_id)
+        if self._blocked_at is not None:
+            # 暂停读取上游期间新事件不会被读到，落后时长随暂停时间增长
+            lag += int((time.monotonic() - self._blocked_at) * 1000)
+        return lag
+
+    @property
+    def closed(self) -> bool:
+        return self._finished and not self._pending
+
+    @classmethod
+    def _merge(cls, kind: str, previous: str, data: str) -> Optional[str]:
+        """将新事件与被取代的旧事件合并，无法合并时返回None"""
+        if kind == 'queue':
+            return data
+
+        event = parse_event(data)
+        if isinstance(event, PlanEvent):
+            return data
+
+        prev_event = parse_event(previous)
+        if not isinstance(event, PlanDeltaEvent) or \
+                prev_event.version != event.base_version:
+            return None
+
+        if isinstance(prev_event, PlanDeltaEvent):
+            return event.model_copy(update={
+                'base_version': prev_event.base_version,
+                'ops': prev_event.ops + event.ops,
+            }).model_dump_json()
+
+        plan_data = prev_event.plan.model_dump(mode='json')
+        apply_patch(plan_data, event.ops)
+        return PlanEvent(
+            id=event.id,
+            created_at=event.created_at,
+            plan=Plan.model_validate(plan_data),
+            status=event.status,
+            version=event.version,
+        ).model_dump_json()
+
+    async def _put(self, event_id: str, data: str) -> None:
+        kind = _coalesce_kind(data)
+        previous_key = self._latest.get(kind) if kind else None
+        if previous_key is not None:
+            merged = self._merge(kind, self._pending[previous_key][1], data)
+            if merged is not None:
+                del self._pending[previous_key]
+                data = merged
+                self.coalesced += 1
+
+        if len(self._pending) >= self._window:
+            self._blocked_at = time.monotonic()
+            try:
+                while len(self._pending) >= self._window:
+                    self._space.clear()
+                    await self._space.wait()
+            finally:
+                self._blocked_at = None
+
+        key = next(self._counter)
+        self._pending[key] = (event_id, data)
+        if kind:
+            self._latest[kind] = key
+        self._ready.set()
+
+    async def _pump(self) -> None:
+        try:
+            async for event_id, data in self._events:
+                self._received_id = event_id
+                await self._put(event_id, data)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._error = e
+        finally:
+            self._finished = True
+            self._ready.set()
+
+    def _pop(self) -> Tuple[str, str]:
+        key, event = self._pending.popitem(last=False)
+        for kind, latest_key in list(self._latest.items()):
+            if latest_key == key:
+                del self._latest[kind]
+        self._space.set()
+        return event
+
+    async def _wait(self) -> bool:
+        """等待窗口中有事件，上游结束且窗口为空时返回False"""
+        if self._pump_task is None:
+            self._pump_task = asyncio.create_task(self._pump())
+
+        while not self._pending:
+            if self._finished:
+                if self._error is not None:
+                    raise self._error
+                return False
+            self._ready.clear()
+            await self._ready.wait()
+        return True
+
+    async def get_batch(self) -> List[Tuple[str, str]]:
+        """取走窗口中的全部事件，上游结束时返回空列表"""
+        if not await self._wait():
+            return []
+        return [self._pop() for _ in range(len(self._pending))]
+
+    async def __aiter__(self) -> AsyncIterator[Tuple[str, str]]:
+        try:
+            while await self._wait():
+                yield self._pop()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._finished = True
+        self._pending.clear()
+        self._latest.clear()
+        if self._pump_task is not None:
+            self._pump_task.cancel()
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from app.domain.external.message_queue import MessageQueue
+from app.domain.models.event import Event, WaitEvent, DoneEvent, ErrorEvent, \
+    CancelEvent
+from app.domain.models.task_snapshot import TaskSnapshot
+from app.domain.repositories.task_snapshot_repository import \
+    TaskSnapshotRepository
+from app.domain.services.event_delta import EventDeltaEncoder
+
+logger = logging.getLogger(__name__)
+
+
+class EventPublisher:
+    """输出流事件发布器，在短时间窗口内合并事件并批量写入，减少消息队列往返次数
+
+    等待、完成、错误事件对延迟敏感，写入时立即刷新缓冲区；
+    传递快照仓库时，每批事件写入后将事件合并到任务状态快照并保存；
+    传递增量编码器时，写入输出流的是增量编码后的事件，快照仍合并完整事件
+    """
+
+    _immediate_event_types = (WaitEvent, DoneEvent, ErrorEvent, CancelEvent)
+
+    def __init__(self, stream: MessageQueue, flush_interval_ms: int = 5,
+                 max_batch_size: int = 32,
+                 snapshot_repository: Optional[TaskSnapshotRepository] = None,
+                 snapshot: Optional[TaskSnapshot] = None,
+                 encoder: Optional[EventDeltaEncoder] = None):
+        self._stream = stream
+        self._flush_interval = flush_interval_ms / 1000
+        self._max_batch_size = max_batch_size
+        self._snapshot_repository = snapshot_repository
+        self._snapshot = snapshot
+        self._encoder = encoder
+        self._buffer: List[Tuple[Event, str, asyncio.Future]] = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def publish(self, event: Event) -> asyncio.Future:
+        """发布事件，返回事件写入后得到的消息ID的Future"""
+        future = asyncio.get_running_loop().create_future()
+        encoded = self._encoder.encode(event) if self._encoder else event
+        self._buffer.append((event, encoded.model_dump_json(), future))
+
+        if isinstance(event, self._immediate_event_types) or \
+                len(self._buffer) >= self._max_batch_size:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+        return future
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self._flush_interval)
+        self._flush_task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f'批量写入事件失败: {e}')
+
+    async def flush(self) -> None:
+        # 加锁保证批次按发布顺序写入
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+
+            batch, self._buffer = self._buffer, []
+            try:
+                message_ids = await self._stream.put_batch(
+                    [payload for _, payload, _ in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                raise
+
+            for (_, _, future), message_id in zip(batch, message_ids):
+                if not future.done():
+                    future.set_result(message_id)
+
+            await self._save_snapshot(batch, message_ids)
+
+    async def _save_snapshot(self, batch: List[Tuple[Event, str, asyncio.Future]],
+                             message_ids: List[str]) -> None:
+        # 只合并已写入输出流的事件，保证快照与last_event_id一致
+        if self._snapshot_repository is None or self._snapshot is None:
+            return
+
+        for event, _, _ in batch:
+            self._snapshot.apply(event)
+        self._snapshot.last_event_id = message_ids[-1]
+        try:
+            await self._snapshot_repository.save(self._snapshot)
+        except Exception as e:
+            # 事件已写入输出流，快照保存失败不影响任务执行，下次刷新时保存合并后的快照
+            logger.error(f'保存任务[{self._snapshot.task_id}]状态快照失败: {e}')
+
+    async def close(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
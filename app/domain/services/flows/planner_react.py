@@ -0,0 +1,73 @@
+import logging
+from typing import Optional, AsyncGenerator
+
+from app.domain.models.event import Event, PlanEvent, PlanEventStatus, \
+    WaitEvent, DoneEvent, ErrorEvent
+from app.domain.models.message import Message
+from app.domain.models.plan import Plan, ExecutionStatus
+from app.domain.services.agents.planner import PlannerAgent
+from app.domain.services.agents.react import ReactAgent
+
+logger = logging.getLogger(__name__)
+
+
+class PlannerReActFlow:
+    """规划+执行流程：PlannerAgent 拆解计划，ReactAgent 逐步执行，最后汇总"""
+
+    def __init__(self, planner: PlannerAgent, react: ReactAgent):
+        self._planner = planner
+        self._react = react
+        self._plan: Optional[Plan] = None
+
+    @property
+    def plan(self) -> Optional[Plan]:
+        return self._plan
+
+    async def invoke(self, message: Message, plan: Optional[Plan] = None,
+                     pending_update_step_id: Optional[str] = None) -> \
+            AsyncGenerator[Event, None]:
+        """执行流程，传递plan时表示从检查点恢复，已完成的步骤会被跳过；
+        pending_update_step_id为检查点时已执行结束、但还未据此更新计划的步骤，恢复时先补做计划更新"""
+        self._plan = plan
+
+        if self._plan is None:
+            async for event in self._planner.create_plan(message):
+                if isinstance(event, PlanEvent):
+                    self._plan = event.plan
+                yield event
+
+            if self._plan is None:
+                yield ErrorEvent(error='规划Agent未能生成计划，任务处理失败')
+                return
+        else:
+            logger.info(f'从检查点恢复计划[{self._plan.id}]继续执行')
+            step = next((step for step in self._plan.steps
+                         if step.id == pending_update_step_id), None)
+            if step is not None:
+                async for event in self._planner.update_plan(self._plan, step):
+                    yield event
+
+        self._plan.status = ExecutionStatus.RUNNING
+        while True:
+            step = self._plan.get_next_step
+            if step is None:
+                break
+
+            async for event in self._react.execute_step(
+                    self._plan, step, message):
+                yield event
+
+                # 需要用户输入，中断流程等待用户回复
+                if isinstance(event, WaitEvent):
+                    return
+
+            async for event in self._planner.update_plan(self._plan, step):
+                yield event
+
+        self._plan.status = ExecutionStatus.COMPLETED
+        yield PlanEvent(plan=self._plan, status=PlanEventStatus.COMPLETED)
+
+        async for event in self._react.summarize():
+            yield event
+
+        yield DoneEvent()
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import os
 
@@ -11,234 +12,260 @@ from mcp.client.streamable_http import streamablehttp_client
 from app.domain.models.app_config import McpConfig, MCPServerConfig, \
     MCPTransport
 from app.domain.models.tool_result import ToolResult
-from app.application.errors.exceptions import NotFoundError
 from app.domain.services.tools.base import BaseTool
 
 logger = logging.getLogger(__name__)
 
 
-class MCPClientManager:
-    def __init__(self, mcp_config: Optional[McpConfig] = None) -> None:
-        self._mcp_config: McpConfig = mcp_config
-        self._exit_stack: AsyncExitStack = AsyncExitStack()
-        self._client: Dict[str, ClientSession] = {}
-        self._tools: Dict[str, List[Tool]] = {}
-        self._initialized: bool = False
+class MCPServerConnection:
+    """单个MCP服务的长连接
 
-    @property
-    def tools(self) -> Dict[str, List[Tool]]:
-        return self._tools
+    MCP客户端的传输与会话上下文必须在同一个协程中进入和退出，因此每个连接由独立的后台协程建立、
+    周期性ping检查健康、断开后按指数退避重连，关闭时也在该协程中退出上下文；
+    连接建立后至少一次ping成功才重置退避，连上即断开的服务不会被频繁重连
+    """
 
-    async def initialize(self) -> None:
-        if self._initialized:
-            return
+    def __init__(self, server_name: str, server_config: MCPServerConfig,
+                 ping_interval: float, max_backoff: float) -> None:
+        self.server_name = server_name
+        self.server_config = server_config
+        self.session: Optional[ClientSession] = None
+        self.tools: List[Tool] = []
+        self.error: Optional[str] = None
 
-        try:
-            logger.info(
-                f'从config.yaml中加载了{len(self._mcp_config.mcpServers)}个MCP服务器')
-            await self._connect_mcp_servers()
-            self._initialized = True
-            logger.info(f'MCP客户端加载成功')
-        except Exception as e:
-            logger.error(f'MCP客户端管理器加载失败：{str(e)}')
-            raise
+        self._ping_interval = ping_interval
+        self._max_backoff = max_backoff
+        self._failures = 0
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
 
-    async def _connect_mcp_servers(self) -> None:
-        for server_name, server_config in self._mcp_config.mcpServers.items():
-            try:
-                await self._connect_mcp_server(server_name, server_config)
-            except Exception as e:
-                logger.error(f'连接MCP服务器[{server_name}]出错：{str(e)}')
-                continue
+    @property
+    def connected(self) -> bool:
+        return self.session is not None
 
-    async def _connect_mcp_server(self, server_name: str,
-                                  server_config: MCPServerConfig) -> None:
+    async def wait_ready(self, timeout: float) -> None:
+        """等待首次连接完成(成功或失败)"""
         try:
-            transport = server_config.transport
-            if transport == MCPTransport.STDIO:
-                await self._connect_stdio_server(server_name, server_config)
-            elif transport == MCPTransport.SSE:
-                await self._connect_sse_server(server_name, server_config)
-            elif transport == MCPTransport.STREAMABLE_HTTP:
-                await self._connect_streamable_http_server(
-                    server_name, server_config)
-            else:
-                raise ValueError(
-                    f'MPC服务[{server_name}]的传输协议[{transport}]不支持')
-        except Exception as e:
-            logger.error(f'连接MCP服务器[{server_name}]出错：{str(e)}')
-            raise
-
-    async def _connect_stdio_server(self, server_name: str,
-                                    server_config: MCPServerConfig) -> None:
-        command = server_config.command
-        args = server_config.args
-        env = server_config.env
-
-        if not command:
-            raise ValueError(f'stdio MPC服务[{server_name}]的命令不能为空')
-
-        server_parameters = StdioServerParameters(
-            command=command,
-            args=args,
-            env={**os.environ, **env}
-        )
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f'等待MCP服务器[{self.server_name}]连接超时')
 
-        try:
-            stdio_transport = await self._exit_stack.enter_async_context(
-                stdio_client(server_parameters)
-            )
-            read_stream, write_stream = stdio_transport
-            session: ClientSession = await self._exit_stack.enter_async_context(
-                ClientSession(
-                    read_stream=read_stream,
-                    write_stream=write_stream
-                )
-            )
-            await session.initialize()
+    async def _open_session(self, stack: AsyncExitStack) -> ClientSession:
+        server_config = self.server_config
+        transport = server_config.transport
 
-            self._client[server_name] = session
-            await self._cache_mcp_server_tools(server_name, session)
+        if transport == MCPTransport.STDIO:
+            if not server_config.command:
+                raise ValueError(
+                    f'stdio MPC服务[{self.server_name}]的命令不能为空')
+            server_parameters = StdioServerParameters(
+                command=server_config.command,
+                args=server_config.args or [],
+                env={**os.environ, **(server_config.env or {})}
+            )
+            read_stream, write_stream = await stack.enter_async_context(
+                stdio_client(server_parameters))
+        elif transport == MCPTransport.SSE:
+            if not server_config.url:
+                raise ValueError(f'sse MPC服务[{self.server_name}]的URL不能为空')
+            read_stream, write_stream = await stack.enter_async_context(
+                sse_client(url=server_config.url,
+                           headers=server_config.headers))
+        elif transport == MCPTransport.STREAMABLE_HTTP:
+            if not server_config.url:
+                raise ValueError(
+                    f'streamable_http MPC服务[{self.server_name}]的URL不能为空')
+            read_stream, write_stream, *_ = await stack.enter_async_context(
+                streamablehttp_client(url=server_config.url,
+                                      headers=server_config.headers))
+        else:
+            raise ValueError(
+                f'MPC服务[{self.server_name}]的传输协议[{transport}]不支持')
 
-            logger.info(f'成功连接 stdio MCP服务器[{server_name}]')
-        except Exception as e:
-            logger.error(f'连接 stdio MCP服务器[{server_name}]出错：{str(e)}')
-            raise
+        session: ClientSession = await stack.enter_async_context(
+            ClientSession(read_stream=read_stream, write_stream=write_stream)
+        )
+        await session.initialize()
+        return session
 
-    async def _connect_sse_server(self, server_name: str,
-                                  server_config: MCPServerConfig) -> None:
-        url = server_config.url
-        if not url:
-            raise ValueError(f'sse MPC服务[{server_name}]的URL不能为空')
+    async def _keepalive(self, session: ClientSession) -> None:
+        """周期性ping服务器，连接关闭时返回，ping失败时抛出异常以触发重连"""
+        while True:
+            try:
+                await asyncio.wait_for(self._closing.wait(),
+                                       self._ping_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            await asyncio.wait_for(session.send_ping(), self._ping_interval)
+            self._failures = 0
+
+    async def _run(self) -> None:
+        while not self._closing.is_set():
+            try:
+                async with AsyncExitStack() as stack:
+                    session = await self._open_session(stack)
+                    tools_response = await session.list_tools()
+                    self.tools = tools_response.tools if tools_response else []
+                    self.session = session
+                    self.error = None
+                    self._ready.set()
+                    logger.info(
+                        f'成功连接MCP服务器[{self.server_name}]，提供了{len(self.tools)}个工具')
+
+                    await self._keepalive(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.error = str(e)
+                logger.error(f'MCP服务器[{self.server_name}]连接出错：{str(e)}')
+            finally:
+                self.session = None
+
+            self._ready.set()
+            if self._closing.is_set():
+                break
+
+            self._failures += 1
+            backoff = min(self._max_backoff, 2 ** (self._failures - 1))
+            logger.info(f'{backoff}秒后重新连接MCP服务器[{self.server_name}]')
+            try:
+                await asyncio.wait_for(self._closing.wait(), backoff)
+            except asyncio.TimeoutError:
+                pass
 
+    async def close(self) -> None:
+        self._closing.set()
         try:
-            sse_transport = await self._exit_stack.enter_async_context(
-                sse_client(url=url, headers=server_config.headers)
-            )
+            await self._task
+        except Exception as e:
+            logger.error(f'关闭MCP服务器[{self.server_name}]连接出错：{str(e)}')
+        logger.info(f'已断开MCP服务器[{self.server_name}]')
 
-            read_stream, write_stream = sse_transport
-            session: ClientSession = await self._exit_stack.enter_async_context(
-                ClientSession(
-                    read_stream=read_stream,
-                    write_stream=write_stream
-                )
-            )
-            await session.initialize()
 
-            self._client[server_name] = session
-            await self._cache_mcp_server_tools(server_name, session)
+class MCPSessionPool:
+    """进程内共享的MCP会话池，各请求与任务复用同一组MCP服务连接
 
-            logger.info(f'成功连接 sse MCP服务器[{server_name}]')
-        except Exception as e:
-            logger.error(f'连接 sse MCP服务器[{server_name}]出错：{str(e)}')
-            raise
+    - 懒连接: 首次使用时按配置建立连接，之后只在配置对象变化时比较各服务的配置
+    - 增量调整: 新增/启用的服务建立连接，删除/禁用的服务断开连接，配置变化的服务重新连接，其余连接不受影响
+    - 健康检查: 每个连接周期性ping服务器，失败后按指数退避重连
+    """
 
-    async def _connect_streamable_http_server(self, server_name: str,
-                                              server_config: MCPServerConfig) -> None:
-        url = server_config.url
-        if not url:
-            raise ValueError(
-                f'streamable_http MPC服务[{server_name}]的URL不能为空')
+    def __init__(self, ping_interval: float = 30, connect_timeout: float = 30,
+                 max_backoff: float = 60) -> None:
+        self._ping_interval = ping_interval
+        self._connect_timeout = connect_timeout
+        self._max_backoff = max_backoff
+        self._mcp_config: Optional[McpConfig] = None
+        self._connections: Dict[str, MCPServerConnection] = {}
+        self._lock = asyncio.Lock()
 
-        try:
-            streamable_http_transport = await self._exit_stack.enter_async_context(
-                streamablehttp_client(url=url, headers=server_config.headers)
-            )
-            if len(streamable_http_transport) == 3:
-                read_stream, write_stream, _ = streamable_http_transport
-            else:
-                read_stream, write_stream = streamable_http_transport
-            session: ClientSession = await self._exit_stack.enter_async_context(
-                ClientSession(
-                    read_stream=read_stream,
-                    write_stream=write_stream
-                )
-            )
-            await session.initialize()
+    @property
+    def tools(self) -> Dict[str, List[Tool]]:
+        """各服务最近一次连接成功时获取的工具列表"""
+        return {server_name: connection.tools
+                for server_name, connection in self._connections.items()}
 
-            self._client[server_name] = session
-            await self._cache_mcp_server_tools(server_name, session)
+    async def sync(self, mcp_config: McpConfig) -> None:
+        """按配置调整连接，配置对象未变化时直接返回"""
+        if mcp_config is self._mcp_config:
+            return
 
-            logger.info(f'成功连接 streamable_http MCP服务器[{server_name}]')
-        except Exception as e:
-            logger.error(
-                f'连接 streamable_http MCP服务器[{server_name}]出错：{str(e)}')
-            raise
-
-    async def _cache_mcp_server_tools(self, server_name: str,
-                                      session: ClientSession) -> None:
-        tools_response = await session.list_tools()
-        tools = tools_response.tools if tools_response else []
-        self._tools[server_name] = tools
-        logger.info(
-            f'MCP服务器[{server_name}]提供了{len(tools)}个工具')
-
-    async def get_all_tools(self) -> List[Dict[str, Any]]:
+        async with self._lock:
+            if mcp_config is self._mcp_config:
+                return
+
+            servers = {server_name: server_config
+                       for server_name, server_config in
+                       mcp_config.mcpServers.items() if server_config.enabled}
+            stale = [
+                self._connections.pop(server_name)
+                for server_name, connection in list(self._connections.items())
+                if servers.get(server_name) != connection.server_config
+            ]
+            if stale:
+                await asyncio.gather(*(connection.close()
+                                       for connection in stale))
+
+            for server_name, server_config in servers.items():
+                if server_name not in self._connections:
+                    self._connections[server_name] = MCPServerConnection(
+                        server_name, server_config,
+                        self._ping_interval, self._max_backoff,
+                    )
+            self._mcp_config = mcp_config
+
+    async def wait_ready(self) -> None:
+        """等待所有连接完成首次连接，已完成时立即返回"""
+        await asyncio.gather(*(
+            connection.wait_ready(self._connect_timeout)
+            for connection in self._connections.values()
+        ))
+
+    @classmethod
+    def _tool_prefix(cls, server_name: str) -> str:
+        return server_name if server_name.startswith('mcp_') \
+            else f'mcp_{server_name}'
+
+    def get_all_tools(self) -> List[Dict[str, Any]]:
+        """已连接服务的工具定义"""
         all_tools = []
-        for server_name, tools in self._tools.items():
-
-            for tool in tools:
-                if server_name.startswith('mcp_'):
-                    tool_name = f'{server_name}_{tool.name}'
-                else:
-                    tool_name = f'mcp_{server_name}_{tool.name}'
+        for server_name, connection in self._connections.items():
+            if not connection.connected:
+                continue
 
-                tool_schema = {
+            for tool in connection.tools:
+                all_tools.append({
                     'type': 'function',
                     'function': {
-                        'name': tool_name,
+                        'name': f'{self._tool_prefix(server_name)}_{tool.name}',
                         'description': f'[{server_name}] {tool.description or tool.name}',
                         'parameters': tool.inputSchema
                     }
-                }
-                all_tools.append(tool_schema)
+                })
 
         return all_tools
 
+    def _resolve(self, tool_name: str) -> Optional[tuple[str, str]]:
+        # 服务名互为前缀时取最长的匹配
+        matched = None
+        for server_name in self._connections:
+            prefix = f'{self._tool_prefix(server_name)}_'
+            if tool_name.startswith(prefix) and \
+                    (matched is None or len(server_name) > len(matched[0])):
+                matched = (server_name, tool_name[len(prefix):])
+        return matched
+
     async def invoke(self, tool_name: str,
                      arguments: Dict[str, Any]) -> ToolResult:
-        try:
-            original_server_name = None
-            original_tool_name = None
-
-            for server_name in self._mcp_config.mcpServers.keys():
-                expected_prefix = server_name if server_name.startswith(
-                    'mcp_') else f'mcp_{server_name}'
-
-                if tool_name.startswith(f'{expected_prefix}_'):
-                    original_server_name = server_name
-                    original_tool_name = tool_name[len(expected_prefix) + 1:]
-                    break
-
-                if not original_tool_name or not original_server_name:
-                    raise NotFoundError(f'服务器解析MCP工具不存在：{tool_name}')
-
-            session = self._client.get(original_server_name)
-            if not session:
-                return ToolResult(
-                    success=False,
-                    message=f'MCP服务器[{original_server_name}]未连接'
-                )
+        resolved = self._resolve(tool_name)
+        if resolved is None:
+            return ToolResult(success=False,
+                              message=f'MCP工具不存在：{tool_name}')
+
+        server_name, original_tool_name = resolved
+        session = self._connections[server_name].session
+        if session is None:
+            return ToolResult(
+                success=False,
+                message=f'MCP服务器[{server_name}]未连接'
+            )
 
+        try:
             result = await session.call_tool(original_tool_name, arguments)
-            if result:
-                content = []
-                if hasattr(result, 'content') and result.content:
-                    for item in result.content:
-                        if hasattr(item, 'text'):
-                            content.append(item.text)
-                        else:
-                            content.append(str(item))
-                return ToolResult(
-                    success=True,
-                    data=('\n'.join(content) if content
-                          else f'工具[{original_tool_name}]执行成功')
-                )
-            else:
-                return ToolResult(
-                    success=True,
-                    data=f'工具[{original_tool_name}]执行成功'
-                )
+            content = []
+            if result and result.content:
+                for item in result.content:
+                    if hasattr(item, 'text'):
+                        content.append(item.text)
+                    else:
+                        content.append(str(item))
+            return ToolResult(
+                success=True,
+                data=('\n'.join(content) if content
+                      else f'工具[{original_tool_name}]执行成功')
+            )
         except Exception as e:
             logger.error(f'调用MCP工具[{tool_name}]出错：{str(e)}')
             return ToolResult(
@@ -246,35 +273,34 @@ class MCPClientManager:
                 message=f'调用MCP工具[{tool_name}]失败：{str(e)}'
             )
 
-    async def cleanup(self) -> None:
-        try:
-            await self._exit_stack.aclose()
-            self._client.clear()
-            self._tools.clear()
-            self._initialized = True
-            logger.info('清除MCP客户端管理器成功')
-        except Exception as e:
-            logger.error(f'清除MCP客户端管理器失败：{str(e)}')
+    async def shutdown(self) -> None:
+        async with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+            self._mcp_config = None
+            await asyncio.gather(*(connection.close()
+                                   for connection in connections))
+        logger.info('MCP会话池关闭成功')
 
 
 class MCPTool(BaseTool):
     name: str = 'mcp'
 
-    def __init__(self):
+    def __init__(self, session_pool: MCPSessionPool):
         super().__init__()
 
+        self._session_pool = session_pool
         self._initialized = False
         self._tools = []
-        self._manager: MCPClientManager = None
 
     async def initialize(self, mcp_config: Optional[McpConfig] = None) -> None:
         if self._initialized:
             return
 
-        self._manager = MCPClientManager(mcp_config)
-        await self._manager.initialize()
+        await self._session_pool.sync(mcp_config or McpConfig())
+        await self._session_pool.wait_ready()
 
-        self._tools = await self._manager.get_all_tools()
+        self._tools = self._session_pool.get_all_tools()
         self._initialized = True
 
     def get_tools(self) -> List[Dict[str, Any]]:
@@ -288,8 +314,9 @@ class MCPTool(BaseTool):
         return False
 
     async def invoke(self, tool_name: str, **kwargs) -> ToolResult:
-        return await self._manager.invoke(tool_name, **kwargs)
+        return await self._session_pool.invoke(tool_name, kwargs)
 
     async def cleanup(self) -> None:
-        if self._manager:
-            await self._manager.cleanup()
+        """会话归会话池所有，这里只释放当前任务的工具列表，可重复调用"""
+        self._initialized = False
+        self._tools = []
@@ -18,4 +18,5 @@ class RepairJSONParser(JSONParser):
                 return default_value
             raise ValueError('json 文本为空，且无默认值')
 
-        return json_repair.repair_json(text, ensure_ascii=False)
+        return json_repair.repair_json(
+            text, ensure_ascii=False, return_objects=True)
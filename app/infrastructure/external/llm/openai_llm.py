@@ -1,17 +1,24 @@
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, Awaitable
 
 from openai import AsyncOpenAI
 
 from app.domain.external.llm import LLM
 from app.domain.models.app_config import LLMConfig
 from app.application.errors.exceptions import ServerRequestError
+from core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
 
 class OpenAILLM(LLM):
-    def __init__(self, llm_config: LLMConfig, **kwargs):
+    def __init__(
+            self,
+            llm_config: LLMConfig,
+            usage_callback: Optional[Callable[[int], Awaitable[None]]] = None,
+            **kwargs
+    ):
+        """usage_callback在每次请求完成后以消耗的token总数回调，用于租户配额统计"""
         self._client = AsyncOpenAI(
             base_url=str(llm_config.base_url),
             api_key=str(llm_config.api_key),
@@ -21,7 +28,8 @@ class OpenAILLM(LLM):
         self._model_name = llm_config.model_name
         self._temperature = llm_config.temperature
         self._max_tokens = llm_config.max_tokens
-        self._timeout = 3600
+        self._timeout = get_settings().llm_timeout_seconds
+        self._usage_callback = usage_callback
 
     @property
     def model_name(self) -> str:
@@ -35,6 +43,15 @@ class OpenAILLM(LLM):
     def max_tokens(self) -> int:
         return self._max_tokens
 
+    async def _report_usage(self, usage: Any) -> None:
+        if self._usage_callback is None or usage is None:
+            return
+
+        try:
+            await self._usage_callback(usage.total_tokens or 0)
+        except Exception as e:
+            logger.error(f'上报LLM token用量失败: {e}')
+
     async def invoke(
             self,
             messages: List[Dict[str, Any]],
@@ -72,6 +89,7 @@ class OpenAILLM(LLM):
                 )
 
             logger.info(f'OpenAI API返回结果: {response.model_dump()}')
+            await self._report_usage(response.usage)
             return response.choices[0].message.model_dump()
         except Exception as e:
             logger.error(f'调用OpenAI API失败: {e}')
@@ -0,0 +1,189 @@
+import asyncio
+import bisect
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Tuple, Optional, List, AsyncIterator, Dict
+
+from app.domain.external.message_queue import MessageQueue
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_id(message_id: Optional[str]) -> Tuple[int, int]:
+    if not message_id or message_id == '0':
+        return 0, 0
+    ms, _, seq = message_id.partition('-')
+    return int(ms), int(seq or 0)
+
+
+@dataclass
+class _Stream:
+    """进程内的流，条目ID格式与 Redis Stream 一致且单调递增"""
+    entries: List[Tuple[str, Any]] = field(default_factory=list)
+    last_id: Tuple[int, int] = (0, 0)
+    pending: Dict[str, float] = field(default_factory=dict)
+    expire_at: Optional[float] = None
+
+    def next_id(self) -> str:
+        ms = int(time.time() * 1000)
+        last_ms, last_seq = self.last_id
+        self.last_id = (ms, 0) if ms > last_ms else (last_ms, last_seq + 1)
+        return f'{self.last_id[0]}-{self.last_id[1]}'
+
+
+class InMemoryMessageQueue(MessageQueue):
+    """基于asyncio的进程内消息队列，语义与 RedisStreamMessageQueue 保持一致
+
+    同名队列共享同一个流，适用于单机部署与无外部服务的测试。
+    与Redis一样只有写入会创建流，读取不存在或已过期的流视为空流；
+    trim表示写入时按长度裁剪流，只用于不调用pop的输出流
+    """
+
+    _streams: Dict[str, _Stream] = {}
+    # 等待新消息的读取方按流名登记，流尚未创建时也可以等待
+    _waiters: Dict[str, List[asyncio.Future]] = {}
+
+    def __init__(self, stream_name: str, trim: bool = False):
+        self._stream_name = stream_name
+        self._trim = trim
+        self._settings = get_settings()
+
+    def _get_stream(self) -> Optional[_Stream]:
+        stream = InMemoryMessageQueue._streams.get(self._stream_name)
+        if stream is not None and stream.expire_at is not None and \
+                stream.expire_at <= time.time():
+            del InMemoryMessageQueue._streams[self._stream_name]
+            return None
+        return stream
+
+    def _notify(self) -> None:
+        for waiter in InMemoryMessageQueue._waiters.pop(self._stream_name, []):
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def _append(self, message: Any) -> str:
+        stream = self._get_stream()
+        if stream is None:
+            stream = _Stream()
+            InMemoryMessageQueue._streams[self._stream_name] = stream
+        message_id = stream.next_id()
+        stream.entries.append((message_id, message))
+
+        max_length = self._settings.message_queue_max_length
+        if self._trim and max_length > 0 and len(stream.entries) > max_length:
+            del stream.entries[:-max_length]
+        return message_id
+
+    async def put(self, message: Any) -> str:
+        message_id = self._append(message)
+        self._notify()
+        return message_id
+
+    async def put_batch(self, messages: List[Any]) -> List[str]:
+        message_ids = [self._append(message) for message in messages]
+        self._notify()
+        return message_ids
+
+    def _read(self, start_id: Optional[str], count: int) -> List[
+        Tuple[str, Any]]:
+        stream = self._get_stream()
+        if stream is None:
+            return []
+        entries = stream.entries
+        index = bisect.bisect_right(entries, _parse_id(start_id),
+                                    key=lambda entry: _parse_id(entry[0]))
+        return entries[index:index + count]
+
+    async def _wait(self, block_ms: int) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        waiters = InMemoryMessageQueue._waiters.setdefault(
+            self._stream_name, [])
+        waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, block_ms / 1000 if block_ms else None)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            # 超时或取消的等待方及时移除，不在类级字典中累积
+            waiters = InMemoryMessageQueue._waiters.get(self._stream_name)
+            if waiters is not None and waiter in waiters:
+                waiters.remove(waiter)
+                if not waiters:
+                    del InMemoryMessageQueue._waiters[self._stream_name]
+
+    async def get(self, start_id: str = None, block_ms: int = None) -> Tuple[
+        str, Any]:
+        messages = await self.get_batch(start_id, 1, block_ms)
+        return messages[0] if messages else (None, None)
+
+    async def get_batch(self, start_id: str = None, count: int = 100,
+                        block_ms: int = None) -> List[Tuple[str, Any]]:
+        messages = self._read(start_id, count)
+        if not messages and block_ms is not None:
+            await self._wait(block_ms)
+            messages = self._read(start_id, count)
+        return messages
+
+    async def subscribe(self, start_id: str = None, batch_size: int = None) -> \
+            AsyncIterator[Tuple[str, Any]]:
+        last_id = start_id or '0'
+        batch_size = batch_size or self._settings.message_queue_batch_size
+        block_ms = self._settings.message_queue_block_ms
+
+        while True:
+            messages = await self.get_batch(last_id, batch_size, block_ms)
+            for message_id, data in messages:
+                last_id = message_id
+                yield message_id, data
+
+    async def pop(self) -> Tuple[str, Any]:
+        stream = self._get_stream()
+        if stream is None:
+            return None, None
+        now = time.time()
+        claim_idle = self._settings.message_queue_claim_idle_ms / 1000
+        for message_id, data in stream.entries:
+            claimed_at = stream.pending.get(message_id)
+            # 未被取出或待确认超时的消息可以被(重新)取出
+            if claimed_at is None or now - claimed_at >= claim_idle:
+                stream.pending[message_id] = now
+                return message_id, data
+        return None, None
+
+    async def ack(self, message_id: str) -> None:
+        await self.delete_message(message_id)
+
+    async def clear(self) -> None:
+        stream = self._get_stream()
+        if stream is not None:
+            stream.entries.clear()
+            stream.pending.clear()
+
+    async def expire(self, ttl_seconds: Optional[int]) -> None:
+        stream = self._get_stream()
+        if stream is not None:
+            stream.expire_at = None if ttl_seconds is None \
+                else time.time() + ttl_seconds
+
+    async def is_empty(self) -> bool:
+        return await self.size() == 0
+
+    async def size(self) -> int:
+        stream = self._get_stream()
+        return len(stream.entries) if stream is not None else 0
+
+    async def delete_message(self, message_id: str) -> bool:
+        stream = self._get_stream()
+        if stream is None:
+            return False
+        stream.pending.pop(message_id, None)
+        stream.entries = [entry for entry in stream.entries
+                          if entry[0] != message_id]
+        return True
+
+    @classmethod
+    def delete(cls, stream_name: str) -> None:
+        cls._streams.pop(stream_name, None)
+        InMemoryMessageQueue(stream_name)._notify()
@@ -0,0 +1,112 @@
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Optional
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 可选依赖
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - 可选依赖
+    zstandard = None
+
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# 二进制负载的格式前缀，不带前缀的负载为UTF-8文本(历史数据或JSON编码)
+_MSGPACK_PREFIX = b'\x01'
+_ZSTD_MSGPACK_PREFIX = b'\x02'
+
+
+class PayloadCodec:
+    """消息负载编解码器，默认以UTF-8文本存储，与历史数据保持兼容"""
+
+    def encode(self, message: Any) -> bytes:
+        if isinstance(message, bytes):
+            return message
+        return str(message).encode('utf-8')
+
+    def decode(self, payload: Optional[bytes]) -> Optional[str]:
+        if payload is None:
+            return None
+        if isinstance(payload, str):
+            return payload
+
+        prefix, body = payload[:1], payload[1:]
+        if prefix == _MSGPACK_PREFIX:
+            return self._from_msgpack(body)
+        if prefix == _ZSTD_MSGPACK_PREFIX:
+            return self._from_msgpack(self._decompress(body))
+        return payload.decode('utf-8')
+
+    @classmethod
+    def _from_msgpack(cls, body: bytes) -> str:
+        if msgpack is None:
+            raise RuntimeError('解码消息失败，未安装msgpack依赖')
+        return json.dumps(msgpack.unpackb(body), ensure_ascii=False,
+                          separators=(',', ':'))
+
+    def _decompress(self, body: bytes) -> bytes:
+        if zstandard is None:
+            raise RuntimeError('解压消息失败，未安装zstandard依赖')
+        return zstandard.ZstdDecompressor().decompress(body)
+
+
+class MsgpackPayloadCodec(PayloadCodec):
+    """以msgpack存储JSON消息，超过阈值时使用zstd压缩，可加载预训练的zstd字典"""
+
+    def __init__(self, compress_threshold: int = 1024, compress_level: int = 3,
+                 dict_path: Optional[str] = None):
+        if msgpack is None:
+            raise RuntimeError('使用msgpack编码需要安装msgpack依赖')
+
+        self._compress_threshold = compress_threshold
+        self._compressor = None
+        self._decompressor = None
+
+        if zstandard is None:
+            logger.warning('未安装zstandard依赖，消息负载将不进行压缩')
+            return
+
+        dict_data = None
+        if dict_path:
+            with open(dict_path, 'rb') as f:
+                dict_data = zstandard.ZstdCompressionDict(f.read())
+        self._compressor = zstandard.ZstdCompressor(
+            level=compress_level, dict_data=dict_data)
+        self._decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+
+    def encode(self, message: Any) -> bytes:
+        if not isinstance(message, str):
+            return super().encode(message)
+
+        try:
+            body = msgpack.packb(json.loads(message), use_bin_type=True)
+        except (ValueError, TypeError, OverflowError):
+            # 非JSON文本、超出64位的整数等msgpack无法表示的内容按原文存储
+            return super().encode(message)
+
+        if self._compressor is not None and \
+                len(body) >= self._compress_threshold:
+            return _ZSTD_MSGPACK_PREFIX + self._compressor.compress(body)
+        return _MSGPACK_PREFIX + body
+
+    def _decompress(self, body: bytes) -> bytes:
+        if self._decompressor is None:
+            return super()._decompress(body)
+        return self._decompressor.decompress(body)
+
+
+@lru_cache()
+def get_payload_codec() -> PayloadCodec:
+    settings = get_settings()
+    if settings.message_queue_codec == 'msgpack':
+        return MsgpackPayloadCodec(
+            compress_threshold=settings.message_queue_compress_threshold,
+            dict_path=settings.message_queue_zstd_dict_path,
+        )
+    return PayloadCodec()
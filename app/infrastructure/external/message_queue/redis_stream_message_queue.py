@@ -1,66 +1,124 @@
-import asyncio
 import logging
-import uuid
-from typing import Any, Tuple, Optional
+import time
+from typing import Any, Tuple, Optional, List, AsyncIterator
+
+from redis.exceptions import ResponseError
 
 from app.domain.external.message_queue import MessageQueue
+from app.infrastructure.external.message_queue.payload_codec import \
+    get_payload_codec
+from app.infrastructure.external.message_queue.redis_stream_multiplexer import \
+    get_stream_multiplexer
 from app.infrastructure.storage.redis import get_redis
+from core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
 
 class RedisStreamMessageQueue(MessageQueue):
-    """Redis Stream 消息队列实现"""
+    """Redis Stream 消息队列实现，pop基于消费者组实现至少一次投递
 
-    def __init__(self, stream_name: str):
-        self._stream_name = stream_name
-        self._redis = get_redis()
-        self._lock_expire_seconds = 10
-
-    async def _acquire_lock(self, lock_key: str, timeout_seconds: int = 5) -> \
-            Optional[str]:
-        """根据传递的lock构建一个分布式锁"""
-        lock_value = str(uuid.uuid4())
-        end_time = timeout_seconds
-
-        while end_time > 0:
-            result = await self._redis.client.set(
-                lock_key,
-                lock_value,
-                ex=self._lock_expire_seconds,
-                nx=True,
-            )
+    消息负载经过编解码器编码后通过二进制安全的连接读写，
+    所有命令与事务只访问当前流一个键，集群模式下无需关心槽的分布
+    """
 
-            if result:
-                return lock_value
+    _group_name = 'consumers'
 
-            await asyncio.sleep(0.1)
-            end_time -= 0.1
+    def __init__(self, stream_name: str, consumer_name: Optional[str] = None,
+                 trim: bool = False):
+        """consumer_name为消费者组中的消费者名称，需要调用pop的队列必须指定；
+        trim表示写入时按长度或保留时长裁剪流，裁剪可能丢弃消费者组中尚未确认的消息，只能用于不调用pop的流"""
+        self._stream_name = stream_name
+        self._consumer_name = consumer_name
+        self._trim = trim
+        self._redis = get_redis()
+        self._settings = get_settings()
+        self._codec = get_payload_codec()
+        self._group_created = False
+        self._next_claim_at: float = 0
 
-        return None
+    def _decode_message(self, message_id: Any, message_data: Optional[dict]) \
+            -> Tuple[str, Any]:
+        if isinstance(message_id, bytes):
+            message_id = message_id.decode()
+        return message_id, self._codec.decode((message_data or {}).get(b'data'))
 
-    async def _release_lock(self, lock_key: str, lock_value: str) -> bool:
-        """根据传递的lock_key + lock_value，尝试获取分布式锁"""
-        release_script = """
-        if redis.call("GET", KEYS[1]) == ARGV[1] then
-            return redis.call("DEL", KEYS[1])
-        else
-            return 0
-        end
-        """
+    async def _ensure_group(self) -> None:
+        if self._group_created:
+            return
 
         try:
-            script = self._redis.client.register_script(release_script)
-            result = await script(keys=[lock_key], args=[lock_value])
-            return result == 1
-        except Exception as e:
-            logger.error(f"注册释放锁脚本失败:{e}")
-            return False
-
-    async def put(self, message: Any) -> None:
+            await self._redis.client.xgroup_create(
+                self._stream_name, self._group_name, id='0', mkstream=True)
+        except ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        self._group_created = True
+
+    async def _read_group(self) -> List[Tuple[Any, dict]]:
+        # 认领长时间未确认的消息(取出该消息的消费者可能已崩溃)，消息至少空闲claim_idle_ms才能被认领，
+        # 因此每个空闲周期只需扫描一次待确认列表，其余时间直接读取新消息
+        now = time.monotonic()
+        if now >= self._next_claim_at:
+            self._next_claim_at = \
+                now + self._settings.message_queue_claim_idle_ms / 1000
+            _, claimed, *_ = await self._redis.binary_client.xautoclaim(
+                self._stream_name, self._group_name, self._consumer_name,
+                min_idle_time=self._settings.message_queue_claim_idle_ms,
+                start_id='0-0', count=1,
+            )
+            if claimed:
+                # 可能还有其他待认领的消息，下次继续扫描
+                self._next_claim_at = now
+                return claimed
+
+        messages = await self._redis.binary_client.xreadgroup(
+            self._group_name, self._consumer_name, {self._stream_name: '>'},
+            count=1)
+        return messages[0][1] if messages else []
+
+    def _trim_args(self) -> dict:
+        """写入时近似裁剪流：配置了保留时长按MINID裁剪，否则按MAXLEN裁剪"""
+        if not self._trim:
+            return {}
+
+        retention_seconds = self._settings.message_queue_retention_seconds
+        if retention_seconds > 0:
+            min_id = int((time.time() - retention_seconds) * 1000)
+            return {'minid': min_id, 'approximate': True}
+
+        if self._settings.message_queue_max_length > 0:
+            return {'maxlen': self._settings.message_queue_max_length,
+                    'approximate': True}
+        return {}
+
+    async def put(self, message: Any) -> str:
         logger.debug(f"往消息队列[{self._stream_name}]中放入消息:{message}")
-        return await self._redis.client.xadd(
-            self._stream_name, {'data': message})
+        message_id = await self._redis.binary_client.xadd(
+            self._stream_name, {'data': self._codec.encode(message)},
+            **self._trim_args())
+        return message_id.decode()
+
+    async def put_batch(self, messages: List[Any]) -> List[str]:
+        """通过非事务管道批量写入，一次往返完成"""
+        if not messages:
+            return []
+
+        logger.debug(f"往消息队列[{self._stream_name}]中批量放入{len(messages)}条消息")
+        async with self._redis.binary_client.pipeline(
+                transaction=False) as pipe:
+            trim_args = self._trim_args()
+            for message in messages:
+                pipe.xadd(self._stream_name,
+                          {'data': self._codec.encode(message)}, **trim_args)
+            message_ids = await pipe.execute()
+        return [message_id.decode() for message_id in message_ids]
+
+    def _read_client(self, block_ms: Optional[int]):
+        # 阻塞读取使用独立连接池，避免长时间占用普通命令的连接
+        if block_ms is None:
+            return self._redis.binary_client
+        return self._redis.blocking_binary_client
 
     async def get(self, start_id: str = None, block_ms: int = None) -> Tuple[
         str, Any]:
@@ -71,7 +129,7 @@ class RedisStreamMessageQueue(MessageQueue):
         if start_id is None:
             start_id = '0'
 
-        messages = await self._redis.client.xread(
+        messages = await self._read_client(block_ms).xread(
             {self._stream_name: start_id}, count=1, block=block_ms)
 
         if not messages:
@@ -84,42 +142,88 @@ class RedisStreamMessageQueue(MessageQueue):
         message_id, message_data = stream_message[0]
 
         try:
-            return message_id, message_data.get('data')
+            return self._decode_message(message_id, message_data)
         except Exception as e:
             logger.error(f"从消息队列[{self._stream_name}]中获取消息失败:{e}")
             return None, None
 
-    async def pop(self) -> Tuple[str, Any]:
-        """获取并删除队列中的第一条消息"""
-        logger.debug(f"从消息队列[{self._stream_name}]中获取并删除第一条消息")
-        lock_key = f'{self._stream_name}.pop'
-        lock_value = await self._acquire_lock(lock_key)
-        if not lock_value:
-            logger.error(f"获取锁[{lock_key}]失败")
-            return None, None
+    async def get_batch(self, start_id: str = None, count: int = 100,
+                        block_ms: int = None) -> List[Tuple[str, Any]]:
+        """获取start_id之后的至多count条消息，没有消息时阻塞block_ms毫秒"""
+        logger.debug(
+            f"从消息队列[{self._stream_name}]中批量获取消息，start_id:{start_id}, count:{count}, block_ms:{block_ms}")
 
-        try:
-            messages = await self._redis.client.xrange(
-                self._stream_name, '-', '+', count=1)
-            if not messages:
-                return None, None
+        if start_id is None:
+            start_id = '0'
+
+        messages = await self._read_client(block_ms).xread(
+            {self._stream_name: start_id}, count=count, block=block_ms)
+        if not messages:
+            return []
 
-            message_id, message_data = messages[0]
+        return [self._decode_message(message_id, message_data)
+                for message_id, message_data in messages[0][1]]
 
-            await self._redis.client.xdel(self._stream_name, message_id)
-            return message_id, message_data.get('data')
+    async def subscribe(self, start_id: str = None, batch_size: int = None) -> \
+            AsyncIterator[Tuple[str, Any]]:
+        """订阅队列，按批次补读start_id之后的历史消息，实时消息由进程内共享的多路读取器分发，
+        订阅者数量不影响占用的 Redis 连接数"""
+        async for message_id, data in get_stream_multiplexer().subscribe(
+                self._stream_name, start_id, batch_size):
+            yield message_id, data
 
+    async def pop(self) -> Tuple[str, Any]:
+        """取出队列中的第一条未被消费的消息，消息在ack前保持待确认状态"""
+        logger.debug(f"从消息队列[{self._stream_name}]中取出第一条消息")
+        if self._consumer_name is None:
+            raise ValueError(f'消息队列[{self._stream_name}]未指定消费者名称，无法取出消息')
+        try:
+            await self._ensure_group()
+            try:
+                messages = await self._read_group()
+            except ResponseError as e:
+                if 'NOGROUP' not in str(e):
+                    raise
+                # 流被删除后消费者组随之消失，重建后重试
+                self._group_created = False
+                await self._ensure_group()
+                messages = await self._read_group()
         except Exception as e:
             logger.error(f"从消息队列[{self._stream_name}]中获取消息失败:{e}")
             return None, None
 
-        finally:
-            await self._release_lock(lock_key, lock_value)
+        for message_id, message_data in messages:
+            if message_data:
+                return self._decode_message(message_id, message_data)
+
+            # 待确认期间已被删除的消息只剩ID，直接确认丢弃
+            if message_id is not None:
+                await self.ack(self._decode_message(message_id, None)[0])
+        return None, None
+
+    async def ack(self, message_id: str) -> None:
+        """确认消息已处理完成并从队列中删除"""
+        async with self._redis.client.pipeline(transaction=True) as pipe:
+            pipe.xack(self._stream_name, self._group_name, message_id)
+            pipe.xdel(self._stream_name, message_id)
+            await pipe.execute()
 
     async def clear(self) -> None:
         """清空队列"""
         logger.debug(f"清空消息队列[{self._stream_name}]")
-        await self._redis.client.xtrim(self._stream_name, maxlen=0)
+        async with self._redis.client.pipeline(transaction=True) as pipe:
+            pipe.xtrim(self._stream_name, maxlen=0)
+            # 同时销毁消费者组，丢弃已被删除消息的待确认记录
+            pipe.xgroup_destroy(self._stream_name, self._group_name)
+            await pipe.execute(raise_on_error=False)
+        self._group_created = False
+
+    async def expire(self, ttl_seconds: Optional[int]) -> None:
+        """设置队列过期时间，传递None表示取消过期"""
+        if ttl_seconds is None:
+            await self._redis.client.persist(self._stream_name)
+        else:
+            await self._redis.client.expire(self._stream_name, ttl_seconds)
 
     async def is_empty(self) -> bool:
         """判断队列是否为空"""
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Tuple, List, Dict, Set, Optional, AsyncIterator
+
+from app.infrastructure.external.message_queue.payload_codec import \
+    get_payload_codec
+from app.infrastructure.storage.redis import get_redis
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_id(message_id: str) -> Tuple[int, int]:
+    ms, _, seq = message_id.partition('-')
+    return int(ms), int(seq or 0)
+
+
+@dataclass(eq=False)
+class _Subscription:
+    queue: asyncio.Queue
+    overflowed: bool = field(default=False)
+
+
+class RedisStreamMultiplexer:
+    """进程内共享的 Redis Stream 读取器
+
+    后台只有一个读取协程，通过一条多流 XREAD BLOCK 读取所有被订阅的流，再分发给进程内的订阅者，
+    订阅按流引用计数，最后一个订阅者退出后不再读取该流。订阅者先补读历史消息再接收实时消息，
+    消费过慢导致缓冲区溢出时会重新补读，不会丢失消息。
+    集群模式下多流XREAD只能读取同一个槽中的流，每个被订阅的槽各有一个读取协程。
+    阻塞读取在整个阻塞时长内占用阻塞连接池(每个节点redis_blocking_max_connections个连接)中的连接，
+    每个节点最多stream_multiplexer_max_blocking_readers个槽使用阻塞读取，该上限需小于阻塞连接池大小，
+    为XREADGROUP等其他阻塞命令留出连接；超出上限的槽由该节点的轮询协程依次执行非阻塞XREAD，
+    一轮都没有新消息时等待stream_multiplexer_poll_ms毫秒，实时性略低但不占用阻塞连接
+    """
+
+    def __init__(self):
+        self._redis = get_redis()
+        self._settings = get_settings()
+        self._codec = get_payload_codec()
+        # 槽 -> 流 -> 已读取到的消息ID，单机模式下槽为None
+        self._cursors: Dict[Optional[int], Dict[str, str]] = {}
+        self._subscribers: Dict[str, Set[_Subscription]] = {}
+        self._readers: Dict[Optional[int], asyncio.Task] = {}
+        # 槽 -> 所在节点，节点 -> 轮询读取的槽，单机模式下节点为None
+        self._reader_nodes: Dict[Optional[int], Optional[str]] = {}
+        self._polled: Dict[Optional[str], Set[Optional[int]]] = {}
+        self._pollers: Dict[Optional[str], asyncio.Task] = {}
+
+    def _decode_entries(self, entries: List) -> List[Tuple[str, Any]]:
+        return [(message_id.decode(), self._codec.decode(data.get(b'data')))
+                for message_id, data in entries]
+
+    async def _read(self, stream_name: str, after_id: str, count: int) -> List[
+        Tuple[str, Any]]:
+        messages = await self._redis.binary_client.xread(
+            {stream_name: after_id}, count=count)
+        return self._decode_entries(messages[0][1]) if messages else []
+
+    async def _register(self, stream_name: str) -> _Subscription:
+        slot = self._redis.key_slot(stream_name)
+        if stream_name not in self._cursors.get(slot, {}):
+            entries = await self._redis.binary_client.xrevrange(
+                stream_name, count=1)
+            last_id = entries[0][0].decode() if entries else '0-0'
+            cursors = self._cursors.setdefault(slot, {})
+            if stream_name not in cursors:
+                cursors[stream_name] = last_id
+                self._subscribers[stream_name] = set()
+
+        subscription = _Subscription(
+            asyncio.Queue(self._settings.stream_multiplexer_queue_size))
+        self._subscribers[stream_name].add(subscription)
+
+        self._ensure_reader(slot, stream_name)
+        return subscription
+
+    def _ensure_reader(self, slot: Optional[int], stream_name: str) -> None:
+        """为槽分配读取协程，所在节点的阻塞读取已达上限时交给节点的轮询协程"""
+        reader = self._readers.get(slot)
+        if reader is not None and not reader.done():
+            return
+
+        node = self._redis.node_name(stream_name)
+        polled = self._polled.get(node, set())
+        if slot in polled:
+            self._ensure_poller(node)
+            return
+
+        blocking_readers = sum(1 for reader_node in self._reader_nodes.values()
+                               if reader_node == node)
+        if blocking_readers < \
+                self._settings.stream_multiplexer_max_blocking_readers:
+            self._reader_nodes[slot] = node
+            self._readers[slot] = asyncio.create_task(self._run(slot))
+            return
+
+        self._polled.setdefault(node, set()).add(slot)
+        self._ensure_poller(node)
+
+    def _ensure_poller(self, node: Optional[str]) -> None:
+        poller = self._pollers.get(node)
+        if poller is None or poller.done():
+            self._pollers[node] = asyncio.create_task(self._poll(node))
+
+    def _unregister(self, stream_name: str, subscription: _Subscription):
+        subscribers = self._subscribers.get(stream_name)
+        if subscribers is None:
+            return
+
+        subscribers.discard(subscription)
+        if not subscribers:
+            slot = self._redis.key_slot(stream_name)
+            del self._subscribers[stream_name]
+            del self._cursors[slot][stream_name]
+            if not self._cursors[slot]:
+                del self._cursors[slot]
+
+    def _dispatch(self, slot: Optional[int], stream_name: str,
+                  messages: List[Tuple[str, Any]]):
+        self._cursors[slot][stream_name] = messages[-1][0]
+        for subscription in self._subscribers.get(stream_name, ()):
+            if subscription.overflowed:
+                continue
+            for message in messages:
+                try:
+                    subscription.queue.put_nowait(message)
+                except asyncio.QueueFull:
+                    subscription.overflowed = True
+                    break
+
+    def _dispatch_messages(self, slot: Optional[int], messages: List) -> int:
+        """分发一次多流XREAD的结果，返回读取到的消息数量"""
+        count = 0
+        cursors = self._cursors.get(slot, {})
+        for stream_name, entries in messages or []:
+            stream_name = stream_name.decode()
+            if stream_name in cursors and entries:
+                self._dispatch(slot, stream_name, self._decode_entries(entries))
+                count += len(entries)
+        return count
+
+    async def _run(self, slot: Optional[int]) -> None:
+        while self._cursors.get(slot):
+            try:
+                messages = await self._redis.blocking_binary_client.xread(
+                    dict(self._cursors[slot]),
+                    count=self._settings.message_queue_batch_size,
+                    block=self._settings.stream_multiplexer_block_ms,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f'多路读取消息流失败，稍后重试: {e}')
+                await asyncio.sleep(1)
+                continue
+
+            self._dispatch_messages(slot, messages)
+
+        if self._readers.get(slot) is asyncio.current_task():
+            del self._readers[slot]
+            node = self._reader_nodes.pop(slot, None)
+            self._promote(node)
+
+    def _promote(self, node: Optional[str]) -> None:
+        """阻塞读取协程退出后，将节点上一个轮询读取的槽改为阻塞读取"""
+        polled = self._polled.get(node)
+        while polled:
+            slot = polled.pop()
+            if self._cursors.get(slot):
+                self._reader_nodes[slot] = node
+                self._readers[slot] = asyncio.create_task(self._run(slot))
+                return
+
+    async def _poll(self, node: Optional[str]) -> None:
+        poll_interval = self._settings.stream_multiplexer_poll_ms / 1000
+        while self._polled.get(node):
+            received = 0
+            for slot in list(self._polled[node]):
+                if not self._cursors.get(slot):
+                    self._polled[node].discard(slot)
+                    continue
+                try:
+                    messages = await self._redis.binary_client.xread(
+                        dict(self._cursors[slot]),
+                        count=self._settings.message_queue_batch_size,
+                    )
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f'轮询读取消息流失败，稍后重试: {e}')
+                    continue
+                received += self._dispatch_messages(slot, messages)
+
+            if not received:
+                await asyncio.sleep(poll_interval)
+
+        if self._pollers.get(node) is asyncio.current_task():
+            del self._pollers[node]
+            self._polled.pop(node, None)
+
+    async def subscribe(self, stream_name: str, start_id: str = None,
+                        batch_size: int = None) -> AsyncIterator[
+        Tuple[str, Any]]:
+        """订阅消息流，依次返回start_id之后的所有消息"""
+        batch_size = batch_size or self._settings.message_queue_batch_size
+        last_id = start_id or '0'
+        subscription = await self._register(stream_name)
+
+        try:
+            while True:
+                # 注册后补读历史消息，与实时消息按ID去重
+                subscription.overflowed = False
+                while not subscription.queue.empty():
+                    subscription.queue.get_nowait()
+
+                while True:
+                    messages = await self._read(stream_name, last_id,
+                                                batch_size)
+                    for message_id, data in messages:
+                        last_id = message_id
+                        yield message_id, data
+                    if len(messages) < batch_size:
+                        break
+
+                while not subscription.overflowed:
+                    message_id, data = await subscription.queue.get()
+                    if _parse_id(message_id) > _parse_id(last_id):
+                        last_id = message_id
+                        yield message_id, data
+        finally:
+            self._unregister(stream_name, subscription)
+
+    async def shutdown(self) -> None:
+        readers = [*self._readers.values(), *self._pollers.values()]
+        if readers:
+            for reader in readers:
+                reader.cancel()
+            await asyncio.gather(*readers, return_exceptions=True)
+            self._readers.clear()
+            self._pollers.clear()
+            self._reader_nodes.clear()
+            self._polled.clear()
+            logger.info('消息流多路读取器关闭成功')
+
+        get_stream_multiplexer.cache_clear()
+
+
+@lru_cache()
+def get_stream_multiplexer() -> RedisStreamMultiplexer:
+    return RedisStreamMultiplexer()
@@ -0,0 +1,10 @@
+from typing import List
+
+from app.domain.external.pool_monitor import PoolMonitor
+from app.domain.models.connection_pool import ConnectionPoolStats
+from app.infrastructure.storage.postgres import get_postgres
+
+
+class PostgresPoolMonitor(PoolMonitor):
+    def stats(self) -> List[ConnectionPoolStats]:
+        return [get_postgres().pool_stats()]
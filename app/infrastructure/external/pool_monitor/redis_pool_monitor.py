@@ -0,0 +1,10 @@
+from typing import List
+
+from app.domain.external.pool_monitor import PoolMonitor
+from app.domain.models.connection_pool import ConnectionPoolStats
+from app.infrastructure.storage.redis import get_redis
+
+
+class RedisPoolMonitor(PoolMonitor):
+    def stats(self) -> List[ConnectionPoolStats]:
+        return get_redis().pool_stats()
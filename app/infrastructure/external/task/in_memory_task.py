@@ -0,0 +1,153 @@
+import time
+import uuid
+import logging
+import asyncio
+from typing import Optional, List
+
+from app.domain.external.message_queue import MessageQueue
+from app.domain.external.task import Task, TaskRunner
+from app.infrastructure.external.message_queue.in_memory_message_queue import \
+    InMemoryMessageQueue
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryTask(Task):
+    """进程内任务，输入/输出流为进程内消息队列，适用于单机部署与测试"""
+
+    _task_registry: dict[str, 'InMemoryTask'] = {}
+
+    def __init__(self, task_runner: Optional[TaskRunner],
+                 task_id: Optional[str] = None):
+        self._id = task_id or str(uuid.uuid4())
+        self._task_runner = task_runner
+        self._execution_task: Optional[asyncio.Task] = None
+        self._cancel_requested = False
+        # 最近一次创建或运行结束的时间，结束超过保留时长的任务由清理器回收
+        self._last_active_at = time.time()
+
+        self._input_stream = InMemoryMessageQueue(
+            self.input_stream_name(self._id))
+        self._output_stream = InMemoryMessageQueue(
+            self.output_stream_name(self._id), trim=True)
+
+    @classmethod
+    def input_stream_name(cls, task_id: str) -> str:
+        return f'task:input:{task_id}'
+
+    @classmethod
+    def output_stream_name(cls, task_id: str) -> str:
+        return f'task:output:{task_id}'
+
+    def _on_task_done(self):
+        self._last_active_at = time.time()
+        if self._task_runner:
+            asyncio.create_task(self._task_runner.on_done(self))
+
+    async def _execute_task(self):
+        try:
+            await self._task_runner.invoke(self)
+        except asyncio.CancelledError:
+            logger.info(f'任务{self._id}被取消')
+        except Exception as e:
+            logger.error(f'任务{self._id}执行失败: {e}')
+        finally:
+            self._on_task_done()
+
+    async def invoke(self) -> None:
+        if self._task_runner is None:
+            logger.warning(f'任务{self._id}没有任务运行器，无法执行')
+            return
+
+        if self.done:
+            InMemoryTask._task_registry[self._id] = self
+            self._execution_task = asyncio.create_task(self._execute_task())
+            logger.info(f'任务{self._id}开始执行')
+
+    async def wait(self) -> None:
+        if self._execution_task is None:
+            return
+        try:
+            await asyncio.wait([self._execution_task])
+        except asyncio.CancelledError:
+            # 等待方被取消时一并中断执行，不记录取消请求
+            self._execution_task.cancel()
+            await asyncio.wait([self._execution_task])
+            raise
+
+    async def cancel(self) -> bool:
+        if not self.done:
+            self._cancel_requested = True
+            self._execution_task.cancel()
+            logger.info(f'任务{self._id}已取消')
+            return True
+        return False
+
+    @property
+    def input_stream(self) -> MessageQueue:
+        return self._input_stream
+
+    @property
+    def output_stream(self) -> MessageQueue:
+        return self._output_stream
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def done(self) -> bool:
+        if self._execution_task is None:
+            return True
+        return self._execution_task.done()
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_requested
+
+    @classmethod
+    async def get(cls, task_id: str) -> Optional['InMemoryTask']:
+        return InMemoryTask._task_registry.get(task_id)
+
+    @classmethod
+    def list_inactive(cls, before: float) -> List[str]:
+        """未在运行且最近活跃时间早于before的任务"""
+        return [task_id for task_id, task in InMemoryTask._task_registry.items()
+                if task.done and task._last_active_at < before]
+
+    @classmethod
+    def create(cls, task_runner: Optional[TaskRunner],
+               task_id: Optional[str] = None) -> 'Task':
+        # 任务仍在运行时复用该任务，新消息会被运行中的任务读取
+        task = InMemoryTask._task_registry.get(task_id) if task_id else None
+        if task is not None and not task.done:
+            return task
+
+        task = cls(task_runner, task_id=task_id)
+        InMemoryTask._task_registry[task.id] = task
+        return task
+
+    @classmethod
+    async def resume(cls, task_id: str,
+                     task_runner: TaskRunner) -> Optional['InMemoryTask']:
+        task = InMemoryTask._task_registry.get(task_id)
+        if task is not None and not task.done:
+            return None
+
+        task = cls(task_runner, task_id=task_id)
+        InMemoryTask._task_registry[task_id] = task
+        await task.invoke()
+        logger.info(f'任务{task_id}已恢复执行')
+        return task
+
+    @classmethod
+    async def destroy(cls, task_id: str) -> None:
+        task = InMemoryTask._task_registry.pop(task_id, None)
+        if task is not None:
+            await task.cancel()
+            if task._task_runner:
+                await task._task_runner.on_done(task)
+            logger.info(f'任务{task_id}已销毁')
+
+        InMemoryMessageQueue.delete(cls.input_stream_name(task_id))
+        InMemoryMessageQueue.delete(cls.output_stream_name(task_id))
@@ -0,0 +1,40 @@
+import logging
+import time
+
+from app.domain.services.agent_task_runner import AgentTaskRunner
+from app.infrastructure.external.task.in_memory_task import InMemoryTask
+from app.infrastructure.repositories.in_memory_memory_repository import \
+    InMemoryMemoryRepository
+from app.infrastructure.repositories.in_memory_task_checkpoint_repository import \
+    InMemoryTaskCheckpointRepository
+from app.infrastructure.repositories.in_memory_task_snapshot_repository import \
+    InMemoryTaskSnapshotRepository
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryTaskSweeper:
+    """回收进程内结束超过task_stream_ttl_seconds的任务，删除其输入/输出流、快照、检查点与Agent记忆"""
+
+    def __init__(self):
+        self._settings = get_settings()
+        self._memory_repository = InMemoryMemoryRepository()
+        self._checkpoint_repository = InMemoryTaskCheckpointRepository()
+        self._snapshot_repository = InMemoryTaskSnapshotRepository()
+
+    async def sweep(self) -> int:
+        deadline = time.time() - self._settings.task_stream_ttl_seconds
+
+        swept = 0
+        for task_id in InMemoryTask.list_inactive(deadline):
+            await InMemoryTask.destroy(task_id)
+            for memory_id in AgentTaskRunner.memory_ids(task_id):
+                await self._memory_repository.delete(memory_id)
+            await self._checkpoint_repository.delete(task_id)
+            await self._snapshot_repository.delete(task_id)
+            swept += 1
+
+        if swept:
+            logger.info(f'任务清理完成，共回收{swept}个过期任务')
+        return swept
@@ -1,3 +1,4 @@
+import time
 import uuid
 import logging
 import asyncio
@@ -7,39 +8,74 @@ from app.domain.external.message_queue import MessageQueue
 from app.domain.external.task import Task, TaskRunner
 from app.infrastructure.external.message_queue.redis_stream_message_queue import \
     RedisStreamMessageQueue
+from app.infrastructure.external.task.redis_task_lease import RedisTaskLease, \
+    WORKER_ID
+from app.infrastructure.external.task.redis_task_registry import \
+    get_task_registry
+from app.infrastructure.storage.redis import get_redis
+from app.infrastructure.storage.redis_keys import task_key
+from core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
 
 class RedisStreamTask(Task):
+    # 当前进程创建/运行的任务，跨进程查找与取消由 RedisTaskRegistry 负责
     _task_registry: dict[str, 'RedisStreamTask'] = {}
 
-    def __init__(self, task_runner: TaskRunner):
-        self._id = str(uuid.uuid4())
+    def __init__(self, task_runner: Optional[TaskRunner],
+                 task_id: Optional[str] = None):
+        """task_runner为空时表示其他进程中任务的句柄，只能读写流与取消任务"""
+        self._id = task_id or str(uuid.uuid4())
         self._task_runner = task_runner
         self._execution_task: Optional[asyncio.Task] = None
+        self._cancel_requested_at: Optional[float] = None
+        self._lease = RedisTaskLease(self._id)
+        self._registry = get_task_registry()
 
-        input_stream_name = f'task:input:{self._id}'
-        output_stream_name = f'task:output:{self._id}'
+        self._input_stream = RedisStreamMessageQueue(
+            self.input_stream_name(self._id), consumer_name=WORKER_ID)
+        # 输出流只按ID读取，写入时裁剪以限制长度；输入流通过消费者组取出消息，不能裁剪
+        self._output_stream = RedisStreamMessageQueue(
+            self.output_stream_name(self._id), trim=True)
 
-        self._input_stream = RedisStreamMessageQueue(input_stream_name)
-        self._output_stream = RedisStreamMessageQueue(output_stream_name)
+    @classmethod
+    def input_stream_name(cls, task_id: str) -> str:
+        return task_key('input', task_id)
 
-        RedisStreamTask._task_registry[self._id] = self
+    @classmethod
+    def output_stream_name(cls, task_id: str) -> str:
+        return task_key('output', task_id)
 
     def _cleanup_registry(self):
+        self._registry.release(self._id)
         if self._id in RedisStreamTask._task_registry:
             del RedisStreamTask._task_registry[self._id]
             logger.info(f'任务{self._id}已从注册中心移除')
 
+    async def _set_streams_ttl(self, ttl_seconds: Optional[int]) -> None:
+        try:
+            await self._input_stream.expire(ttl_seconds)
+            await self._output_stream.expire(ttl_seconds)
+            await self._registry.touch(self._id)
+        except Exception as e:
+            logger.error(f'设置任务{self._id}的流过期时间失败: {e}')
+
     def _on_task_done(self):
         if self._task_runner:
             asyncio.create_task(self._task_runner.on_done(self))
 
+        # 任务结束后流只保留一段时间，供客户端回放事件
+        asyncio.create_task(
+            self._set_streams_ttl(get_settings().task_stream_ttl_seconds))
         self._cleanup_registry()
 
     async def _execute_task(self):
+        keep_alive_task = asyncio.create_task(self._lease.keep_alive())
         try:
+            await self._registry.register(self._id, self._cancel_local)
+            # 任务再次运行时取消上次结束时设置的过期时间
+            await self._set_streams_ttl(None)
             await self._task_runner.invoke(self)
         except asyncio.CancelledError:
             logger.info(f'任务{self._id}被取消')
@@ -47,23 +83,55 @@ class RedisStreamTask(Task):
             logger.error(f'任务{self._id}执行失败: {e}')
 
         finally:
+            keep_alive_task.cancel()
+            await self._lease.release()
             self._on_task_done()
+            self._log_cancel_latency()
+
+    def _log_cancel_latency(self) -> None:
+        if self._cancel_requested_at is None:
+            return
+
+        # 从收到取消请求到任务(含LLM/工具调用与资源释放)完全停止的耗时
+        latency_ms = (time.monotonic() - self._cancel_requested_at) * 1000
+        if latency_ms > 1000:
+            logger.warning(f'任务{self._id}取消耗时过长: {latency_ms:.0f}ms')
+        else:
+            logger.info(f'任务{self._id}取消完成，耗时{latency_ms:.0f}ms')
 
     async def invoke(self) -> None:
+        if self._task_runner is None:
+            logger.warning(f'任务{self._id}是其他进程中任务的句柄，无法在当前进程执行')
+            return
+
         if self.done:
-            asyncio.create_task(self._execute_task())
+            # 租约保证同一任务同一时刻只在一个进程中运行
+            if not await self._lease.acquire():
+                logger.warning(f'任务{self._id}的租约已被其他进程持有，跳过执行')
+                self._cleanup_registry()
+                return
+
+            RedisStreamTask._task_registry[self._id] = self
+            self._execution_task = asyncio.create_task(self._execute_task())
             logger.info(f'任务{self._id}开始执行')
 
-    def cancel(self) -> bool:
+    async def _cancel_local(self) -> bool:
         if not self.done:
+            self._cancel_requested_at = time.monotonic()
             self._execution_task.cancel()
             logger.info(f'任务{self._id}已取消')
-
-            self._cleanup_registry()
             return True
+        return False
+
+    async def cancel(self) -> bool:
+        if not self.done:
+            cancelled = await self._cancel_local()
+        else:
+            # 任务不在当前进程运行，交由注册中心投递给持有租约的进程
+            cancelled = await self._registry.cancel(self._id)
 
         self._cleanup_registry()
-        return False
+        return cancelled
 
     @property
     def input_stream(self) -> MessageQueue:
@@ -83,23 +151,70 @@ class RedisStreamTask(Task):
             return True
         return self._execution_task.done()
 
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_requested_at is not None
+
     @classmethod
-    def get(cls, task_id: str) -> Optional['RedisStreamTask']:
-        return RedisStreamTask._task_registry.get(task_id)
+    async def get(cls, task_id: str) -> Optional['RedisStreamTask']:
+        task = RedisStreamTask._task_registry.get(task_id)
+        if task is not None:
+            return task
+
+        # 任务由其他进程创建/运行，返回可读写流与取消的任务句柄
+        if await get_task_registry().exists(task_id):
+            return cls(None, task_id=task_id)
+        return None
+
+    async def wait(self) -> None:
+        if self._execution_task is None:
+            return
+        try:
+            # 任务在开始执行前被取消时不向等待方抛出CancelledError
+            await asyncio.wait([self._execution_task])
+        except asyncio.CancelledError:
+            # asyncio.wait不会取消被等待的任务，等待方被取消(如Worker退出)时中断执行，
+            # 等待租约释放后再向上抛出；不记录取消请求，任务稍后从检查点恢复
+            self._execution_task.cancel()
+            await asyncio.wait([self._execution_task])
+            raise
 
     @classmethod
-    def create(cls, task_runner: TaskRunner) -> 'Task':
-        return cls(task_runner)
+    def create(cls, task_runner: Optional[TaskRunner],
+               task_id: Optional[str] = None) -> 'Task':
+        task = cls(task_runner, task_id=task_id)
+        if task_runner is not None:
+            RedisStreamTask._task_registry[task.id] = task
+        return task
 
     @classmethod
-    async def destroy(cls, task_id: str) -> None:
+    async def resume(cls, task_id: str,
+                     task_runner: TaskRunner) -> Optional['RedisStreamTask']:
+        # 只有租约已过期(原进程崩溃)的任务才能被认领恢复
         if task_id in RedisStreamTask._task_registry:
-            task = RedisStreamTask._task_registry[task_id]
-            task.cancel()
+            return None
+
+        lease = RedisTaskLease(task_id)
+        if not await lease.acquire():
+            return None
+
+        task = cls(task_runner, task_id=task_id)
+        RedisStreamTask._task_registry[task_id] = task
+        await task.invoke()
+        logger.info(f'任务{task_id}已被当前进程认领并恢复执行')
+        return task
+
+    @classmethod
+    async def destroy(cls, task_id: str) -> None:
+        task = await cls.get(task_id)
+        if task is not None:
+            await task.cancel()
             logger.info(f'任务{task_id}已销毁')
 
             # 如果任务运行器存在，调用其on_done方法通知任务完成
             if task._task_runner:
                 await task._task_runner.on_done(task)
 
-        cls._task_registry.clear()
+        await get_redis().client.delete(cls.input_stream_name(task_id),
+                                        cls.output_stream_name(task_id))
+        await get_task_registry().unregister(task_id)
@@ -0,0 +1,109 @@
+import logging
+from typing import List, Tuple
+
+from redis.exceptions import ResponseError
+
+from app.domain.external.task_queue import TaskQueue
+from app.domain.models.task_queue import TaskQueueStats
+from app.infrastructure.external.task.redis_task_lease import WORKER_ID
+from app.infrastructure.external.task.redis_task_registry import \
+    get_task_registry
+from app.infrastructure.storage.redis import get_redis
+from app.infrastructure.storage.redis_keys import scheduler_key
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class RedisStreamTaskQueue(TaskQueue):
+    """基于 Redis Stream 消费者组的任务作业队列"""
+
+    # 调度器的投递脚本直接写入作业队列，与调度器的键位于同一个槽
+    _stream_name = scheduler_key('jobs')
+    _group_name = 'task-workers'
+
+    def __init__(self):
+        self._redis = get_redis()
+        self._settings = get_settings()
+        self._group_created = False
+
+    async def _ensure_group(self) -> None:
+        if self._group_created:
+            return
+
+        try:
+            await self._redis.client.xgroup_create(
+                self._stream_name, self._group_name, id='0', mkstream=True)
+        except ResponseError as e:
+            if 'BUSYGROUP' not in str(e):
+                raise
+        self._group_created = True
+
+    async def enqueue(self, task_id: str) -> str:
+        # 先登记任务，保证作业被领取前也能从任意进程查找到该任务
+        await get_task_registry().register(task_id)
+        job_id = await self._redis.client.xadd(
+            self._stream_name, {'task_id': task_id})
+        logger.info(f'任务{task_id}已投递到作业队列，作业ID: {job_id}')
+        return job_id
+
+    async def dequeue(self, count: int, block_ms: int = None) -> List[
+        Tuple[str, str]]:
+        await self._ensure_group()
+
+        # 优先认领长时间未确认的作业(领取该作业的Worker可能已崩溃)
+        _, claimed, *_ = await self._redis.client.xautoclaim(
+            self._stream_name, self._group_name, WORKER_ID,
+            min_idle_time=self._settings.task_job_claim_idle_ms,
+            start_id='0-0', count=count,
+        )
+        jobs = [(job_id, data.get('task_id')) for job_id, data in claimed
+                if data]
+
+        if len(jobs) < count:
+            client = self._redis.client if jobs or block_ms is None \
+                else self._redis.blocking_client
+            messages = await client.xreadgroup(
+                self._group_name, WORKER_ID, {self._stream_name: '>'},
+                count=count - len(jobs), block=None if jobs else block_ms,
+            )
+            for _, stream_messages in messages or []:
+                jobs.extend((job_id, data.get('task_id'))
+                            for job_id, data in stream_messages)
+
+        return jobs
+
+    async def heartbeat(self, job_ids: List[str]) -> None:
+        if not job_ids:
+            return
+
+        await self._redis.client.xclaim(
+            self._stream_name, self._group_name, WORKER_ID,
+            min_idle_time=0, message_ids=job_ids, justid=True,
+        )
+
+    async def ack(self, job_id: str) -> None:
+        async with self._redis.client.pipeline(transaction=True) as pipe:
+            pipe.xack(self._stream_name, self._group_name, job_id)
+            pipe.xdel(self._stream_name, job_id)
+            await pipe.execute()
+
+    async def list_task_ids(self) -> List[str]:
+        # 作业确认时会从流中删除，流中只剩未确认的作业，数量受全局并发数限制
+        messages = await self._redis.client.xrange(self._stream_name)
+        return [data.get('task_id') for _, data in messages if data]
+
+    async def stats(self) -> TaskQueueStats:
+        await self._ensure_group()
+
+        length = await self._redis.client.xlen(self._stream_name)
+        groups = await self._redis.client.xinfo_groups(self._stream_name)
+        group = next(
+            (g for g in groups if g.get('name') == self._group_name), {})
+
+        return TaskQueueStats(
+            length=length,
+            pending=group.get('pending', 0),
+            lag=group.get('lag'),
+            consumers=group.get('consumers', 0),
+        )
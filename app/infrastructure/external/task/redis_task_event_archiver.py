@@ -0,0 +1,207 @@
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import List, Dict, Optional
+
+from app.domain.models.task_history import ArchivedEvent
+from app.domain.repositories.task_event_archive_repository import \
+    TaskEventArchiveRepository
+from app.infrastructure.external.message_queue.payload_codec import \
+    get_payload_codec
+from app.infrastructure.external.task.redis_stream_task import \
+    RedisStreamTask
+from app.infrastructure.external.task.redis_task_lease import RedisTaskLease
+from app.infrastructure.external.task.redis_task_registry import \
+    get_task_registry
+from app.infrastructure.storage.redis import get_redis
+from app.infrastructure.storage.redis_keys import task_id_from_key
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class _ArchiverLease(RedisTaskLease):
+    """归档器租约，多个Worker中同一时刻只有一个执行归档"""
+
+    @classmethod
+    def lease_key(cls, task_id: str) -> str:
+        return 'task:archive:lock'
+
+
+class RedisTaskEventArchiver:
+    """任务事件归档器，从输出流读取事件批量写入归档仓库，不影响Agent写入事件
+
+    - task:archive:active   待归档的任务集合，从任务索引中发现新近活跃的任务后加入
+    - task:archive:cursors  各任务已归档到的流ID，写入仓库成功后才推进(至少一次，重复事件由仓库忽略)
+    任务的输出流没有新事件且不再运行(无租约)时移出待归档集合，再次运行时重新被发现；
+    归档落后于输出流裁剪时游标之后的事件已被删除，记录为缺口(gaps)并输出告警
+    """
+
+    _active_key = 'task:archive:active'
+    _cursors_key = 'task:archive:cursors'
+
+    # 单条多流XREAD包含的流数量
+    _streams_per_read = 200
+
+    def __init__(self, repository: TaskEventArchiveRepository):
+        self._repository = repository
+        self._redis = get_redis()
+        self._settings = get_settings()
+        self._codec = get_payload_codec()
+        self._lease = _ArchiverLease('archiver')
+        self._last_scan: float = 0
+        self.gaps = 0
+
+    async def _discover(self) -> None:
+        """将上次扫描以来在任务索引中活跃过的任务加入待归档集合"""
+        now = time.time()
+        # 多留一个扫描周期，避免索引写入与扫描交错时漏掉任务
+        interval = self._settings.task_event_archive_interval_ms / 1000
+        since = self._last_scan - interval
+        task_ids = await get_task_registry().list_active(since)
+        if task_ids:
+            await self._redis.client.sadd(self._active_key, *task_ids)
+        self._last_scan = now
+
+    def _to_events(self, task_id: str, entries: List) -> List[ArchivedEvent]:
+        events = []
+        for message_id, fields in entries:
+            event_id = message_id.decode()
+            try:
+                data = json.loads(self._codec.decode(fields.get(b'data')))
+            except Exception as e:
+                logger.error(f'解析任务[{task_id}]的事件[{event_id}]失败，跳过归档: {e}')
+                continue
+
+            seq = ArchivedEvent.seq_from_event_id(event_id)
+            events.append(ArchivedEvent(
+                task_id=task_id,
+                seq=seq,
+                event_id=event_id,
+                type=data.get('type', '') if isinstance(data, dict) else '',
+                data=data if isinstance(data, dict) else {'value': data},
+                created_at=datetime.fromtimestamp(
+                    ArchivedEvent.seq_to_ms(seq) / 1000, timezone.utc),
+            ))
+        return events
+
+    @classmethod
+    def _has_gap(cls, cursor: str, info: Dict) -> bool:
+        # Redis 7以上记录了被删除的最大流ID，可以精确判断；否则游标早于首条事件说明游标本身
+        # 已被裁剪，按裁剪从旧到新进行，游标之后的事件大概率也已丢失
+        max_deleted = info.get('max-deleted-entry-id')
+        if max_deleted is not None:
+            return ArchivedEvent.seq_from_event_id(max_deleted) > \
+                ArchivedEvent.seq_from_event_id(cursor)
+
+        first_entry = info.get('first-entry')
+        return first_entry is not None and \
+            ArchivedEvent.seq_from_event_id(first_entry[0]) > \
+            ArchivedEvent.seq_from_event_id(cursor)
+
+    async def _detect_gaps(self, pending: Dict[str, str]) -> None:
+        """比较归档游标与输出流中的首条事件，检测已被裁剪但尚未归档的事件"""
+        resumed = [task_id for task_id, cursor in pending.items()
+                   if cursor != '0']
+        if not resumed:
+            return
+
+        async with self._redis.client.pipeline(transaction=False) as pipe:
+            for task_id in resumed:
+                pipe.xinfo_stream(RedisStreamTask.output_stream_name(task_id))
+            infos = await pipe.execute(raise_on_error=False)
+
+        for task_id, info in zip(resumed, infos):
+            if isinstance(info, dict) and self._has_gap(pending[task_id], info):
+                self.gaps += 1
+                logger.warning(
+                    f'任务[{task_id}]输出流中游标[{pending[task_id]}]之后的部分事件已被裁剪，归档存在缺口')
+
+    def _group_by_slot(self, task_ids: List[str]) -> List[List[str]]:
+        """集群模式下多流XREAD只能读取同一个槽中的流，按输出流所在的槽分组"""
+        groups: Dict[Optional[int], List[str]] = {}
+        for task_id in task_ids:
+            slot = self._redis.key_slot(
+                RedisStreamTask.output_stream_name(task_id))
+            groups.setdefault(slot, []).append(task_id)
+        return list(groups.values())
+
+    async def _archive_streams(self, task_ids: List[str]) -> int:
+        """归档一组(位于同一个槽的)任务的输出流，直到这些流没有新事件，返回写入的事件数量"""
+        cursors = await self._redis.client.hmget(self._cursors_key, task_ids)
+        pending: Dict[str, str] = {
+            task_id: cursor or '0' for task_id, cursor in zip(task_ids, cursors)
+        }
+        idle = set(task_ids)
+        archived = 0
+        await self._detect_gaps(pending)
+
+        batch_size = self._settings.task_event_archive_batch_size
+        while pending:
+            messages = await self._redis.binary_client.xread(
+                {RedisStreamTask.output_stream_name(task_id): cursor
+                 for task_id, cursor in pending.items()},
+                count=batch_size,
+            )
+            if not messages:
+                break
+
+            events, new_cursors = [], {}
+            pending = {}
+            for stream_name, entries in messages:
+                task_id = task_id_from_key(stream_name.decode())
+                idle.discard(task_id)
+                events.extend(self._to_events(task_id, entries))
+                new_cursors[task_id] = entries[-1][0].decode()
+                # 只继续读取本轮读满的流
+                if len(entries) >= batch_size:
+                    pending[task_id] = new_cursors[task_id]
+
+            archived += await self._repository.save_events(events)
+            await self._redis.client.hset(self._cursors_key,
+                                          mapping=new_cursors)
+
+        await self._retire(list(idle))
+        return archived
+
+    async def _retire(self, task_ids: List[str]) -> None:
+        """没有新事件且不再运行的任务移出待归档集合"""
+        if not task_ids:
+            return
+
+        async with self._redis.client.pipeline(transaction=False) as pipe:
+            for task_id in task_ids:
+                pipe.exists(RedisTaskLease.lease_key(task_id))
+            leased = await pipe.execute()
+
+        finished = [task_id for task_id, exists in zip(task_ids, leased)
+                    if not exists]
+        if finished:
+            await self._redis.client.srem(self._active_key, *finished)
+
+    async def archive(self) -> Optional[int]:
+        """执行一轮归档，未获得归档器租约时返回None"""
+        if not await self._lease.acquire():
+            return None
+
+        await self._discover()
+        task_ids = sorted(await self._redis.client.smembers(self._active_key))
+
+        archived = 0
+        for group in self._group_by_slot(task_ids):
+            for offset in range(0, len(group), self._streams_per_read):
+                archived += await self._archive_streams(
+                    group[offset:offset + self._streams_per_read])
+
+        if archived:
+            logger.info(f'任务事件归档完成，共归档{archived}条事件')
+        return archived
+
+    @classmethod
+    async def forget(cls, task_id: str) -> None:
+        """任务被回收时删除其归档游标"""
+        async with get_redis().client.pipeline(transaction=False) as pipe:
+            pipe.srem(cls._active_key, task_id)
+            pipe.hdel(cls._cursors_key, task_id)
+            await pipe.execute()
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Optional
+
+from app.infrastructure.storage.redis import get_redis
+from app.infrastructure.storage.redis_keys import task_key
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# 当前进程的唯一标识，作为任务租约的持有者
+WORKER_ID = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+_ACQUIRE_SCRIPT = """
+local owner = redis.call("GET", KEYS[1])
+if not owner then
+    redis.call("SET", KEYS[1], ARGV[1], "EX", ARGV[2])
+    return 1
+end
+if owner == ARGV[1] then
+    redis.call("EXPIRE", KEYS[1], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+_RENEW_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("EXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+
+class RedisTaskLease:
+    """任务租约，运行中的任务周期性续约，租约过期即视为任务所在进程已崩溃"""
+
+    def __init__(self, task_id: str):
+        self._key = self.lease_key(task_id)
+        self._redis = get_redis()
+        self._ttl_seconds = get_settings().task_lease_ttl_seconds
+
+    @classmethod
+    def lease_key(cls, task_id: str) -> str:
+        return task_key('lease', task_id)
+
+    async def _run_script(self, script: str) -> int:
+        return await self._redis.client.eval(
+            script, 1, self._key, WORKER_ID, self._ttl_seconds)
+
+    async def get_owner(self) -> Optional[str]:
+        return await self._redis.client.get(self._key)
+
+    async def acquire(self) -> bool:
+        """获取租约，已由当前进程持有时视为获取成功"""
+        return await self._run_script(_ACQUIRE_SCRIPT) == 1
+
+    async def renew(self) -> bool:
+        return await self._run_script(_RENEW_SCRIPT) == 1
+
+    async def release(self) -> bool:
+        try:
+            return await self._run_script(_RELEASE_SCRIPT) == 1
+        except Exception as e:
+            logger.error(f'释放租约[{self._key}]失败: {e}')
+            return False
+
+    async def keep_alive(self) -> None:
+        """按租约时长的1/3周期续约，直到被取消"""
+        interval = max(self._ttl_seconds / 3, 1)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await self.renew():
+                    logger.warning(f'租约[{self._key}]已失效，续约失败')
+            except Exception as e:
+                logger.error(f'续约租约[{self._key}]失败: {e}')
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import logging
+import time
+from functools import lru_cache
+from typing import Optional, Dict, Callable, Awaitable, List
+
+from app.infrastructure.external.task.redis_task_lease import WORKER_ID, \
+    RedisTaskLease
+from app.infrastructure.storage.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+CancelHandler = Callable[[], Awaitable[bool]]
+
+
+class RedisTaskRegistry:
+    """分布式任务注册中心
+
+    - task:index              任务索引，分值为任务最近活跃时间，用于跨进程查找任务，并供清理器回收过期任务
+    - task:lease:{id}         运行中任务的心跳租约，值为持有租约的进程ID
+    - task:control:{worker}   进程控制频道，其他进程通过该频道投递取消请求
+    """
+
+    _index_key = 'task:index'
+
+    def __init__(self):
+        self._redis = get_redis()
+        self._cancel_handlers: Dict[str, CancelHandler] = {}
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def _control_channel(cls, worker_id: str) -> str:
+        return f'task:control:{worker_id}'
+
+    async def init(self):
+        if self._listener_task is not None:
+            logger.warning('任务注册中心已初始化, 无需重复初始化')
+            return
+
+        self._listener_task = asyncio.create_task(self._listen())
+        logger.info(f'任务注册中心初始化成功，当前进程ID: {WORKER_ID}')
+
+    async def shutdown(self):
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+            logger.info('任务注册中心关闭成功')
+
+        get_task_registry.cache_clear()
+
+    async def register(self, task_id: str,
+                       cancel_handler: Optional[CancelHandler] = None) -> None:
+        """登记任务，传递cancel_handler表示任务正在当前进程运行"""
+        if cancel_handler is not None:
+            self._cancel_handlers[task_id] = cancel_handler
+
+        await self.touch(task_id)
+
+    async def touch(self, task_id: str) -> None:
+        """刷新任务最近活跃时间"""
+        await self._redis.client.zadd(self._index_key, {task_id: time.time()})
+
+    def release(self, task_id: str) -> None:
+        """任务在当前进程运行结束，不再接收取消请求；任务索引中的记录保留供查找，由清理器过期回收"""
+        self._cancel_handlers.pop(task_id, None)
+
+    async def unregister(self, task_id: str) -> None:
+        self._cancel_handlers.pop(task_id, None)
+        await self._redis.client.zrem(self._index_key, task_id)
+
+    async def exists(self, task_id: str) -> bool:
+        return await self._redis.client.zscore(
+            self._index_key, task_id) is not None
+
+    async def list_active(self, since: float) -> List[str]:
+        """最近活跃时间不早于since的任务"""
+        return await self._redis.client.zrangebyscore(
+            self._index_key, since, '+inf')
+
+    async def list_inactive(self, before: float, limit: int) -> List[str]:
+        """最近活跃时间早于before的任务，按活跃时间从早到晚至多返回limit个"""
+        return await self._redis.client.zrangebyscore(
+            self._index_key, '-inf', before, start=0, num=limit)
+
+    async def get_owner(self, task_id: str) -> Optional[str]:
+        """获取当前持有任务租约(正在运行该任务)的进程ID"""
+        return await RedisTaskLease(task_id).get_owner()
+
+    async def cancel(self, task_id: str) -> bool:
+        """取消任务，任务在其他进程运行时通过控制频道投递给持有者"""
+        handler = self._cancel_handlers.get(task_id)
+        if handler is not None:
+            return await handler()
+
+        owner = await self.get_owner(task_id)
+        if not owner:
+            logger.info(f'任务{task_id}当前没有进程在运行，无需取消')
+            return False
+
+        receivers = await self._redis.pubsub_client.publish(
+            self._control_channel(owner),
+            json.dumps({'action': 'cancel', 'task_id': task_id}),
+        )
+        logger.info(f'已向进程[{owner}]投递任务{task_id}的取消请求')
+        return receivers > 0
+
+    async def _handle_command(self, data: str) -> None:
+        try:
+            command = json.loads(data)
+        except Exception as e:
+            logger.error(f'解析任务控制指令失败: {e}')
+            return
+
+        task_id = command.get('task_id')
+        if command.get('action') == 'cancel':
+            handler = self._cancel_handlers.get(task_id)
+            if handler is None:
+                logger.warning(f'收到任务{task_id}的取消请求，但任务不在当前进程运行')
+                return
+            await handler()
+
+    async def _listen(self) -> None:
+        channel = self._control_channel(WORKER_ID)
+        while True:
+            pubsub = self._redis.pubsub_client.pubsub()
+            try:
+                await pubsub.subscribe(channel)
+                async for message in pubsub.listen():
+                    if message.get('type') == 'message':
+                        await self._handle_command(message.get('data'))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f'监听任务控制频道失败，稍后重试: {e}')
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+
+@lru_cache()
+def get_task_registry() -> RedisTaskRegistry:
+    return RedisTaskRegistry()
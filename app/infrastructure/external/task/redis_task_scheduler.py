@@ -0,0 +1,229 @@
+import logging
+import time
+from typing import Optional, List, Tuple
+
+from app.domain.external.task_scheduler import TaskScheduler
+from app.infrastructure.external.task.redis_stream_task_queue import \
+    RedisStreamTaskQueue
+from app.infrastructure.external.task.redis_task_registry import \
+    get_task_registry
+from app.infrastructure.storage.redis import get_redis
+from app.infrastructure.storage.redis_keys import scheduler_key
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# 入队：按租户权重计算虚拟完成时间 finish = max(V, F_tenant) + 1/weight
+_SUBMIT_SCRIPT = """
+local rank = redis.call('ZRANK', KEYS[1], ARGV[1])
+if rank then
+    return rank + 1
+end
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[4]) then
+    return -1
+end
+local vtime = tonumber(redis.call('GET', KEYS[4]) or '0')
+local last = tonumber(redis.call('HGET', KEYS[2], ARGV[2]) or '0')
+local finish = math.max(vtime, last) + 1 / tonumber(ARGV[3])
+redis.call('HSET', KEYS[2], ARGV[2], finish)
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[2])
+redis.call('ZADD', KEYS[1], finish, ARGV[1])
+return redis.call('ZRANK', KEYS[1], ARGV[1]) + 1
+"""
+
+# 出队：回收过期占用后，按虚拟完成时间顺序投递配额允许的任务到作业队列
+_DISPATCH_SCRIPT = """
+local now = tonumber(ARGV[1])
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)
+for _, task_id in ipairs(expired) do
+    local tenant = redis.call('HGET', KEYS[3], task_id)
+    if tenant then
+        redis.call('HINCRBY', KEYS[4], tenant, -1)
+    end
+    redis.call('ZREM', KEYS[2], task_id)
+end
+
+local dispatched = {}
+local running = redis.call('ZCARD', KEYS[2])
+local max_running = tonumber(ARGV[3])
+local tenant_max_running = tonumber(ARGV[4])
+local tokens_per_minute = tonumber(ARGV[6])
+if running >= max_running then
+    return dispatched
+end
+
+local candidates = redis.call('ZRANGE', KEYS[1], 0, tonumber(ARGV[5]) - 1, 'WITHSCORES')
+for i = 1, #candidates, 2 do
+    if running >= max_running then
+        break
+    end
+    local task_id = candidates[i]
+    local tenant = redis.call('HGET', KEYS[3], task_id) or 'default'
+    local tenant_running = tonumber(redis.call('HGET', KEYS[4], tenant) or '0')
+    local tokens = tonumber(redis.call('HGET', KEYS[7], tenant) or '0')
+    -- 同一任务上一次运行未结束时继续排队，避免重复占用配额
+    if tenant_running < tenant_max_running
+            and (tokens_per_minute <= 0 or tokens < tokens_per_minute)
+            and not redis.call('ZSCORE', KEYS[2], task_id) then
+        redis.call('ZREM', KEYS[1], task_id)
+        redis.call('ZADD', KEYS[2], now + tonumber(ARGV[2]), task_id)
+        redis.call('HINCRBY', KEYS[4], tenant, 1)
+        redis.call('SET', KEYS[5], candidates[i + 1])
+        redis.call('XADD', KEYS[6], '*', 'task_id', task_id)
+        running = running + 1
+        table.insert(dispatched, task_id)
+    end
+end
+return dispatched
+"""
+
+# 确认占用：占用已被回收时重新占用，已存在时只刷新过期时间
+_ACQUIRE_SCRIPT = """
+if redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1]) == 1 then
+    local tenant = redis.call('HGET', KEYS[2], ARGV[1])
+    if tenant then
+        redis.call('HINCRBY', KEYS[3], tenant, 1)
+    end
+    return 1
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 1 then
+    local tenant = redis.call('HGET', KEYS[2], ARGV[1])
+    if tenant then
+        redis.call('HINCRBY', KEYS[3], tenant, -1)
+    end
+    return 1
+end
+return 0
+"""
+
+
+class RedisTaskScheduler(TaskScheduler):
+    """基于 Redis 的任务调度器，位于作业队列之前做准入控制
+
+    - task:{scheduler}:queue            排队任务，分值为加权公平排队(WFQ)的虚拟完成时间
+    - task:{scheduler}:finish           各租户最近一个任务的虚拟完成时间
+    - task:{scheduler}:vtime            全局虚拟时间，即最近出队任务的虚拟完成时间
+    - task:{scheduler}:tenants          任务所属租户
+    - task:{scheduler}:running          执行中的任务，分值为占用过期时间(毫秒)
+    - task:{scheduler}:running:tenants  各租户执行中的任务数
+    - task:{scheduler}:tokens:<minute>  各租户在该分钟内消耗的token数
+    所有键共用{scheduler}哈希标签，集群模式下与作业队列位于同一个槽，Lua脚本可以一起访问
+    """
+
+    _queue_key = scheduler_key('queue')
+    _finish_key = scheduler_key('finish')
+    _vtime_key = scheduler_key('vtime')
+    _tenants_key = scheduler_key('tenants')
+    _running_key = scheduler_key('running')
+    _tenant_running_key = scheduler_key('running:tenants')
+    _scan_limit = 100
+
+    def __init__(self):
+        self._redis = get_redis()
+        self._settings = get_settings()
+
+    @classmethod
+    def _tokens_key(cls, minute: int) -> str:
+        return scheduler_key(f'tokens:{minute}')
+
+    def _weight(self, tenant_id: str) -> float:
+        weight = self._settings.task_tenant_weights.get(tenant_id, 1.0)
+        return weight if weight > 0 else 1.0
+
+    async def submit(self, task_id: str, tenant_id: str) -> Optional[int]:
+        # 先登记任务，保证排队期间也能从任意进程查找到该任务
+        await get_task_registry().register(task_id)
+
+        position = await self._redis.client.eval(
+            _SUBMIT_SCRIPT, 4,
+            self._queue_key, self._finish_key, self._tenants_key,
+            self._vtime_key,
+            task_id, tenant_id, self._weight(tenant_id),
+            self._settings.task_max_queue_length,
+        )
+        if position < 0:
+            logger.warning(f'调度队列已满，拒绝租户[{tenant_id}]的任务{task_id}')
+            return None
+
+        logger.info(f'租户[{tenant_id}]的任务{task_id}进入调度队列，排队位置: {position}')
+        return position
+
+    async def dispatch(self) -> List[str]:
+        now_ms = int(time.time() * 1000)
+        dispatched = await self._redis.client.eval(
+            _DISPATCH_SCRIPT, 7,
+            self._queue_key, self._running_key, self._tenants_key,
+            self._tenant_running_key, self._vtime_key,
+            RedisStreamTaskQueue._stream_name,
+            self._tokens_key(now_ms // 60000),
+            now_ms, self._settings.task_job_claim_idle_ms,
+            self._settings.task_max_concurrency,
+            self._settings.task_tenant_max_concurrency,
+            self._scan_limit,
+            self._settings.task_tenant_tokens_per_minute,
+        )
+        if dispatched:
+            logger.info(f'调度器投递{len(dispatched)}个任务到作业队列: {dispatched}')
+        return dispatched
+
+    async def positions(self) -> List[Tuple[str, int]]:
+        task_ids = await self._redis.client.zrange(self._queue_key, 0, -1)
+        return [(task_id, index + 1) for index, task_id in enumerate(task_ids)]
+
+    async def is_scheduled(self, task_id: str) -> bool:
+        async with self._redis.client.pipeline(transaction=False) as pipe:
+            pipe.zscore(self._queue_key, task_id)
+            pipe.zscore(self._running_key, task_id)
+            queued, running = await pipe.execute()
+        return queued is not None or running is not None
+
+    async def acquire(self, task_id: str) -> None:
+        expire_at = int(time.time() * 1000) + \
+                    self._settings.task_job_claim_idle_ms
+        if await self._redis.client.eval(
+                _ACQUIRE_SCRIPT, 3,
+                self._running_key, self._tenants_key,
+                self._tenant_running_key,
+                task_id, expire_at,
+        ):
+            logger.info(f'任务{task_id}的并发配额已被回收，重新占用')
+
+    async def heartbeat(self, task_ids: List[str]) -> None:
+        if not task_ids:
+            return
+
+        expire_at = int(time.time() * 1000) + \
+                    self._settings.task_job_claim_idle_ms
+        await self._redis.client.zadd(
+            self._running_key, {task_id: expire_at for task_id in task_ids},
+            xx=True,
+        )
+
+    async def release(self, task_id: str) -> None:
+        await self._redis.client.eval(
+            _RELEASE_SCRIPT, 3,
+            self._running_key, self._tenants_key, self._tenant_running_key,
+            task_id,
+        )
+
+    async def record_tokens(self, tenant_id: str, tokens: int) -> None:
+        if tokens <= 0:
+            return
+
+        key = self._tokens_key(int(time.time()) // 60)
+        async with self._redis.client.pipeline(transaction=False) as pipe:
+            pipe.hincrby(key, tenant_id, tokens)
+            pipe.expire(key, 120)
+            await pipe.execute()
+
+    async def forget(self, task_id: str) -> None:
+        """任务被回收时删除其所属租户记录"""
+        await self._redis.client.hdel(self._tenants_key, task_id)
+
+    async def get_tenant(self, task_id: str) -> str:
+        tenant_id = await self._redis.client.hget(self._tenants_key, task_id)
+        return tenant_id or 'default'
@@ -0,0 +1,73 @@
+import logging
+import time
+
+from app.domain.services.agent_task_runner import AgentTaskRunner
+from app.infrastructure.external.task.redis_stream_task import \
+    RedisStreamTask
+from app.infrastructure.external.task.redis_task_event_archiver import \
+    RedisTaskEventArchiver
+from app.infrastructure.external.task.redis_task_lease import RedisTaskLease
+from app.infrastructure.external.task.redis_task_registry import \
+    get_task_registry
+from app.infrastructure.external.task.redis_task_scheduler import \
+    RedisTaskScheduler
+from app.infrastructure.repositories.redis_memory_repository import \
+    RedisMemoryRepository
+from app.infrastructure.repositories.redis_task_checkpoint_repository import \
+    RedisTaskCheckpointRepository
+from app.infrastructure.repositories.redis_task_snapshot_repository import \
+    RedisTaskSnapshotRepository
+from app.infrastructure.storage.redis import get_redis
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class RedisTaskSweeper:
+    """根据任务索引回收长时间不活跃的任务，删除遗留的输入/输出流、快照、Agent记忆与登记记录
+
+    正在运行(持有租约)或存在检查点(等待恢复)的任务不会被回收
+    """
+
+    _batch_size = 100
+
+    def __init__(self):
+        self._redis = get_redis()
+        self._settings = get_settings()
+        self._registry = get_task_registry()
+        self._scheduler = RedisTaskScheduler()
+        self._checkpoint_repository = RedisTaskCheckpointRepository()
+        self._memory_repository = RedisMemoryRepository()
+
+    async def _is_active(self, task_id: str) -> bool:
+        if await RedisTaskLease(task_id).get_owner():
+            return True
+        return await self._checkpoint_repository.exists(task_id)
+
+    async def sweep(self) -> int:
+        deadline = time.time() - self._settings.task_stream_ttl_seconds
+        task_ids = await self._registry.list_inactive(
+            deadline, self._batch_size)
+
+        swept = 0
+        for task_id in task_ids:
+            if await self._is_active(task_id):
+                await self._registry.touch(task_id)
+                continue
+
+            await self._redis.client.delete(
+                RedisStreamTask.input_stream_name(task_id),
+                RedisStreamTask.output_stream_name(task_id),
+                RedisTaskSnapshotRepository.snapshot_key(task_id),
+            )
+            for memory_id in AgentTaskRunner.memory_ids(task_id):
+                await self._memory_repository.delete(memory_id)
+            await self._scheduler.forget(task_id)
+            await RedisTaskEventArchiver.forget(task_id)
+            # 最后移出任务索引，中途失败时下一轮清理会重试
+            await self._registry.unregister(task_id)
+            swept += 1
+
+        if swept:
+            logger.info(f'任务清理完成，共回收{swept}个过期任务')
+        return swept
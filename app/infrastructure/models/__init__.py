@@ -1,3 +1,4 @@
 from .base import Base
+from .task_event import TaskEventModel, TaskArchiveModel
 
-__all__ = ['Base']
+__all__ = ['Base', 'TaskEventModel', 'TaskArchiveModel']
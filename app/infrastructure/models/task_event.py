@@ -0,0 +1,37 @@
+from sqlalchemy import Column, String, BigInteger, Integer, DateTime, Index, \
+    PrimaryKeyConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+
+from .base import Base
+
+
+class TaskEventModel(Base):
+    """任务事件表，按事件时间做范围分区，每月一个分区"""
+    __tablename__ = 'task_events'
+    __table_args__ = (
+        # 分区表的主键必须包含分区键
+        PrimaryKeyConstraint('task_id', 'seq', 'created_at',
+                             name='pk_task_events'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+
+    task_id = Column(String(64), nullable=False)
+    seq = Column(BigInteger, nullable=False)
+    event_id = Column(String(32), nullable=False)
+    type = Column(String(32), nullable=False, server_default='')
+    data = Column(JSONB, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class TaskArchiveModel(Base):
+    """已归档任务概要表，用于按最后活跃时间分页列出历史任务"""
+    __tablename__ = 'task_archives'
+    __table_args__ = (
+        Index('ix_task_archives_last_event_at', 'last_event_at', 'task_id'),
+    )
+
+    task_id = Column(String(64), primary_key=True)
+    first_event_at = Column(DateTime(timezone=True), nullable=False)
+    last_event_at = Column(DateTime(timezone=True), nullable=False)
+    event_count = Column(Integer, nullable=False, server_default='0')
+    last_event_type = Column(String(32), nullable=False, server_default='')
@@ -1,11 +1,15 @@
+import hashlib
 import logging
+import os
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 import yaml
 from filelock import FileLock
 
-from app.application.errors.exceptions import ServerRequestError
+from app.application.errors.exceptions import ServerRequestError, \
+    ConflictError
 from app.domain.repositories.app_config_repository import AppConfigRepository
 from app.domain.models.app_config import AppConfig, LLMConfig, AgentConfig, \
     McpConfig
@@ -14,46 +18,116 @@ logger = logging.getLogger(__name__)
 
 
 class FileAppConfigRepository(AppConfigRepository):
-    def __init__(self, config_path: str):
+    """基于 YAML 文件的应用配置仓库，解析后的配置缓存在内存中
+
+    读取时最多每check_interval秒检查一次文件的inode、修改时间与大小，文件变化(包括被替换)后重新解析，
+    通过当前实例保存时直接更新缓存。配置版本为文件内容的哈希，各进程读取同一份文件得到相同的版本
+    """
+
+    def __init__(self, config_path: str, check_interval: float = 1.0):
         root_dir = Path.cwd()
 
         self._config_path = root_dir.joinpath(root_dir, config_path)
         self._config_path.parent.mkdir(parents=True, exist_ok=True)
         self._lock_file = self._config_path.with_suffix('.lock')
 
+        self._check_interval = check_interval
+        self._checked_at: float = 0
+        self._stamp: Optional[Tuple[int, int, int]] = None
+        self._config: Optional[AppConfig] = None
+        self._version: int = 0
+
     def _create_default_app_config_if_not_exist(self):
         if not self._config_path.exists():
             default_app_config = AppConfig(
                 llm_config=LLMConfig(),
                 agent_config=AgentConfig(),
-                mcp_conifg=McpConfig()
+                mcp_config=McpConfig()
             )
-            self.save(default_app_config)
+            self._write(default_app_config)
 
-    def load(self) -> Optional[AppConfig]:
-        self._create_default_app_config_if_not_exist()
+    @classmethod
+    def _content_version(cls, content: bytes) -> int:
+        return int.from_bytes(
+            hashlib.blake2b(content, digest_size=8).digest(), 'big')
+
+    def _file_stamp(self) -> Tuple[int, int, int]:
+        stat = self._config_path.stat()
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._stamp is not None and \
+                now - self._checked_at < self._check_interval:
+            return
 
         try:
-            with open(self._config_path, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f)
-                return AppConfig.model_validate(data) if data else None
+            self._create_default_app_config_if_not_exist()
+            stamp = self._file_stamp()
+            if stamp == self._stamp:
+                self._checked_at = now
+                return
+
+            content = self._config_path.read_bytes()
+            data = yaml.safe_load(content)
+            config = AppConfig.model_validate(data) if data else None
+        except ServerRequestError:
+            raise
         except Exception as e:
             logger.error(f'读取应用配置失败: {e}')
             raise ServerRequestError(f'读取应用配置失败，请稍后重试')
 
-    def save(self, app_config: AppConfig):
+        if self._stamp is not None:
+            logger.info(f'应用配置文件[{self._config_path}]已变化，重新加载')
+        self._config = config
+        self._stamp = stamp
+        self._version = self._content_version(content)
+        self._checked_at = now
+
+    def load(self) -> Optional[AppConfig]:
+        """返回缓存的配置，调用方修改前需要复制"""
+        self._refresh()
+        return self._config
+
+    def get_version(self) -> int:
+        self._refresh()
+        return self._version
+
+    async def save(self, app_config: AppConfig,
+                   base_version: Optional[int] = None):
+        self._write(app_config, base_version)
+
+    def _write(self, app_config: AppConfig,
+               base_version: Optional[int] = None):
         lock = FileLock(self._lock_file, timeout=5)
 
         try:
             with lock:
+                if base_version is not None and \
+                        self._content_version(self._config_path.read_bytes()) \
+                        != base_version:
+                    # 文件已被其他进程修改，下次读取时重新解析
+                    self._stamp = None
+                    raise ConflictError('应用配置已被其他请求修改，请刷新后重试')
+
                 data_to_dump = app_config.model_dump(mode='json')
+                content = yaml.dump(
+                    data_to_dump,
+                    sort_keys=False,
+                    allow_unicode=True
+                ).encode('utf-8')
+
+                # 先写临时文件再替换，其他进程不会读到写了一半的配置
+                tmp_path = self._config_path.with_suffix('.tmp')
+                tmp_path.write_bytes(content)
+                os.replace(tmp_path, self._config_path)
 
-                with open(self._config_path, 'w', encoding='utf-8') as f:
-                    yaml.dump(
-                        data_to_dump, f,
-                        sort_keys=False,
-                        allow_unicode=True
-                    )
+                self._config = app_config
+                self._stamp = self._file_stamp()
+                self._version = self._content_version(content)
+                self._checked_at = time.monotonic()
+        except ConflictError:
+            raise
         except Exception as e:
             logger.error(f'写入应用配置失败: {e}')
             raise ServerRequestError(f'写入应用配置失败，请稍后重试')
@@ -0,0 +1,45 @@
+import copy
+import logging
+from typing import Dict, Any, List
+
+from app.domain.models.memory import Memory
+from app.domain.repositories.memory_repository import MemoryRepository
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryMemoryRepository(MemoryRepository):
+    """进程内记忆仓库，保存记忆消息列表的副本，适用于单机部署与测试
+
+    同一进程中的所有实例共享存储，保存时按变更日志增量更新，存在reset时整体替换
+    """
+
+    _memories: Dict[str, List[Dict[str, Any]]] = {}
+
+    async def load(self, memory_id: str) -> Memory:
+        messages = InMemoryMemoryRepository._memories.get(memory_id, [])
+        memory = Memory()
+        # 直接赋值消息列表，避免产生新的变更日志
+        memory.messages = copy.deepcopy(messages)
+        return memory
+
+    async def save(self, memory_id: str, memory: Memory) -> None:
+        changes = memory.pop_changes()
+        if not changes:
+            return
+
+        if any(change['op'] == 'reset' for change in changes):
+            InMemoryMemoryRepository._memories[memory_id] = copy.deepcopy(
+                memory.messages)
+            return
+
+        messages = InMemoryMemoryRepository._memories.setdefault(memory_id, [])
+        for change in changes:
+            if change['op'] == 'add':
+                messages.extend(copy.deepcopy(change['messages']))
+            elif change['op'] == 'rollback':
+                del messages[-1:]
+
+    async def delete(self, memory_id: str) -> None:
+        InMemoryMemoryRepository._memories.pop(memory_id, None)
+        logger.info(f'记忆[{memory_id}]已删除')
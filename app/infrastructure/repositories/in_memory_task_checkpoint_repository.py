@@ -0,0 +1,28 @@
+from typing import Optional, List, Dict
+
+from app.domain.models.task_checkpoint import TaskCheckpoint
+from app.domain.repositories.task_checkpoint_repository import \
+    TaskCheckpointRepository
+
+
+class InMemoryTaskCheckpointRepository(TaskCheckpointRepository):
+    """进程内任务检查点仓库，同一进程中的所有实例共享存储，保存序列化后的检查点避免外部修改"""
+
+    _checkpoints: Dict[str, str] = {}
+
+    async def get(self, task_id: str) -> Optional[TaskCheckpoint]:
+        data = InMemoryTaskCheckpointRepository._checkpoints.get(task_id)
+        return TaskCheckpoint.model_validate_json(data) if data else None
+
+    async def save(self, checkpoint: TaskCheckpoint) -> None:
+        InMemoryTaskCheckpointRepository._checkpoints[checkpoint.task_id] = \
+            checkpoint.model_dump_json()
+
+    async def delete(self, task_id: str) -> None:
+        InMemoryTaskCheckpointRepository._checkpoints.pop(task_id, None)
+
+    async def exists(self, task_id: str) -> bool:
+        return task_id in InMemoryTaskCheckpointRepository._checkpoints
+
+    async def list_task_ids(self) -> List[str]:
+        return list(InMemoryTaskCheckpointRepository._checkpoints)
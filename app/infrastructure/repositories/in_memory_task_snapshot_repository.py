@@ -0,0 +1,22 @@
+from typing import Optional, Dict
+
+from app.domain.models.task_snapshot import TaskSnapshot
+from app.domain.repositories.task_snapshot_repository import \
+    TaskSnapshotRepository
+
+
+class InMemoryTaskSnapshotRepository(TaskSnapshotRepository):
+    """进程内任务状态快照仓库，同一进程中的所有实例共享存储，快照随任务一起被回收"""
+
+    _snapshots: Dict[str, str] = {}
+
+    async def get(self, task_id: str) -> Optional[TaskSnapshot]:
+        data = InMemoryTaskSnapshotRepository._snapshots.get(task_id)
+        return TaskSnapshot.model_validate_json(data) if data else None
+
+    async def save(self, snapshot: TaskSnapshot) -> None:
+        InMemoryTaskSnapshotRepository._snapshots[snapshot.task_id] = \
+            snapshot.model_dump_json()
+
+    async def delete(self, task_id: str) -> None:
+        InMemoryTaskSnapshotRepository._snapshots.pop(task_id, None)
@@ -0,0 +1,172 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple, Set
+
+from sqlalchemy import select, text, tuple_, func
+from sqlalchemy.dialects.postgresql import insert
+
+from app.domain.models.task_history import ArchivedEvent, ArchivedTask
+from app.domain.repositories.task_event_archive_repository import \
+    TaskEventArchiveRepository
+from app.infrastructure.models.task_event import TaskEventModel, \
+    TaskArchiveModel
+from app.infrastructure.storage.postgres import get_postgres
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresTaskEventArchiveRepository(TaskEventArchiveRepository):
+    """基于 Postgres 的任务事件归档仓库
+
+    - task_events    事件表，按created_at每月一个分区，主键(task_id, seq, created_at)
+    - task_archives  任务概要表，每批写入后累加事件数量并更新最后事件时间
+    事件以多行INSERT批量写入，主键冲突(重复归档)的事件被忽略
+    """
+
+    # 每条INSERT的最大行数，避免超过Postgres单条语句的参数数量上限
+    _insert_chunk_size = 1000
+
+    def __init__(self):
+        self._postgres = get_postgres()
+        self._partitions: Set[str] = set()
+
+    @classmethod
+    def _partition_range(cls, created_at: datetime) -> Tuple[str, datetime,
+                                                            datetime]:
+        start = created_at.astimezone(timezone.utc).replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0)
+        end = start.replace(year=start.year + 1, month=1) \
+            if start.month == 12 else start.replace(month=start.month + 1)
+        name = f'{TaskEventModel.__tablename__}_{start:%Y%m}'
+        return name, start, end
+
+    async def init(self) -> None:
+        """创建归档表与当前月份的分区"""
+        async with self._postgres.engine.begin() as conn:
+            await conn.run_sync(
+                TaskEventModel.metadata.create_all,
+                tables=[TaskEventModel.__table__, TaskArchiveModel.__table__],
+            )
+        await self._ensure_partitions([datetime.now(timezone.utc)])
+        logger.info('任务事件归档表初始化成功')
+
+    async def _ensure_partitions(self, times: List[datetime]) -> None:
+        ranges = {self._partition_range(created_at) for created_at in times}
+        missing = [item for item in ranges if item[0] not in self._partitions]
+        if not missing:
+            return
+
+        async with self._postgres.engine.begin() as conn:
+            for name, start, end in missing:
+                await conn.execute(text(
+                    f'CREATE TABLE IF NOT EXISTS {name} '
+                    f'PARTITION OF {TaskEventModel.__tablename__} '
+                    f"FOR VALUES FROM ('{start.isoformat()}') "
+                    f"TO ('{end.isoformat()}')"
+                ))
+        self._partitions.update(name for name, _, _ in missing)
+
+    async def save_events(self, events: List[ArchivedEvent]) -> int:
+        if not events:
+            return 0
+
+        await self._ensure_partitions([event.created_at for event in events])
+
+        inserted = []
+        async with self._postgres.session_factory() as session:
+            for offset in range(0, len(events), self._insert_chunk_size):
+                chunk = events[offset:offset + self._insert_chunk_size]
+                stmt = insert(TaskEventModel).values(
+                    [event.model_dump() for event in chunk]
+                ).on_conflict_do_nothing().returning(
+                    TaskEventModel.task_id, TaskEventModel.type,
+                    TaskEventModel.created_at,
+                )
+                inserted.extend((await session.execute(stmt)).all())
+
+            # 只按实际写入的事件更新任务概要，重复归档不会重复计数
+            summaries = defaultdict(list)
+            for task_id, event_type, created_at in inserted:
+                summaries[task_id].append((created_at, event_type))
+
+            if summaries:
+                rows = []
+                for task_id, items in summaries.items():
+                    items.sort(key=lambda item: item[0])
+                    rows.append({
+                        'task_id': task_id,
+                        'first_event_at': items[0][0],
+                        'last_event_at': items[-1][0],
+                        'event_count': len(items),
+                        'last_event_type': items[-1][1],
+                    })
+
+                stmt = insert(TaskArchiveModel).values(rows)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[TaskArchiveModel.task_id],
+                    set_={
+                        'first_event_at': func.least(
+                            TaskArchiveModel.first_event_at,
+                            stmt.excluded.first_event_at),
+                        'last_event_at': func.greatest(
+                            TaskArchiveModel.last_event_at,
+                            stmt.excluded.last_event_at),
+                        'event_count': TaskArchiveModel.event_count +
+                                       stmt.excluded.event_count,
+                        'last_event_type': stmt.excluded.last_event_type,
+                    },
+                )
+                await session.execute(stmt)
+
+            await session.commit()
+
+        return len(inserted)
+
+    async def list_events(self, task_id: str, after_seq: Optional[int],
+                          limit: int) -> List[ArchivedEvent]:
+        stmt = select(TaskEventModel).where(TaskEventModel.task_id == task_id)
+        if after_seq is not None:
+            # seq中包含事件的毫秒时间戳，附加时间条件以裁剪更早的分区
+            after_ms = ArchivedEvent.seq_to_ms(after_seq)
+            stmt = stmt.where(
+                TaskEventModel.seq > after_seq,
+                TaskEventModel.created_at >= datetime.fromtimestamp(
+                    after_ms / 1000, timezone.utc),
+            )
+        stmt = stmt.order_by(TaskEventModel.seq).limit(limit)
+
+        async with self._postgres.session_factory() as session:
+            records = (await session.execute(stmt)).scalars().all()
+
+        return [ArchivedEvent(
+            task_id=record.task_id,
+            seq=record.seq,
+            event_id=record.event_id,
+            type=record.type,
+            data=record.data,
+            created_at=record.created_at,
+        ) for record in records]
+
+    async def list_tasks(self, before: Optional[Tuple[datetime, str]],
+                         limit: int) -> List[ArchivedTask]:
+        stmt = select(TaskArchiveModel)
+        if before is not None:
+            stmt = stmt.where(tuple_(
+                TaskArchiveModel.last_event_at, TaskArchiveModel.task_id,
+            ) < tuple_(*before))
+        stmt = stmt.order_by(
+            TaskArchiveModel.last_event_at.desc(),
+            TaskArchiveModel.task_id.desc(),
+        ).limit(limit)
+
+        async with self._postgres.session_factory() as session:
+            records = (await session.execute(stmt)).scalars().all()
+
+        return [ArchivedTask(
+            task_id=record.task_id,
+            first_event_at=record.first_event_at,
+            last_event_at=record.last_event_at,
+            event_count=record.event_count,
+            last_event_type=record.last_event_type,
+        ) for record in records]
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from functools import lru_cache
+from typing import Optional
+
+from app.application.errors.exceptions import ServerRequestError, \
+    ConflictError
+from app.domain.models.app_config import AppConfig
+from app.domain.repositories.app_config_repository import AppConfigRepository
+from app.infrastructure.repositories.file_app_config_repository import \
+    FileAppConfigRepository
+from app.infrastructure.storage.redis import get_redis
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_SAVE_SCRIPT = """
+if ARGV[2] ~= '' and redis.call('HGET', KEYS[1], 'version') ~= ARGV[2] then
+    return nil
+end
+redis.call('HSET', KEYS[1], 'data', ARGV[1])
+return redis.call('HINCRBY', KEYS[1], 'version', 1)
+"""
+
+
+class RedisAppConfigRepository(AppConfigRepository):
+    """基于 Redis 的共享应用配置仓库，多副本部署时所有节点读写同一份配置
+
+    - app:config          配置哈希，data为配置JSON，version为每次保存递增的版本号
+    - app:config:changed  配置变更频道，保存后发布新的版本号
+    每个进程在内存中保留一份配置，读取不访问Redis；收到变更通知后重新拉取，重新订阅时也会拉取一次，
+    避免断线期间漏掉通知。Redis中没有配置时使用本地配置文件初始化，配置被删除或版本回退(例如Redis被清空)时
+    重新初始化并以Redis中的配置为准。保存时校验基础版本，其他进程已修改配置时拒绝写入
+    """
+
+    _config_key = 'app:config'
+    _channel = 'app:config:changed'
+
+    def __init__(self):
+        self._redis = get_redis()
+        self._settings = get_settings()
+        self._config: Optional[AppConfig] = None
+        self._data: Optional[str] = None
+        self._version: int = 0
+        self._listener_task: Optional[asyncio.Task] = None
+
+    async def init(self) -> None:
+        if self._listener_task is not None:
+            logger.warning('Redis 应用配置仓库已初始化, 无需重复初始化')
+            return
+
+        await self._seed()
+        await self._refresh()
+        self._listener_task = asyncio.create_task(self._listen())
+        logger.info(f'Redis 应用配置仓库初始化成功，配置版本: {self._version}')
+
+    async def shutdown(self) -> None:
+        if self._listener_task is not None:
+            self._listener_task.cancel()
+            try:
+                await self._listener_task
+            except asyncio.CancelledError:
+                pass
+            self._listener_task = None
+            logger.info('Redis 应用配置仓库关闭成功')
+
+        get_redis_app_config_repository.cache_clear()
+
+    async def _seed(self) -> None:
+        """Redis中没有配置时写入本地配置文件中的配置，多个进程同时启动时只有一个写入成功"""
+        if await self._redis.client.hexists(self._config_key, 'data'):
+            return
+
+        app_config = FileAppConfigRepository(
+            config_path=self._settings.app_config_filepath).load()
+        # 配置与版本在同一个事务中写入，其他进程不会读到没有版本的配置
+        async with self._redis.client.pipeline(transaction=True) as pipe:
+            pipe.hsetnx(self._config_key, 'data', app_config.model_dump_json())
+            pipe.hsetnx(self._config_key, 'version', 1)
+            seeded, _ = await pipe.execute()
+        if seeded:
+            logger.info('Redis 中没有应用配置，已使用本地配置文件初始化')
+
+    async def _refresh(self) -> None:
+        data, version = await self._redis.client.hmget(
+            self._config_key, ['data', 'version'])
+        if data is None:
+            logger.warning('Redis 中的应用配置已被删除，重新初始化')
+            await self._seed()
+            data, version = await self._redis.client.hmget(
+                self._config_key, ['data', 'version'])
+            if data is None:
+                return
+
+        version = int(version or 0)
+        if version == self._version and data == self._data:
+            return
+        if version < self._version:
+            logger.warning(
+                f'应用配置版本从{self._version}回退到{version}，Redis中的配置可能已被重置')
+
+        self._config = AppConfig.model_validate_json(data)
+        self._data = data
+        self._version = version
+        logger.info(f'应用配置已更新，版本: {version}')
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub_client.pubsub()
+            try:
+                await pubsub.subscribe(self._channel)
+                await self._refresh()
+                async for message in pubsub.listen():
+                    # 版本回退时同样重新拉取
+                    if message.get('type') == 'message' and \
+                            int(message.get('data')) != self._version:
+                        await self._refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f'监听应用配置变更失败，稍后重试: {e}')
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def load(self) -> Optional[AppConfig]:
+        if self._config is None:
+            logger.error('Redis 应用配置仓库未初始化, 读取应用配置失败')
+            raise ServerRequestError('读取应用配置失败，请稍后重试')
+        return self._config
+
+    def get_version(self) -> int:
+        return self._version
+
+    async def save(self, app_config: AppConfig,
+                   base_version: Optional[int] = None):
+        data = app_config.model_dump_json()
+        try:
+            version = await self._redis.client.eval(
+                _SAVE_SCRIPT, 1, self._config_key, data,
+                '' if base_version is None else str(base_version))
+            if version is not None:
+                await self._redis.pubsub_client.publish(self._channel, version)
+        except Exception as e:
+            logger.error(f'写入应用配置失败: {e}')
+            raise ServerRequestError(f'写入应用配置失败，请稍后重试')
+
+        if version is None:
+            # 配置已被其他进程修改，拉取最新配置后由调用方重新修改
+            await self._refresh()
+            raise ConflictError('应用配置已被其他请求修改，请刷新后重试')
+
+        # 当前进程立即使用新配置，不等待变更通知
+        if version > self._version:
+            self._config = app_config
+            self._data = data
+            self._version = version
+
+
+@lru_cache()
+def get_redis_app_config_repository() -> RedisAppConfigRepository:
+    return RedisAppConfigRepository()
@@ -0,0 +1,198 @@
+import base64
+import hashlib
+import json
+import logging
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, List
+
+from app.domain.models.memory import Memory
+from app.domain.repositories.memory_repository import MemoryRepository
+from app.infrastructure.storage.redis import get_redis
+from app.infrastructure.storage.redis_keys import memory_key
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class RedisMemoryRepository(MemoryRepository):
+    """基于 Redis Stream 的追加式记忆仓库
+
+    - memory:log:{id}       追加日志，每条记录只保存消息内容的哈希引用
+    - memory:snapshot:{id}  周期快照，保存完整的消息哈希引用列表
+    - memory:blob:<hash>    按内容哈希去重存储的消息内容(超过阈值时压缩)
+    日志与快照以记忆ID作为哈希标签，可以在同一个事务中修改；内容分散在各个槽，
+    在事务之前单独写入，写入失败最多留下未被引用的内容。
+    内容不做引用计数，而是设置过期时间，每次保存或加载引用到内容时续期；
+    日志与快照在任务被回收时删除，只要过期时间大于任务的回收时间，仍被引用的内容就不会过期
+    """
+
+    _max_known_blobs = 4096
+
+    def __init__(self):
+        self._redis = get_redis()
+        self._settings = get_settings()
+        # 最近写入或续期过的内容哈希 -> 续期时间，续期未超过半个过期时间的内容不再重复写入
+        self._known_blobs: OrderedDict[str, float] = OrderedDict()
+
+    @classmethod
+    def _log_key(cls, memory_id: str) -> str:
+        return memory_key('log', memory_id)
+
+    @classmethod
+    def _snapshot_key(cls, memory_id: str) -> str:
+        return memory_key('snapshot', memory_id)
+
+    @classmethod
+    def _blob_key(cls, digest: str) -> str:
+        return f'memory:blob:{digest}'
+
+    def _encode_message(self, message: Dict[str, Any]) -> tuple[str, str]:
+        """将消息序列化并计算内容哈希，返回(哈希, 编码后内容)"""
+        raw = json.dumps(message, ensure_ascii=False, sort_keys=True,
+                         default=str).encode('utf-8')
+        digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+        if len(raw) >= self._settings.memory_compress_threshold:
+            payload = 'z:' + base64.b64encode(zlib.compress(raw)).decode()
+        else:
+            payload = 'j:' + raw.decode('utf-8')
+        return digest, payload
+
+    @classmethod
+    def _decode_message(cls, payload: str) -> Dict[str, Any]:
+        if payload.startswith('z:'):
+            return json.loads(zlib.decompress(base64.b64decode(payload[2:])))
+        return json.loads(payload[2:])
+
+    def _remember_blob(self, digest: str, refreshed_at: float) -> None:
+        self._known_blobs[digest] = refreshed_at
+        self._known_blobs.move_to_end(digest)
+        if len(self._known_blobs) > self._max_known_blobs:
+            self._known_blobs.popitem(last=False)
+
+    def _queue_blobs(self, pipe, messages: List[Dict[str, Any]],
+                     written: List[str]) -> List[str]:
+        """将消息内容写入管道并续期(近期已续期的内容跳过)，返回哈希引用列表"""
+        ttl = self._settings.memory_blob_ttl_seconds
+        fresh_after = time.monotonic() - ttl / 2
+        refs = []
+        for message in messages:
+            digest, payload = self._encode_message(message)
+            refreshed_at = self._known_blobs.get(digest)
+            if (refreshed_at is None or refreshed_at < fresh_after) and \
+                    digest not in written:
+                # 内容由哈希确定，覆盖写入等同于续期
+                pipe.set(self._blob_key(digest), payload, ex=ttl)
+                written.append(digest)
+            refs.append(digest)
+        return refs
+
+    async def _write_snapshot(self, memory_id: str, memory: Memory) -> None:
+        """重写快照并清空追加日志，后续日志均位于快照之后"""
+        written, refreshed_at = [], time.monotonic()
+        async with self._redis.client.pipeline(transaction=False) as pipe:
+            refs = self._queue_blobs(pipe, memory.get_messages(), written)
+            await pipe.execute()
+
+        async with self._redis.client.pipeline(transaction=True) as pipe:
+            pipe.delete(self._log_key(memory_id))
+            pipe.hset(self._snapshot_key(memory_id), mapping={
+                'refs': ','.join(refs),
+                'tail': 0,
+            })
+            await pipe.execute()
+
+        for digest in written:
+            self._remember_blob(digest, refreshed_at)
+
+        logger.debug(f'记忆[{memory_id}]写入快照，共{len(refs)}条消息')
+
+    async def load(self, memory_id: str) -> Memory:
+        async with self._redis.client.pipeline(transaction=True) as pipe:
+            pipe.hget(self._snapshot_key(memory_id), 'refs')
+            pipe.xrange(self._log_key(memory_id), '-', '+')
+            snapshot_refs, entries = await pipe.execute()
+
+        refs = snapshot_refs.split(',') if snapshot_refs else []
+        for _, entry in entries:
+            op = entry.get('op')
+            if op == 'add':
+                refs.extend(entry.get('refs', '').split(','))
+            elif op == 'rollback':
+                refs = refs[:-1]
+
+        memory = Memory()
+        if not refs:
+            return memory
+
+        digests = list(dict.fromkeys(refs))
+        ttl, refreshed_at = self._settings.memory_blob_ttl_seconds, \
+            time.monotonic()
+        async with self._redis.client.pipeline(transaction=False) as pipe:
+            for digest in digests:
+                pipe.getex(self._blob_key(digest), ex=ttl)
+            payloads = await pipe.execute()
+
+        contents = {}
+        for digest, payload in zip(digests, payloads):
+            if payload is None:
+                logger.error(f'记忆[{memory_id}]内容[{digest}]缺失，加载失败')
+                raise ValueError(f'记忆[{memory_id}]内容缺失')
+            contents[digest] = payload
+            self._remember_blob(digest, refreshed_at)
+
+        # 直接赋值消息列表，避免产生新的变更日志
+        memory.messages = [self._decode_message(contents[ref]) for ref in refs]
+        logger.debug(
+            f'加载记忆[{memory_id}]成功，快照+日志共{len(memory.messages)}条消息')
+        return memory
+
+    async def save(self, memory_id: str, memory: Memory) -> None:
+        changes = memory.pop_changes()
+        if not changes:
+            return
+
+        try:
+            if any(change['op'] == 'reset' for change in changes):
+                await self._write_snapshot(memory_id, memory)
+                return
+
+            written, refreshed_at = [], time.monotonic()
+            async with self._redis.client.pipeline(transaction=False) as pipe:
+                change_refs = [
+                    self._queue_blobs(pipe, change['messages'], written)
+                    if change['op'] == 'add' else None
+                    for change in changes
+                ]
+                await pipe.execute()
+
+            async with self._redis.client.pipeline(transaction=True) as pipe:
+                for change, refs in zip(changes, change_refs):
+                    if change['op'] == 'add':
+                        pipe.xadd(self._log_key(memory_id),
+                                  {'op': 'add', 'refs': ','.join(refs)})
+                    elif change['op'] == 'rollback':
+                        pipe.xadd(self._log_key(memory_id), {'op': 'rollback'})
+                pipe.hincrby(self._snapshot_key(memory_id), 'tail',
+                             len(changes))
+                results = await pipe.execute()
+        except Exception as e:
+            # 增量写入失败后日志已不可信，下次保存时整体重写快照
+            logger.error(f'保存记忆[{memory_id}]失败: {e}')
+            memory.mark_reset()
+            raise
+
+        for digest in written:
+            self._remember_blob(digest, refreshed_at)
+
+        # 日志长度超过快照间隔后重写快照，保证加载成本为 O(快照 + 日志尾部)
+        if results[-1] >= self._settings.memory_snapshot_interval:
+            await self._write_snapshot(memory_id, memory)
+
+    async def delete(self, memory_id: str) -> None:
+        """删除日志与快照，其引用的内容不再续期后自然过期"""
+        await self._redis.client.delete(
+            self._log_key(memory_id), self._snapshot_key(memory_id))
+        logger.info(f'记忆[{memory_id}]已删除')
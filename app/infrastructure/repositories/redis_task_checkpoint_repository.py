@@ -0,0 +1,55 @@
+import logging
+from typing import Optional, List
+
+from app.domain.models.task_checkpoint import TaskCheckpoint
+from app.domain.repositories.task_checkpoint_repository import \
+    TaskCheckpointRepository
+from app.infrastructure.storage.redis import get_redis
+from app.infrastructure.storage.redis_keys import task_key
+
+logger = logging.getLogger(__name__)
+
+
+class RedisTaskCheckpointRepository(TaskCheckpointRepository):
+    """基于 Redis 的任务检查点仓库，task:checkpoints 集合作为检查点索引"""
+
+    _index_key = 'task:checkpoints'
+
+    def __init__(self):
+        self._redis = get_redis()
+
+    @classmethod
+    def _checkpoint_key(cls, task_id: str) -> str:
+        return task_key('checkpoint', task_id)
+
+    async def get(self, task_id: str) -> Optional[TaskCheckpoint]:
+        data = await self._redis.client.get(self._checkpoint_key(task_id))
+        if not data:
+            return None
+
+        try:
+            return TaskCheckpoint.model_validate_json(data)
+        except Exception as e:
+            logger.error(f'解析任务[{task_id}]检查点失败: {e}')
+            return None
+
+    async def save(self, checkpoint: TaskCheckpoint) -> None:
+        # 检查点与全局索引位于不同的槽，不能放在同一个事务中，先写检查点再加入索引
+        async with self._redis.client.pipeline(transaction=False) as pipe:
+            pipe.set(self._checkpoint_key(checkpoint.task_id),
+                     checkpoint.model_dump_json())
+            pipe.sadd(self._index_key, checkpoint.task_id)
+            await pipe.execute()
+
+    async def delete(self, task_id: str) -> None:
+        async with self._redis.client.pipeline(transaction=False) as pipe:
+            pipe.delete(self._checkpoint_key(task_id))
+            pipe.srem(self._index_key, task_id)
+            await pipe.execute()
+
+    async def exists(self, task_id: str) -> bool:
+        return bool(await self._redis.client.exists(
+            self._checkpoint_key(task_id)))
+
+    async def list_task_ids(self) -> List[str]:
+        return list(await self._redis.client.smembers(self._index_key))
@@ -0,0 +1,43 @@
+import logging
+from typing import Optional
+
+from app.domain.models.task_snapshot import TaskSnapshot
+from app.domain.repositories.task_snapshot_repository import \
+    TaskSnapshotRepository
+from app.infrastructure.storage.redis import get_redis
+from app.infrastructure.storage.redis_keys import task_key
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class RedisTaskSnapshotRepository(TaskSnapshotRepository):
+    """基于 Redis 的任务状态快照仓库，快照与任务流保留相同的时长"""
+
+    def __init__(self):
+        self._redis = get_redis()
+        self._settings = get_settings()
+
+    @classmethod
+    def snapshot_key(cls, task_id: str) -> str:
+        return task_key('snapshot', task_id)
+
+    async def get(self, task_id: str) -> Optional[TaskSnapshot]:
+        data = await self._redis.client.get(self.snapshot_key(task_id))
+        if not data:
+            return None
+
+        try:
+            return TaskSnapshot.model_validate_json(data)
+        except Exception as e:
+            logger.error(f'解析任务[{task_id}]状态快照失败: {e}')
+            return None
+
+    async def save(self, snapshot: TaskSnapshot) -> None:
+        await self._redis.client.set(
+            self.snapshot_key(snapshot.task_id), snapshot.model_dump_json(),
+            ex=self._settings.task_stream_ttl_seconds,
+        )
+
+    async def delete(self, task_id: str) -> None:
+        await self._redis.client.delete(self.snapshot_key(task_id))
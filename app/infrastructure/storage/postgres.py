@@ -1,16 +1,44 @@
 import logging
+import time
 from typing import Optional
 from functools import lru_cache
 
-from sqlalchemy import text
+from sqlalchemy import text, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, \
     create_async_engine, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from app.domain.models.connection_pool import ConnectionPoolStats
 from core.config import get_settings
 
 logger = logging.getLogger(__name__)
 
 
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """记录获取连接耗时(含排队等待、新建连接与pre_ping)与超时次数的连接池"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_count += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
 class Postgres:
     def __init__(self):
         self._engine: Optional[AsyncEngine] = None
@@ -25,9 +53,26 @@ class Postgres:
         try:
             logger.debug(
                 f'Postgres 数据库 URI: {self._settings.sqlalchemy_database_uri}')
+            url = make_url(self._settings.sqlalchemy_database_uri)
+            connect_args = {}
+            if url.get_driver_name() == 'asyncpg':
+                # SQLAlchemy与asyncpg各自维护预编译语句缓存，
+                # 经过pgbouncer事务模式连接时需将缓存大小设为0
+                cache_size = self._settings.postgres_statement_cache_size
+                url = url.update_query_dict(
+                    {'prepared_statement_cache_size': str(cache_size)})
+                connect_args['statement_cache_size'] = cache_size
+
             self._engine = create_async_engine(
-                self._settings.sqlalchemy_database_uri,
-                echo=True if self._settings.env == 'development' else False,
+                url,
+                connect_args=connect_args,
+                echo=self._settings.postgres_echo,
+                poolclass=InstrumentedAsyncQueuePool,
+                pool_size=self._settings.postgres_pool_size,
+                max_overflow=self._settings.postgres_max_overflow,
+                pool_timeout=self._settings.postgres_pool_timeout,
+                pool_recycle=self._settings.postgres_pool_recycle,
+                pool_pre_ping=self._settings.postgres_pool_pre_ping,
             )
 
             self._session_factory = async_sessionmaker(
@@ -46,6 +91,30 @@ class Postgres:
             logger.error(f'初始化 Postgres 引擎失败: {e}')
             raise e
 
+    def pool_stats(self) -> ConnectionPoolStats:
+        """获取连接池统计信息，引擎未初始化时返回空统计"""
+        if self._engine is None:
+            return ConnectionPoolStats(service='postgres')
+
+        pool = self._engine.pool
+        capacity = pool.size() + max(pool._max_overflow, 0)
+        checked_out = pool.checkedout()
+        wait_count = getattr(pool, 'wait_count', 0)
+        return ConnectionPoolStats(
+            service='postgres',
+            pool_size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_out=checked_out,
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            saturation=round(checked_out / capacity, 4) if capacity else 0,
+            wait_count=wait_count,
+            avg_wait_ms=round(getattr(pool, 'wait_seconds_total', 0) * 1000 /
+                              wait_count, 3) if wait_count else 0,
+            max_wait_ms=round(getattr(pool, 'wait_seconds_max', 0) * 1000, 3),
+            timeouts=getattr(pool, 'timeouts', 0),
+        )
+
     async def shutdown(self):
         if self._engine is not None:
             await self._engine.dispose()
@@ -55,6 +124,12 @@ class Postgres:
 
         get_postgres.cache_clear()
 
+    @property
+    def engine(self) -> AsyncEngine:
+        if self._engine is None:
+            raise RuntimeError('Postgres 引擎未初始化, 获取引擎失败')
+        return self._engine
+
     @property
     def session_factory(self):
         if self._session_factory is None:
@@ -1,16 +1,73 @@
 import logging
+import time
 from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
 
-from redis.asyncio import Redis
+from redis.asyncio import Redis, BlockingConnectionPool
+from redis.asyncio.cluster import RedisCluster, ClusterNode
+from redis.crc import key_slot
+from redis.exceptions import ConnectionError
+from redis.utils import HIREDIS_AVAILABLE
 
+from app.domain.models.connection_pool import ConnectionPoolStats
 from core.config import get_settings, Settings
 
 logger = logging.getLogger(__name__)
 
 
+class InstrumentedBlockingConnectionPool(BlockingConnectionPool):
+    """记录获取连接耗时与超时次数的连接池，连接耗尽时排队等待而不是直接报错"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.timeouts = 0
+
+    async def get_connection(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().get_connection()
+        except ConnectionError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.wait_count += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def stats(self, service: str) -> ConnectionPoolStats:
+        checked_out = len(self._in_use_connections)
+        return ConnectionPoolStats(
+            service=service,
+            pool_size=self.max_connections,
+            checked_out=checked_out,
+            idle=len(self._available_connections),
+            saturation=round(checked_out / self.max_connections, 4),
+            wait_count=self.wait_count,
+            avg_wait_ms=round(self.wait_seconds_total * 1000 /
+                              self.wait_count, 3) if self.wait_count else 0,
+            max_wait_ms=round(self.wait_seconds_max * 1000, 3),
+            timeouts=self.timeouts,
+        )
+
+
 class RedisClient:
+    """Redis客户端，普通命令与阻塞读取(XREAD/XREADGROUP BLOCK)使用不同的连接池，
+    阻塞读取在整个阻塞时长内占用连接，分开后不会挤占XADD、锁等短命令的连接
+
+    开启redis_cluster后连接 Redis Cluster，各节点分别维护连接池。多键命令、事务与Lua脚本
+    只能访问同一个槽中的键，键名统一由redis_keys生成，需要跨槽读取多个键时调用方按key_slot分组
+    """
+
     def __init__(self):
-        self._client: Redis | None = None
+        self._client: Redis | RedisCluster | None = None
+        self._binary_client: Redis | RedisCluster | None = None
+        self._blocking_client: Redis | RedisCluster | None = None
+        self._blocking_binary_client: Redis | RedisCluster | None = None
+        self._pubsub_client: Redis | None = None
         self._settings: Settings = get_settings()
 
     async def init(self):
@@ -19,24 +76,161 @@ class RedisClient:
             return
 
         try:
-            self._client = Redis(
-                host=self._settings.redis_host,
-                port=self._settings.redis_port,
-                db=self._settings.redis_db,
-                password=self._settings.redis_password,
-                decode_responses=True,
-            )
+            self._client = self._create_client(decode_responses=True)
+            # 二进制安全的连接，用于读写经过编码/压缩的消息负载
+            self._binary_client = self._create_client(decode_responses=False)
+            self._blocking_client = self._create_client(
+                decode_responses=True, blocking=True)
+            self._blocking_binary_client = self._create_client(
+                decode_responses=False, blocking=True)
+
+            if self.cluster:
+                # 集群中PUBLISH会广播到所有节点，但订阅数只统计当前节点，发布与订阅固定使用同一个节点
+                host, port = self._cluster_nodes()[0]
+                self._pubsub_client = self._create_node_client(
+                    host, port, decode_responses=True, blocking=True)
+            else:
+                self._pubsub_client = self._blocking_client
 
             await self._client.ping()
-            logger.info('Redis 客户端初始化成功')
+            if self.cluster:
+                # 集群客户端在首次执行命令时加载槽映射，多个协程并发首次使用会相互干扰，启动时预先加载
+                for client in (self._binary_client, self._blocking_client,
+                               self._blocking_binary_client):
+                    await client.initialize()
+            # 安装hiredis(pip install .[hiredis])后redis-py自动使用其协议解析器
+            logger.info(f'Redis 客户端初始化成功，集群模式: {self.cluster}，'
+                        f'hiredis: {HIREDIS_AVAILABLE}')
         except Exception as e:
             logger.error(f'初始化 Redis 客户端失败: {e}')
             raise e
 
+    def _cluster_nodes(self) -> List[Tuple[str, int]]:
+        """集群初始节点，redis_cluster_nodes为空时使用redis_host/redis_port"""
+        nodes = []
+        for node in self._settings.redis_cluster_nodes:
+            host, _, port = node.rpartition(':')
+            nodes.append((host, int(port)))
+        return nodes or [(self._settings.redis_host, self._settings.redis_port)]
+
+    def _create_client(self, decode_responses: bool,
+                       blocking: bool = False) -> Redis | RedisCluster:
+        if self.cluster:
+            return self._create_cluster_client(decode_responses, blocking)
+        return self._create_node_client(
+            self._settings.redis_host, self._settings.redis_port,
+            decode_responses, blocking)
+
+    def _create_node_client(self, host: str, port: int,
+                            decode_responses: bool,
+                            blocking: bool = False) -> Redis:
+        settings = self._settings
+        pool = InstrumentedBlockingConnectionPool(
+            max_connections=settings.redis_blocking_max_connections
+            if blocking else settings.redis_max_connections,
+            timeout=settings.redis_pool_timeout,
+            host=host,
+            port=port,
+            db=0 if self.cluster else settings.redis_db,
+            password=settings.redis_password,
+            decode_responses=decode_responses,
+            # 阻塞读取的耗时由BLOCK参数决定，不设置读超时
+            socket_timeout=None if blocking else settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_connect_timeout,
+            health_check_interval=settings.redis_health_check_interval,
+        )
+        return Redis.from_pool(pool)
+
+    def _create_cluster_client(self, decode_responses: bool,
+                               blocking: bool = False) -> RedisCluster:
+        settings = self._settings
+        return RedisCluster(
+            startup_nodes=[ClusterNode(host, port)
+                           for host, port in self._cluster_nodes()],
+            # 集群客户端的连接数上限针对每个节点
+            max_connections=settings.redis_blocking_max_connections
+            if blocking else settings.redis_max_connections,
+            password=settings.redis_password,
+            decode_responses=decode_responses,
+            socket_timeout=None if blocking else settings.redis_socket_timeout,
+            socket_connect_timeout=settings.redis_socket_connect_timeout,
+            health_check_interval=settings.redis_health_check_interval,
+        )
+
+    @property
+    def cluster(self) -> bool:
+        return self._settings.redis_cluster
+
+    def key_slot(self, key: str) -> Optional[int]:
+        """获取键所在的槽，单机模式下所有键视为同一个槽返回None"""
+        if not self.cluster:
+            return None
+        return key_slot(key.encode())
+
+    def node_name(self, key: str) -> Optional[str]:
+        """获取键所在的集群节点(host:port)，单机模式下返回None"""
+        if not self.cluster:
+            return None
+        return self._client.get_node_from_key(key).name
+
+    @classmethod
+    def _node_connections(cls, node: ClusterNode) -> Tuple[int, int]:
+        """返回节点已创建与空闲的连接数；ClusterNode没有公开连接数，只能读取私有属性，
+        redis-py版本变化导致属性不存在时按0统计，不影响其他统计项"""
+        connections = getattr(node, '_connections', None)
+        free = getattr(node, '_free', None)
+        if connections is None or free is None:
+            return 0, 0
+        return len(connections), len(free)
+
+    @classmethod
+    def _cluster_stats(cls, service: str,
+                       client: RedisCluster) -> ConnectionPoolStats:
+        nodes = client.get_nodes()
+        pool_size = sum(getattr(node, 'max_connections', 0) for node in nodes)
+        connections = [cls._node_connections(node) for node in nodes]
+        idle = sum(free for _, free in connections)
+        checked_out = sum(total for total, _ in connections) - idle
+        return ConnectionPoolStats(
+            service=service,
+            pool_size=pool_size,
+            checked_out=checked_out,
+            idle=idle,
+            saturation=round(checked_out / pool_size, 4) if pool_size else 0,
+        )
+
+    def pool_stats(self) -> List[ConnectionPoolStats]:
+        """获取各连接池的统计信息，客户端未初始化时返回空列表，集群模式下汇总各节点的连接池"""
+        clients: Dict[str, Redis | RedisCluster | None] = {
+            'redis': self._client,
+            'redis-binary': self._binary_client,
+            'redis-blocking': self._blocking_client,
+            'redis-blocking-binary': self._blocking_binary_client,
+        }
+        if self.cluster:
+            clients['redis-pubsub'] = self._pubsub_client
+
+        stats = []
+        for service, client in clients.items():
+            if isinstance(client, RedisCluster):
+                stats.append(self._cluster_stats(service, client))
+            elif client is not None:
+                stats.append(client.connection_pool.stats(service))
+        return stats
+
     async def shutdown(self):
         if self._client is not None:
             await self._client.aclose()
+            await self._binary_client.aclose()
+            await self._blocking_client.aclose()
+            await self._blocking_binary_client.aclose()
+            if self.cluster:
+                await self._pubsub_client.aclose()
             self._client = None
+            self._binary_client = None
+            self._blocking_client = None
+            self._blocking_binary_client = None
+            self._pubsub_client = None
             logger.info('Redis 客户端关闭成功')
 
         get_redis.cache_clear()
@@ -47,6 +241,33 @@ class RedisClient:
             raise RuntimeError('Redis 客户端未初始化, 获取客户端失败')
         return self._client
 
+    @property
+    def binary_client(self):
+        if self._binary_client is None:
+            raise RuntimeError('Redis 客户端未初始化, 获取二进制客户端失败')
+        return self._binary_client
+
+    @property
+    def blocking_client(self):
+        """阻塞读取专用客户端"""
+        if self._blocking_client is None:
+            raise RuntimeError('Redis 客户端未初始化, 获取阻塞读取客户端失败')
+        return self._blocking_client
+
+    @property
+    def blocking_binary_client(self):
+        """二进制安全的阻塞读取专用客户端"""
+        if self._blocking_binary_client is None:
+            raise RuntimeError('Redis 客户端未初始化, 获取二进制阻塞读取客户端失败')
+        return self._blocking_binary_client
+
+    @property
+    def pubsub_client(self) -> Redis:
+        """发布与订阅频道使用的客户端，集群模式下固定连接一个节点"""
+        if self._pubsub_client is None:
+            raise RuntimeError('Redis 客户端未初始化, 获取发布订阅客户端失败')
+        return self._pubsub_client
+
 
 @lru_cache()
 def get_redis() -> RedisClient:
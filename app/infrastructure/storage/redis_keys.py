@@ -0,0 +1,33 @@
+"""Redis 键名
+
+Redis Cluster 按键名中第一对{}包裹的部分(哈希标签)计算槽，多键命令、事务与Lua脚本只能访问
+同一个槽中的键，所有需要一起访问的键在此统一命名:
+- 同一个任务的输入/输出流、租约、快照、检查点以任务ID作为哈希标签
+- 同一个记忆的追加日志与快照以记忆ID作为哈希标签
+- 调度器状态与作业队列被同一个Lua脚本访问，共用{scheduler}哈希标签
+其余全局键(任务登记表、索引等)只被单键命令访问
+"""
+import re
+
+_HASH_TAG_PATTERN = re.compile(r'{([^{}]+)}')
+
+
+def task_key(kind: str, task_id: str) -> str:
+    """任务相关的键，形如task:output:{task_id}"""
+    return f'task:{kind}:{{{task_id}}}'
+
+
+def task_id_from_key(key: str) -> str:
+    """从task_key生成的键名中解析任务ID"""
+    match = _HASH_TAG_PATTERN.search(key)
+    return match.group(1) if match else key.rsplit(':', 1)[-1]
+
+
+def memory_key(kind: str, memory_id: str) -> str:
+    """记忆相关的键，形如memory:log:{memory_id}"""
+    return f'memory:{kind}:{{{memory_id}}}'
+
+
+def scheduler_key(name: str) -> str:
+    """调度器与作业队列的键，形如task:{scheduler}:queue"""
+    return f'task:{{scheduler}}:{name}'
@@ -1,7 +1,8 @@
 import logging
 from typing import Optional, Dict
 
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, Header
+from fastapi import Response as HTTPResponse
 
 from app.interfaces.schemas.app_config import ListMCPServerResponse
 from app.interfaces.schemas.base import Response
@@ -14,15 +15,48 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix='/app-config', tags=['设置模块'])
 
 
+def _config_etag(version: int) -> str:
+    return f'"{version:x}"'
+
+
+def _is_not_modified(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+
+async def _check_etag(
+        app_config_service: AppConfigService,
+        if_none_match: Optional[str],
+        http_response: HTTPResponse,
+) -> Optional[HTTPResponse]:
+    """以配置版本作为ETag，客户端缓存的版本未变化时返回304响应"""
+    etag = _config_etag(await app_config_service.get_version())
+    if _is_not_modified(if_none_match, etag):
+        return HTTPResponse(status_code=304, headers={'ETag': etag})
+    http_response.headers['ETag'] = etag
+    http_response.headers['Cache-Control'] = 'no-cache'
+    return None
+
+
 @router.get(
     '/llm',
     response_model=Response[LLMConfig],
     summary='获取 LLM 配置',
-    description='包含LLM供应商的base_url、temperature、model_name、max_tokens等'
+    description='包含LLM供应商的base_url、temperature、model_name、max_tokens等，'
+                '响应携带ETag，通过If-None-Match请求头校验缓存，配置未变化时返回304'
 )
-async def get_llm_config(app_config_service: AppConfigService = Depends(
-    get_app_config_service)
-) -> Response[LLMConfig]:
+async def get_llm_config(
+        http_response: HTTPResponse,
+        if_none_match: Optional[str] = Header(default=None),
+        app_config_service: AppConfigService = Depends(get_app_config_service)
+) -> Response[LLMConfig] | HTTPResponse:
+    not_modified = await _check_etag(app_config_service, if_none_match,
+                                     http_response)
+    if not_modified is not None:
+        return not_modified
+
     llm_config = await app_config_service.get_llm_config()
     return Response.success(data=llm_config.model_dump(exclude={'api_key'}))
 
@@ -49,11 +83,19 @@ async def update_llm_config(
     '/agent',
     response_model=Response[AgentConfig],
     summary='获取 Agent 配置',
-    description='包含最大迭代次数、最大重试次数、最大搜索结果数'
+    description='包含最大迭代次数、最大重试次数、最大搜索结果数，'
+                '响应携带ETag，通过If-None-Match请求头校验缓存，配置未变化时返回304'
 )
-async def get_angent_config(app_config_service: AppConfigService = Depends(
-    get_app_config_service)
-) -> Response[AgentConfig]:
+async def get_angent_config(
+        http_response: HTTPResponse,
+        if_none_match: Optional[str] = Header(default=None),
+        app_config_service: AppConfigService = Depends(get_app_config_service)
+) -> Response[AgentConfig] | HTTPResponse:
+    not_modified = await _check_etag(app_config_service, if_none_match,
+                                     http_response)
+    if not_modified is not None:
+        return not_modified
+
     agent_config = await app_config_service.get_agent_config()
     return Response.success(data=agent_config.model_dump())
 
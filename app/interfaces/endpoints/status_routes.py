@@ -4,9 +4,14 @@ from typing import List
 from fastapi import APIRouter, Depends
 
 from app.application.services.status_service import StatusService
+from app.application.services.task_service import TaskService
 from app.interfaces.schemas import Response
+from app.domain.models.connection_pool import ConnectionPoolStats
 from app.domain.models.health_status import HealthStatus
-from app.interfaces.service_dependencies import get_status_service
+from app.domain.models.task_queue import TaskQueueStats, \
+    StreamConsumerStats
+from app.interfaces.service_dependencies import get_status_service, \
+    get_task_service
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/status", tags=["状态模块"])
@@ -26,3 +31,40 @@ async def get_status(
     if any(s.status == 'error' for s in status):
         return Response.fail(503, '系统存在服务异常', status)
     return Response.success(status, '系统所有服务正常')
+
+
+@router.get(
+    path='/pools',
+    response_model=Response[List[ConnectionPoolStats]],
+    summary='连接池状态',
+    description='获取当前进程中postgresql、redis(普通命令与阻塞读取)等连接池的借出连接数、超额连接数、获取连接耗时与超时次数，用于规划连接池大小与发现连接池饱和',
+)
+async def get_pool_status(
+        status_service: StatusService = Depends(get_status_service),
+) -> Response[List[ConnectionPoolStats]]:
+    return Response.success(status_service.get_pool_stats())
+
+
+@router.get(
+    path='/task-queue',
+    response_model=Response[TaskQueueStats],
+    summary='任务队列状态',
+    description='获取任务作业队列的长度、未确认数量、未领取数量等信息，可作为Worker扩缩容指标',
+)
+async def get_task_queue_status(
+        task_service: TaskService = Depends(get_task_service),
+) -> Response[TaskQueueStats]:
+    stats = await task_service.get_queue_stats()
+    return Response.success(stats)
+
+
+@router.get(
+    path='/stream-consumers',
+    response_model=Response[List[StreamConsumerStats]],
+    summary='任务事件订阅者状态',
+    description='获取当前进程中各任务事件订阅者(SSE/WebSocket)的落后毫秒数、流控窗口积压与合并事件数量，按落后程度降序排列',
+)
+async def get_stream_consumers_status(
+        task_service: TaskService = Depends(get_task_service),
+) -> Response[List[StreamConsumerStats]]:
+    return Response.success(task_service.get_consumer_stats())
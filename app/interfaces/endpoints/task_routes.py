@@ -0,0 +1,195 @@
+import asyncio
+import logging
+from typing import Optional, Dict, AsyncIterator, Literal
+
+from fastapi import APIRouter, Depends, Header, WebSocket, Query
+from fastapi.responses import StreamingResponse
+
+from app.application.services.task_service import TaskService
+from app.domain.models.message import Message
+from app.domain.models.task_history import TaskEventPage, TaskHistoryPage
+from app.domain.models.task_snapshot import TaskSnapshot
+from app.domain.services.event_delta import event_type
+from app.domain.services.event_flow_control import EventFlowController
+from app.interfaces.schemas.base import Response
+from app.interfaces.schemas.task import CreateTaskResponse
+from app.interfaces.endpoints.task_websocket import TaskWebSocketSession
+from app.interfaces.service_dependencies import get_task_service
+from core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix='/tasks', tags=['任务模块'])
+
+
+@router.post(
+    '',
+    response_model=Response[CreateTaskResponse],
+    summary='创建任务',
+    description='传递用户消息创建 Agent 任务，任务按租户加权公平排队，出队后由 Worker 执行；排队已满时返回429'
+)
+async def create_task(
+        message: Message,
+        tenant_id: str = Header(default='default', alias='X-Tenant-ID'),
+        task_service: TaskService = Depends(get_task_service)
+) -> Response[CreateTaskResponse]:
+    task_id = await task_service.create_task(message, tenant_id)
+    return Response.success(
+        msg='创建任务成功',
+        data=CreateTaskResponse(task_id=task_id)
+    )
+
+
+@router.post(
+    '/{task_id}/messages',
+    response_model=Response[Optional[Dict]],
+    summary='向任务发送消息',
+    description='向已有任务发送用户消息(例如回复Agent的提问)，并唤醒任务继续执行'
+)
+async def send_message(
+        task_id: str,
+        message: Message,
+        task_service: TaskService = Depends(get_task_service)
+) -> Response[Optional[Dict]]:
+    await task_service.send_message(task_id, message)
+    return Response.success(msg='发送消息成功')
+
+
+@router.post(
+    '/{task_id}/cancel',
+    response_model=Response[Optional[Dict]],
+    summary='取消任务',
+    description='取消指定任务，任务运行在其他进程/节点时会将取消请求投递给该进程'
+)
+async def cancel_task(
+        task_id: str,
+        task_service: TaskService = Depends(get_task_service)
+) -> Response[Optional[Dict]]:
+    cancelled = await task_service.cancel_task(task_id)
+    return Response.success(
+        msg='取消任务成功' if cancelled else '任务当前未在运行',
+        data={'cancelled': cancelled}
+    )
+
+
+@router.get(
+    '/{task_id}/snapshot',
+    response_model=Response[TaskSnapshot],
+    summary='获取任务状态快照',
+    description='获取任务当前的计划、步骤状态、最近消息与等待状态，客户端重连时先读取快照，再从快照的last_event_id订阅后续事件'
+)
+async def get_snapshot(
+        task_id: str,
+        task_service: TaskService = Depends(get_task_service)
+) -> Response[TaskSnapshot]:
+    snapshot = await task_service.get_snapshot(task_id)
+    return Response.success(msg='获取任务状态快照成功', data=snapshot)
+
+
+@router.get(
+    '/history',
+    response_model=Response[TaskHistoryPage],
+    summary='历史任务列表',
+    description='按最后活跃时间倒序分页列出已归档的任务，下一页传递上一页返回的next_cursor；未开启归档或task_backend=memory时返回400'
+)
+async def list_task_history(
+        cursor: Optional[str] = None,
+        limit: int = Query(default=20, ge=1, le=100),
+        task_service: TaskService = Depends(get_task_service)
+) -> Response[TaskHistoryPage]:
+    page = await task_service.list_task_history(cursor, limit)
+    return Response.success(msg='获取历史任务成功', data=page)
+
+
+@router.get(
+    '/{task_id}/history',
+    response_model=Response[TaskEventPage],
+    summary='任务历史事件',
+    description='按事件顺序分页查询已归档的任务事件，下一页传递上一页返回的next_seq作为after_seq；未开启归档或task_backend=memory时返回400'
+)
+async def get_event_history(
+        task_id: str,
+        after_seq: Optional[int] = None,
+        limit: int = Query(default=100, ge=1, le=1000),
+        task_service: TaskService = Depends(get_task_service)
+) -> Response[TaskEventPage]:
+    page = await task_service.get_event_history(task_id, after_seq, limit)
+    return Response.success(msg='获取任务历史事件成功', data=page)
+
+
+_TERMINAL_EVENT_TYPES = ('done', 'cancel', 'error')
+
+
+async def _sse_frames(events: EventFlowController) -> AsyncIterator[str]:
+    """将事件编码为SSE帧，流控窗口中积压的事件合并为一次写出，空闲时发送心跳注释；
+    任务结束、出错或被取消后关闭流，客户端继续对话时携带Last-Event-ID重新订阅"""
+    heartbeat_seconds = get_settings().sse_heartbeat_seconds
+    try:
+        while True:
+            try:
+                batch = await asyncio.wait_for(events.get_batch(),
+                                               heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield ': ping\n\n'
+                continue
+
+            if not batch:
+                break
+
+            # 事件在输出流中已是JSON，直接写出无需再次序列化，写到终止事件为止
+            frames = []
+            finished = False
+            for event_id, data in batch:
+                frames.append(f'id: {event_id}\ndata: {data}\n\n')
+                if event_type(data) in _TERMINAL_EVENT_TYPES:
+                    finished = True
+                    break
+            yield ''.join(frames)
+            if finished:
+                break
+    finally:
+        events.close()
+
+
+@router.get(
+    '/{task_id}/events',
+    summary='订阅任务事件',
+    description='以SSE方式推送任务输出流中的事件，事件ID为流ID，断线重连时通过Last-Event-ID请求头(或last_event_id参数)只补发错过的事件；'
+                'mode=delta时直接推送计划增量事件(需配合快照中的plan_version使用)，默认推送完整事件；任务结束、出错或取消后服务端关闭流'
+)
+async def stream_events(
+        task_id: str,
+        last_event_id: Optional[str] = None,
+        mode: Literal['full', 'delta'] = 'full',
+        last_event_id_header: Optional[str] = Header(
+            default=None, alias='Last-Event-ID'),
+        task_service: TaskService = Depends(get_task_service)
+) -> StreamingResponse:
+    events = await task_service.stream_events(
+        task_id, last_event_id_header or last_event_id, mode)
+    return StreamingResponse(
+        _sse_frames(events),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
+
+@router.websocket('/ws')
+async def task_websocket(
+        websocket: WebSocket,
+        binary: bool = False,
+        task_service: TaskService = Depends(get_task_service)
+) -> None:
+    """在一条WebSocket连接上订阅多个任务的事件并发送用户消息/取消指令
+
+    客户端指令为JSON文本帧，如 {"action": "subscribe", "task_id": "...", "last_event_id": "..."}，
+    action可选 subscribe/unsubscribe/message/cancel；binary=true时服务端以zlib压缩的二进制帧推送
+    """
+    settings = get_settings()
+    session = TaskWebSocketSession(
+        websocket, task_service,
+        send_queue_size=settings.ws_send_queue_size,
+        policy=settings.ws_slow_consumer_policy,
+        binary=binary,
+    )
+    await session.run()
@@ -0,0 +1,166 @@
+import asyncio
+import json
+import logging
+import zlib
+from collections import deque
+from typing import Dict, Optional, Literal, Tuple, Deque
+
+from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from app.application.errors.exceptions import AppException
+from app.application.services.task_service import TaskService
+from app.domain.services.event_flow_control import EventFlowController
+from app.interfaces.schemas.task import TaskWebSocketCommand
+
+logger = logging.getLogger(__name__)
+
+SlowConsumerPolicy = Literal['coalesce', 'drop']
+
+
+class _FrameQueue:
+    """连接级的有界发送队列，帧按放入顺序发送
+
+    - coalesce: 事件帧队列满时订阅方等待，由订阅的流控窗口合并被取代的事件
+    - drop: 事件帧队列满时丢弃新帧，由调用方通知客户端从最后入队的事件ID重新订阅
+    控制帧单独计数，同样最多maxsize条，满时等待发送循环腾出空间
+    """
+
+    def __init__(self, maxsize: int, policy: SlowConsumerPolicy):
+        self._maxsize = maxsize
+        self._policy = policy
+        self._frames: Deque[Tuple[bool, str]] = deque()
+        self._sizes = {True: 0, False: 0}
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+
+    async def put(self, frame: str, control: bool = False) -> bool:
+        """放入帧，drop策略下事件帧队列已满时返回False"""
+        while self._sizes[control] >= self._maxsize:
+            if not control and self._policy == 'drop':
+                return False
+            self._space.clear()
+            await self._space.wait()
+
+        self._frames.append((control, frame))
+        self._sizes[control] += 1
+        self._ready.set()
+        return True
+
+    async def get(self) -> str:
+        while not self._frames:
+            self._ready.clear()
+            await self._ready.wait()
+
+        control, frame = self._frames.popleft()
+        self._sizes[control] -= 1
+        self._space.set()
+        return frame
+
+
+class TaskWebSocketSession:
+    """任务WebSocket会话，在一条连接上复用多个任务的订阅、用户输入与取消"""
+
+    def __init__(self, websocket: WebSocket, task_service: TaskService,
+                 send_queue_size: int, policy: SlowConsumerPolicy,
+                 binary: bool = False):
+        self._websocket = websocket
+        self._task_service = task_service
+        self._policy = policy
+        self._binary = binary
+        self._queue = _FrameQueue(send_queue_size, policy)
+        self._subscriptions: Dict[str, asyncio.Task] = {}
+
+    @classmethod
+    def _control_frame(cls, frame_type: str, task_id: Optional[str],
+                       **kwargs) -> str:
+        return json.dumps({'type': frame_type, 'task_id': task_id, **kwargs},
+                          ensure_ascii=False)
+
+    async def _reply(self, frame_type: str, task_id: Optional[str], **kwargs):
+        await self._queue.put(
+            self._control_frame(frame_type, task_id, **kwargs), control=True)
+
+    async def _pump(self, task_id: str, last_event_id: Optional[str],
+                    events: EventFlowController) -> None:
+        task_id_json = json.dumps(task_id)
+        try:
+            async for event_id, data in events:
+                # 事件在输出流中已是JSON，直接拼接为帧无需再次序列化
+                frame = f'{{"type":"event","task_id":{task_id_json},' \
+                        f'"event_id":"{event_id}","data":{data}}}'
+                if not await self._queue.put(frame):
+                    await self._reply('dropped', task_id,
+                                      last_event_id=last_event_id,
+                                      msg='客户端消费过慢，订阅已停止，请从last_event_id之后重新订阅')
+                    break
+                last_event_id = event_id
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f'推送任务[{task_id}]事件失败: {e}')
+            await self._reply('error', task_id, msg='推送任务事件失败')
+        finally:
+            # 丢弃帧后跳出循环时迭代器不会被关闭，需显式停止流控窗口的拉取
+            events.close()
+            if self._subscriptions.get(task_id) is asyncio.current_task():
+                del self._subscriptions[task_id]
+
+    async def _handle(self, command: TaskWebSocketCommand) -> None:
+        task_id = command.task_id
+        if command.action == 'subscribe':
+            if task_id in self._subscriptions:
+                self._subscriptions.pop(task_id).cancel()
+            events = await self._task_service.stream_events(
+                task_id, command.last_event_id, command.mode)
+            self._subscriptions[task_id] = asyncio.create_task(
+                self._pump(task_id, command.last_event_id, events))
+        elif command.action == 'unsubscribe':
+            subscription = self._subscriptions.pop(task_id, None)
+            if subscription is not None:
+                subscription.cancel()
+        elif command.action == 'message':
+            if command.message is None:
+                raise AppException(msg='message指令缺少用户消息')
+            await self._task_service.send_message(task_id, command.message)
+        elif command.action == 'cancel':
+            await self._task_service.cancel_task(task_id)
+
+        await self._reply('ack', task_id, action=command.action)
+
+    async def _send_loop(self) -> None:
+        while True:
+            frame = await self._queue.get()
+            if self._binary:
+                await self._websocket.send_bytes(
+                    zlib.compress(frame.encode('utf-8')))
+            else:
+                await self._websocket.send_text(frame)
+
+    async def run(self) -> None:
+        await self._websocket.accept()
+        send_task = asyncio.create_task(self._send_loop())
+        try:
+            while True:
+                raw = await self._websocket.receive_text()
+                try:
+                    await self._handle(
+                        TaskWebSocketCommand.model_validate_json(raw))
+                except ValidationError as e:
+                    await self._reply('error', None, msg=f'指令格式错误: {e}')
+                except AppException as e:
+                    await self._reply('error', json.loads(raw).get('task_id'),
+                                      msg=e.msg)
+        except WebSocketDisconnect:
+            logger.info('任务WebSocket连接已断开')
+        finally:
+            for subscription in self._subscriptions.values():
+                subscription.cancel()
+            send_task.cancel()
+            try:
+                await send_task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                # 发送循环可能已因连接关闭先行退出
+                logger.info(f'任务WebSocket发送循环已结束: {e}')
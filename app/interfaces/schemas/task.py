@@ -0,0 +1,21 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from app.domain.models.message import Message
+
+
+class CreateTaskResponse(BaseModel):
+    """创建任务响应"""
+    task_id: str = ''
+
+
+class TaskWebSocketCommand(BaseModel):
+    """WebSocket客户端指令，同一连接可以操作多个任务"""
+    action: Literal['subscribe', 'unsubscribe', 'message', 'cancel']
+    task_id: str
+    last_event_id: Optional[str] = Field(
+        default=None, description='subscribe时从该事件ID之后开始推送')
+    mode: Literal['full', 'delta'] = 'full'
+    message: Optional[Message] = Field(
+        default=None, description='message指令发送给任务的用户消息')
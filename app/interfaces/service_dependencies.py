@@ -6,12 +6,46 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.application.services.app_config_service import AppConfigService
 from app.application.services.status_service import StatusService
+from app.application.services.task_service import TaskService
+from app.domain.repositories.app_config_repository import AppConfigRepository
+from app.domain.services.tools.mcp import MCPSessionPool
 from app.infrastructure.external.health_checker.postgres_health_checker import \
     PostgresHealthChecker
 from app.infrastructure.external.health_checker.redis_health_checker import \
     RedisHealthChecker
+from app.infrastructure.external.json_parser.repair_json_parser import \
+    RepairJSONParser
+from app.infrastructure.external.llm.openai_llm import OpenAILLM
+from app.infrastructure.external.pool_monitor.postgres_pool_monitor import \
+    PostgresPoolMonitor
+from app.infrastructure.external.pool_monitor.redis_pool_monitor import \
+    RedisPoolMonitor
+from app.infrastructure.external.search.bing_search import BingSearchEngine
+from app.infrastructure.external.task.in_memory_task import InMemoryTask
+from app.infrastructure.external.task.redis_stream_task import \
+    RedisStreamTask
+from app.infrastructure.external.task.redis_stream_task_queue import \
+    RedisStreamTaskQueue
+from app.infrastructure.external.task.redis_task_scheduler import \
+    RedisTaskScheduler
 from app.infrastructure.repositories.file_app_config_repository import \
     FileAppConfigRepository
+from app.infrastructure.repositories.redis_app_config_repository import \
+    get_redis_app_config_repository
+from app.infrastructure.repositories.postgres_task_event_archive_repository import \
+    PostgresTaskEventArchiveRepository
+from app.infrastructure.repositories.in_memory_memory_repository import \
+    InMemoryMemoryRepository
+from app.infrastructure.repositories.in_memory_task_checkpoint_repository import \
+    InMemoryTaskCheckpointRepository
+from app.infrastructure.repositories.in_memory_task_snapshot_repository import \
+    InMemoryTaskSnapshotRepository
+from app.infrastructure.repositories.redis_memory_repository import \
+    RedisMemoryRepository
+from app.infrastructure.repositories.redis_task_checkpoint_repository import \
+    RedisTaskCheckpointRepository
+from app.infrastructure.repositories.redis_task_snapshot_repository import \
+    RedisTaskSnapshotRepository
 from app.infrastructure.storage.postgres import get_db_session
 from app.infrastructure.storage.redis import RedisClient, get_redis
 from core.config import Settings
@@ -20,13 +54,40 @@ logger = logging.getLogger(__name__)
 settings = Settings()
 
 
+def redis_enabled() -> bool:
+    """单机模式且应用配置不存储在Redis时，进程无需连接Redis"""
+    return settings.task_backend != 'memory' or \
+        settings.app_config_backend == 'redis'
+
+
+@lru_cache()
+def get_app_config_repository() -> AppConfigRepository:
+    # 配置服务与任务服务共用同一个实例，共享解析后的配置缓存
+    if settings.app_config_backend == 'redis':
+        return get_redis_app_config_repository()
+    return FileAppConfigRepository(
+        config_path=settings.app_config_filepath,
+        check_interval=settings.app_config_check_interval,
+    )
+
+
+@lru_cache()
+def get_mcp_session_pool() -> MCPSessionPool:
+    # 配置接口与进程内执行的任务共用MCP会话
+    return MCPSessionPool(
+        ping_interval=settings.mcp_ping_interval_seconds,
+        connect_timeout=settings.mcp_connect_timeout_seconds,
+        max_backoff=settings.mcp_reconnect_max_backoff_seconds,
+    )
+
+
 @lru_cache()
 def get_app_config_service() -> AppConfigService:
     logger.info('加载获取 AppConfigService 实例')
-    file_app_config_repository = FileAppConfigRepository(
-        config_path=settings.app_config_filepath
+    return AppConfigService(
+        app_config_repository=get_app_config_repository(),
+        mcp_session_pool=get_mcp_session_pool(),
     )
-    return AppConfigService(app_config_repository=file_app_config_repository)
 
 
 @lru_cache()
@@ -34,6 +95,49 @@ def get_status_service(
         db_session: AsyncSession = Depends(get_db_session),
         redis_client: RedisClient = Depends(get_redis),
 ) -> StatusService:
-    postgres_checker = PostgresHealthChecker(session=db_session)
-    redis_checker = RedisHealthChecker(redis_client=redis_client)
-    return StatusService(checkers=[postgres_checker, redis_checker])
+    checkers = [PostgresHealthChecker(session=db_session)]
+    pool_monitors = [PostgresPoolMonitor()]
+    if redis_enabled():
+        checkers.append(RedisHealthChecker(redis_client=redis_client))
+        pool_monitors.append(RedisPoolMonitor())
+    return StatusService(checkers=checkers, pool_monitors=pool_monitors)
+
+
+@lru_cache()
+def get_task_service() -> TaskService:
+    logger.info('加载获取 TaskService 实例')
+    if settings.task_backend == 'memory':
+        # 单机模式：任务在API进程内执行，事件流与任务状态均保存在进程内，不依赖Redis；
+        # 没有归档器，历史记录接口返回未开启归档
+        return TaskService(
+            app_config_repository=get_app_config_repository(),
+            memory_repository=InMemoryMemoryRepository(),
+            checkpoint_repository=InMemoryTaskCheckpointRepository(),
+            snapshot_repository=InMemoryTaskSnapshotRepository(),
+            json_parser=RepairJSONParser(),
+            search_engine=BingSearchEngine(),
+            llm_factory=OpenAILLM,
+            task_cls=InMemoryTask,
+            event_delta_encoding=settings.event_delta_encoding,
+            output_window=settings.task_output_window,
+            mcp_session_pool=get_mcp_session_pool(),
+        )
+
+    event_archive_repository = PostgresTaskEventArchiveRepository() \
+        if settings.task_event_archive_enabled else None
+    return TaskService(
+        app_config_repository=get_app_config_repository(),
+        memory_repository=RedisMemoryRepository(),
+        checkpoint_repository=RedisTaskCheckpointRepository(),
+        snapshot_repository=RedisTaskSnapshotRepository(),
+        json_parser=RepairJSONParser(),
+        search_engine=BingSearchEngine(),
+        llm_factory=OpenAILLM,
+        task_cls=RedisStreamTask,
+        task_queue=RedisStreamTaskQueue(),
+        task_scheduler=RedisTaskScheduler(),
+        event_delta_encoding=settings.event_delta_encoding,
+        output_window=settings.task_output_window,
+        event_archive_repository=event_archive_repository,
+        mcp_session_pool=get_mcp_session_pool(),
+    )
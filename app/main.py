@@ -1,3 +1,4 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 
@@ -11,6 +12,16 @@ from app.interfaces.errors.exception_handlers import \
 from app.infrastructure.storage.redis import get_redis
 from app.infrastructure.storage.postgres import get_postgres
 from app.infrastructure.storage.cos import get_cos
+from app.infrastructure.external.task.redis_task_registry import \
+    get_task_registry
+from app.infrastructure.external.message_queue.redis_stream_multiplexer import \
+    get_stream_multiplexer
+from app.infrastructure.external.task.in_memory_task_sweeper import \
+    InMemoryTaskSweeper
+from app.infrastructure.repositories.redis_app_config_repository import \
+    get_redis_app_config_repository
+from app.interfaces.service_dependencies import get_mcp_session_pool, \
+    redis_enabled
 
 from core.config import get_settings
 
@@ -25,17 +36,40 @@ openapi_tags = [
     {
         'name': '状态模块',
         'description': '包含 **状态监控** 等 API 接口，用于监控系统的运行状态。',
+    },
+    {
+        'name': '任务模块',
+        'description': '包含 **任务创建、取消** 等 API 接口，用于管理 Agent 任务。',
     }
 ]
 
 
+async def _sweep_in_memory_tasks() -> None:
+    """单机模式下定期回收进程内已结束的过期任务"""
+    sweeper = InMemoryTaskSweeper()
+    while True:
+        await asyncio.sleep(settings.task_sweep_interval_seconds)
+        try:
+            await sweeper.sweep()
+        except Exception as e:
+            logger.error(f'清理过期任务失败: {e}')
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info('Janus-Manus API 正在初始化')
 
-    await get_redis().init()
+    if redis_enabled():
+        await get_redis().init()
     await get_postgres().init()
     await get_cos().init()
+    if settings.task_backend != 'memory':
+        await get_task_registry().init()
+    if settings.app_config_backend == 'redis':
+        await get_redis_app_config_repository().init()
+
+    sweep_task = asyncio.create_task(_sweep_in_memory_tasks()) \
+        if settings.task_backend == 'memory' else None
 
     try:
         yield
@@ -43,6 +77,14 @@ async def lifespan(app: FastAPI):
         logger.error(f'Janus-Manus API 初始化失败: {e}')
 
     finally:
+        if sweep_task is not None:
+            sweep_task.cancel()
+            await asyncio.gather(sweep_task, return_exceptions=True)
+        await get_stream_multiplexer().shutdown()
+        await get_mcp_session_pool().shutdown()
+        if settings.app_config_backend == 'redis':
+            await get_redis_app_config_repository().shutdown()
+        await get_task_registry().shutdown()
         await get_redis().shutdown()
         await get_postgres().shutdown()
         await get_cos().shutdown()
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import signal
+from typing import Dict
+
+from app.infrastructure.logging import setup_logging
+from app.infrastructure.storage.redis import get_redis
+from app.infrastructure.storage.postgres import get_postgres
+from app.infrastructure.external.task.redis_task_registry import \
+    get_task_registry
+from app.infrastructure.external.task.redis_stream_task_queue import \
+    RedisStreamTaskQueue
+from app.infrastructure.external.task.redis_task_sweeper import \
+    RedisTaskSweeper
+from app.infrastructure.external.task.redis_task_event_archiver import \
+    RedisTaskEventArchiver
+from app.infrastructure.repositories.postgres_task_event_archive_repository import \
+    PostgresTaskEventArchiveRepository
+from app.infrastructure.repositories.redis_app_config_repository import \
+    get_redis_app_config_repository
+from app.interfaces.service_dependencies import get_task_service, \
+    get_mcp_session_pool
+
+from core.config import get_settings
+
+settings = get_settings()
+setup_logging()
+
+logger = logging.getLogger()
+
+
+class TaskWorker:
+    """Agent任务Worker，从作业队列领取任务并发执行，与API进程分开部署和扩缩容"""
+
+    def __init__(self, concurrency: int):
+        self._concurrency = concurrency
+        self._task_service = get_task_service()
+        self._task_queue = RedisStreamTaskQueue()
+        self._task_sweeper = RedisTaskSweeper()
+        self._running: Dict[str, asyncio.Task] = {}
+        self._running_tasks: Dict[str, str] = {}
+        self._stopping = asyncio.Event()
+        self._released = asyncio.Event()
+
+    def stop(self) -> None:
+        logger.info('Janus-Manus Worker 收到停止信号，不再领取新任务')
+        self._stopping.set()
+
+    async def _run_job(self, job_id: str, task_id: str) -> None:
+        try:
+            # 认领的作业的配额可能已因心跳超时被回收，执行前重新确认占用
+            await self._task_service.acquire_task(task_id)
+            await self._task_service.run_task(task_id)
+        except asyncio.CancelledError:
+            # 取消经task.wait()中断任务执行并等待其结束，之后才关闭Redis连接；
+            # Worker退出时不确认作业也不释放配额，由其他Worker认领后从检查点恢复
+            logger.info(f'Worker退出，任务{task_id}的作业[{job_id}]未确认')
+            raise
+        except Exception as e:
+            logger.error(f'执行任务{task_id}失败: {e}')
+
+        # 任务因Worker退出被中断时同样不确认作业
+        if self._stopping.is_set():
+            return
+        await self._task_queue.ack(job_id)
+        await self._release(task_id)
+
+    async def _release(self, task_id: str) -> None:
+        try:
+            await self._task_service.release_task(task_id)
+        except Exception as e:
+            logger.error(f'释放任务{task_id}的调度配额失败: {e}')
+        # 有配额被释放，立即唤醒调度循环
+        self._released.set()
+
+    async def _heartbeat(self) -> None:
+        interval = settings.task_job_claim_idle_ms / 1000 / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._task_queue.heartbeat(list(self._running.keys()))
+                await self._task_service.heartbeat_tasks(
+                    list(self._running_tasks.values()))
+            except Exception as e:
+                logger.error(f'刷新作业心跳失败: {e}')
+
+    async def _sweep(self) -> None:
+        while True:
+            await asyncio.sleep(settings.task_sweep_interval_seconds)
+            try:
+                await self._task_sweeper.sweep()
+            except Exception as e:
+                logger.error(f'清理过期任务失败: {e}')
+
+    async def _archive(self) -> None:
+        """事件归档循环，所有Worker均可执行，同一时刻只有持有归档器租约的Worker归档"""
+        repository = PostgresTaskEventArchiveRepository()
+        archiver = RedisTaskEventArchiver(repository)
+        initialized = False
+
+        interval = settings.task_event_archive_interval_ms / 1000
+        while True:
+            try:
+                if not initialized:
+                    await repository.init()
+                    initialized = True
+                await archiver.archive()
+            except Exception as e:
+                logger.error(f'归档任务事件失败: {e}')
+            await asyncio.sleep(interval)
+
+    async def _dispatch(self) -> None:
+        """调度循环，所有Worker均可执行，调度脚本在Redis中原子执行"""
+        interval = settings.task_dispatch_interval_ms / 1000
+        while True:
+            # 调度前清除，调度期间释放的配额会在下一轮立即调度
+            self._released.clear()
+            try:
+                await self._task_service.dispatch_tasks()
+            except Exception as e:
+                logger.error(f'调度排队任务失败: {e}')
+
+            try:
+                await asyncio.wait_for(self._released.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _recover(self) -> None:
+        while True:
+            try:
+                await self._task_service.recover_tasks()
+            except Exception as e:
+                logger.error(f'恢复遗留任务失败: {e}')
+            await asyncio.sleep(settings.task_recovery_interval_seconds)
+
+    def _on_job_done(self, job_id: str):
+        def callback(_):
+            self._running.pop(job_id, None)
+            self._running_tasks.pop(job_id, None)
+
+        return callback
+
+    async def run(self) -> None:
+        background_tasks = [
+            asyncio.create_task(self._heartbeat()),
+            asyncio.create_task(self._recover()),
+            asyncio.create_task(self._dispatch()),
+            asyncio.create_task(self._sweep()),
+        ]
+        if settings.task_event_archive_enabled:
+            background_tasks.append(asyncio.create_task(self._archive()))
+
+        try:
+            while not self._stopping.is_set():
+                free_slots = self._concurrency - len(self._running)
+                if free_slots <= 0:
+                    await asyncio.wait(self._running.values(),
+                                       return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                try:
+                    jobs = await self._task_queue.dequeue(
+                        free_slots, block_ms=settings.task_queue_block_ms)
+                except Exception as e:
+                    logger.error(f'领取任务作业失败: {e}')
+                    await asyncio.sleep(1)
+                    continue
+
+                for job_id, task_id in jobs:
+                    job = asyncio.create_task(self._run_job(job_id, task_id))
+                    self._running[job_id] = job
+                    self._running_tasks[job_id] = task_id
+                    job.add_done_callback(self._on_job_done(job_id))
+        finally:
+            for task in [*background_tasks, *self._running.values()]:
+                task.cancel()
+            await asyncio.gather(*background_tasks, *self._running.values(),
+                                 return_exceptions=True)
+
+
+async def main():
+    logger.info('Janus-Manus Worker 正在初始化')
+
+    await get_redis().init()
+    if settings.task_event_archive_enabled:
+        await get_postgres().init()
+    await get_task_registry().init()
+    if settings.app_config_backend == 'redis':
+        await get_redis_app_config_repository().init()
+
+    worker = TaskWorker(concurrency=settings.worker_concurrency)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        logger.info(f'Janus-Manus Worker 启动成功，并发数: {settings.worker_concurrency}')
+        await worker.run()
+    finally:
+        await get_mcp_session_pool().shutdown()
+        if settings.app_config_backend == 'redis':
+            await get_redis_app_config_repository().shutdown()
+        await get_task_registry().shutdown()
+        await get_redis().shutdown()
+        if settings.task_event_archive_enabled:
+            await get_postgres().shutdown()
+        logger.info('Janus-Manus Worker 已关闭')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Dict, List, Optional, Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -7,13 +8,77 @@ class Settings(BaseSettings):
     env: str = 'development'
     log_level: str = 'INFO'
     app_config_filepath: str = 'config.yaml'
+    app_config_check_interval: float = 1.0
+    app_config_backend: Literal['file', 'redis'] = 'file'
+    mcp_ping_interval_seconds: float = 30
+    mcp_connect_timeout_seconds: float = 30
+    mcp_reconnect_max_backoff_seconds: float = 60
 
     sqlalchemy_database_uri: str = ''
+    postgres_pool_size: int = 10
+    postgres_max_overflow: int = 10
+    postgres_pool_timeout: float = 30
+    postgres_pool_recycle: int = 1800
+    postgres_pool_pre_ping: bool = True
+    postgres_echo: bool = False
+    postgres_statement_cache_size: int = 100
 
     redis_host: str = 'localhost'
     redis_port: int = 6379
     redis_db: int = 0
     redis_password: str | None = None
+    redis_cluster: bool = False
+    redis_cluster_nodes: List[str] = []
+    redis_max_connections: int = 50
+    redis_blocking_max_connections: int = 100
+    redis_pool_timeout: float = 5
+    redis_socket_timeout: float | None = 10
+    redis_socket_connect_timeout: float = 5
+    redis_health_check_interval: int = 30
+
+    memory_snapshot_interval: int = 50
+    memory_compress_threshold: int = 1024
+    memory_blob_ttl_seconds: int = 7 * 86400
+
+    task_lease_ttl_seconds: int = 30
+    llm_timeout_seconds: float = 600
+
+    worker_concurrency: int = 4
+    task_queue_block_ms: int = 5000
+    task_job_claim_idle_ms: int = 60000
+    task_recovery_interval_seconds: int = 60
+
+    message_queue_batch_size: int = 100
+    message_queue_block_ms: int = 5000
+    message_queue_claim_idle_ms: int = 60000
+    message_queue_max_length: int = 10000
+    message_queue_retention_seconds: int = 0
+    message_queue_codec: str = 'json'
+    stream_multiplexer_block_ms: int = 500
+    stream_multiplexer_queue_size: int = 1000
+    stream_multiplexer_max_blocking_readers: int = 50
+    stream_multiplexer_poll_ms: int = 100
+    message_queue_compress_threshold: int = 1024
+    message_queue_zstd_dict_path: Optional[str] = None
+
+    task_backend: str = 'redis'
+    sse_heartbeat_seconds: int = 15
+    event_delta_encoding: bool = False
+    ws_send_queue_size: int = 1000
+    task_output_window: int = 1000
+    ws_slow_consumer_policy: Literal['coalesce', 'drop'] = 'coalesce'
+    task_stream_ttl_seconds: int = 86400
+    task_sweep_interval_seconds: int = 300
+    task_event_archive_enabled: bool = False
+    task_event_archive_interval_ms: int = 1000
+    task_event_archive_batch_size: int = 1000
+
+    task_max_concurrency: int = 32
+    task_max_queue_length: int = 500
+    task_tenant_max_concurrency: int = 8
+    task_tenant_tokens_per_minute: int = 0
+    task_tenant_weights: Dict[str, float] = {}
+    task_dispatch_interval_ms: int = 200
 
     cos_secret_id: str = ''
     cos_secret_key: str = ''
@@ -0,0 +1,26 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.domain.models.task_history import ArchivedEvent, ArchivedTask
+
+
+def test_seq_from_event_id_keeps_stream_order():
+    ids = ['1700000000000-0', '1700000000000-1', '1700000000000-999',
+           '1700000000001-0']
+    seqs = [ArchivedEvent.seq_from_event_id(event_id) for event_id in ids]
+    assert seqs == sorted(seqs)
+    assert ArchivedEvent.seq_from_event_id('1700000000000') == seqs[0]
+    assert ArchivedEvent.seq_to_ms(seqs[2]) == 1700000000000
+
+
+def test_history_cursor_round_trip():
+    last_event_at = datetime(2025, 1, 2, 3, 4, 5, 678000, timezone.utc)
+    task = ArchivedTask(task_id='t|1', first_event_at=last_event_at,
+                        last_event_at=last_event_at)
+    assert ArchivedTask.parse_cursor(task.cursor) == (last_event_at, 't|1')
+
+
+def test_invalid_history_cursor():
+    with pytest.raises(ValueError):
+        ArchivedTask.parse_cursor('bm9wZQ==')
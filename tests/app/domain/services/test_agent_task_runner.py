@@ -0,0 +1,76 @@
+import asyncio
+
+from app.domain.models.app_config import AgentConfig, McpConfig
+from app.domain.models.event import CancelEvent
+from app.domain.models.message import Message
+from app.domain.models.task_checkpoint import TaskCheckpoint
+from app.domain.services.agent_task_runner import AgentTaskRunner
+from app.domain.services.event_delta import parse_event
+from app.domain.services.tools.mcp import MCPSessionPool
+from app.infrastructure.external.task.in_memory_task import InMemoryTask
+from app.infrastructure.repositories.in_memory_memory_repository import \
+    InMemoryMemoryRepository
+from app.infrastructure.repositories.in_memory_task_checkpoint_repository \
+    import InMemoryTaskCheckpointRepository
+from app.infrastructure.repositories.in_memory_task_snapshot_repository \
+    import InMemoryTaskSnapshotRepository
+
+
+class BlockingLLM:
+    model_name = 'stub'
+    temperature = 0
+    max_tokens = 1024
+
+    def __init__(self):
+        self.called = asyncio.Event()
+
+    async def invoke(self, messages, tools=None, response_format=None,
+                     tool_choice=None):
+        self.called.set()
+        await asyncio.sleep(10)
+
+
+class StubSearchEngine:
+    async def invoke(self, query, date_range=None):
+        raise NotImplementedError
+
+
+class StubJSONParser:
+    async def invoke(self, text, default_value=None):
+        return default_value
+
+
+def test_cancel_emits_cancel_event_and_deletes_checkpoint():
+    async def main():
+        llm = BlockingLLM()
+        checkpoints = InMemoryTaskCheckpointRepository()
+        runner = AgentTaskRunner(
+            llm=llm,
+            agent_config=AgentConfig(),
+            mcp_config=McpConfig(),
+            mcp_session_pool=MCPSessionPool(),
+            json_parser=StubJSONParser(),
+            search_engine=StubSearchEngine(),
+            memory_repository=InMemoryMemoryRepository(),
+            checkpoint_repository=checkpoints,
+            snapshot_repository=InMemoryTaskSnapshotRepository(),
+        )
+        task = InMemoryTask.create(runner)
+        await task.input_stream.put(Message(message='hi').model_dump_json())
+        await task.invoke()
+        await llm.called.wait()
+
+        # 运行器在取消请求删除检查点之后又写入了检查点
+        await checkpoints.save(TaskCheckpoint(
+            task_id=task.id, message=Message(message='hi')))
+        assert await task.cancel()
+        await task.wait()
+
+        events = [parse_event(data) for _, data in
+                  await task.output_stream.get_batch(count=100)]
+        assert isinstance(events[-1], CancelEvent)
+        assert await checkpoints.get(task.id) is None
+
+        await InMemoryTask.destroy(task.id)
+
+    asyncio.run(main())
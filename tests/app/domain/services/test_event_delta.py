@@ -0,0 +1,84 @@
+from app.domain.models.event import PlanEvent, PlanEventStatus, \
+    PlanDeltaEvent, ToolEvent, ToolEventStatus, ErrorEvent
+from app.domain.models.plan import Plan, Step, ExecutionStatus
+from app.domain.services.event_delta import EventDeltaEncoder, \
+    EventDeltaDecoder, parse_event, event_type
+
+
+def _round_trip(encoder, decoder, event):
+    encoded = parse_event(encoder.encode(event).model_dump_json())
+    return encoded, decoder.decode(encoded)
+
+
+def test_plan_updates_are_encoded_as_deltas():
+    encoder, decoder = EventDeltaEncoder(snapshot_interval=5), \
+        EventDeltaDecoder()
+    plan = Plan(title='t', steps=[Step(description=f's{i}') for i in range(20)])
+
+    encoded, decoded = _round_trip(
+        encoder, decoder, PlanEvent(plan=plan, status=PlanEventStatus.CREATED))
+    assert isinstance(encoded, PlanEvent) and encoded.version == 1
+
+    plan.steps[0].status = ExecutionStatus.COMPLETED
+    plan.steps.append(Step(description='extra'))
+    encoded, decoded = _round_trip(
+        encoder, decoder, PlanEvent(plan=plan, status=PlanEventStatus.UPDATED))
+
+    assert isinstance(encoded, PlanDeltaEvent)
+    assert (encoded.base_version, encoded.version) == (1, 2)
+    assert len(encoded.model_dump_json()) < len(plan.model_dump_json()) / 4
+    assert isinstance(decoded, PlanEvent)
+    assert decoded.plan == plan
+
+    plan.steps.pop(0)
+    _, decoded = _round_trip(
+        encoder, decoder, PlanEvent(plan=plan, status=PlanEventStatus.UPDATED))
+    assert decoded.plan == plan
+
+
+def test_full_plan_is_sent_periodically():
+    encoder = EventDeltaEncoder(snapshot_interval=3)
+    plan = Plan(steps=[Step()])
+
+    types = []
+    for _ in range(7):
+        plan.message += 'x'
+        types.append(encoder.encode(PlanEvent(
+            plan=plan, status=PlanEventStatus.UPDATED)).type)
+
+    assert types == ['plan', 'plan_delta', 'plan_delta', 'plan',
+                     'plan_delta', 'plan_delta', 'plan']
+
+
+def test_delta_without_base_is_skipped():
+    decoder = EventDeltaDecoder()
+    delta = PlanDeltaEvent(plan_id='p', version=3, base_version=2)
+
+    assert decoder.decode(delta) is None
+
+
+def test_called_event_references_calling_event():
+    encoder, decoder = EventDeltaEncoder(), EventDeltaDecoder()
+    args = {'query': 'redis streams'}
+    calling = ToolEvent(tool_call_id='c1', tool_name='search',
+                        function_name='search', function_args=args)
+    called = ToolEvent(tool_call_id='c1', tool_name='search',
+                       function_name='search', function_args=args,
+                       status=ToolEventStatus.CALLED)
+
+    _round_trip(encoder, decoder, calling)
+    encoded, decoded = _round_trip(encoder, decoder, called)
+
+    assert encoded.function_args == {}
+    assert encoded.calling_event_id == calling.id
+    assert decoded.function_args == args
+
+
+def test_event_type_reads_type_field_without_full_parse():
+    assert event_type(ErrorEvent(error='x').model_dump_json()) == 'error'
+    # 参数中嵌套的type字段不影响结果
+    tool = ToolEvent(tool_call_id='c1', tool_name='t', function_name='f',
+                     function_args={'type': 'plan'})
+    assert event_type(tool.model_dump_json()) == 'tool'
+    # 非模型序列化的JSON退回完整解析
+    assert event_type('{"id": "1", "type": "done"}') == 'done'
@@ -0,0 +1,97 @@
+import asyncio
+
+from app.domain.models.event import PlanEvent, PlanEventStatus, MessageEvent, \
+    QueueEvent
+from app.domain.models.plan import Plan, Step
+from app.domain.services.event_delta import EventDeltaEncoder, \
+    EventDeltaDecoder, parse_event
+from app.domain.services.event_flow_control import EventFlowController, \
+    is_stream_id
+
+
+async def _source(events):
+    for event_id, data in events:
+        yield event_id, data
+        await asyncio.sleep(0)
+
+
+def _delta_stream(plan_versions: int):
+    encoder = EventDeltaEncoder(snapshot_interval=100)
+    plan = Plan(title='t', steps=[Step(description='s')])
+    events = [encoder.encode(PlanEvent(plan=plan,
+                                       status=PlanEventStatus.CREATED))]
+    for index in range(1, plan_versions):
+        plan.message = f'm{index}'
+        events.append(encoder.encode(PlanEvent(
+            plan=plan, status=PlanEventStatus.UPDATED)))
+        events.append(MessageEvent(message=f'msg{index}'))
+        events.append(QueueEvent(position=index))
+    return plan, [(f'{1000 + i}-0', event.model_dump_json())
+                  for i, event in enumerate(events)]
+
+
+def test_lagging_consumer_receives_coalesced_events():
+    async def main():
+        plan, events = _delta_stream(10)
+        controller = EventFlowController('t1', _source(events), window=100)
+        await controller._wait()
+        while controller._pump_task and not controller._finished:
+            await asyncio.sleep(0)
+
+        # 首条计划已被合并移到末尾，最早未取走的是第一条消息事件(1002-0)
+        assert controller.lag_ms == len(events) - 1 - 2
+        batch = await controller.get_batch()
+
+        # 计划与增量合并为一条完整计划，排队位置只保留最新一条，其余事件不受影响
+        types = [parse_event(data).type for _, data in batch]
+        assert types.count('plan') == 1 and 'plan_delta' not in types
+        assert types.count('queue') == 1 and types.count('message') == 9
+        assert controller.coalesced == 9 + 8
+
+        event_ids = [event_id for event_id, _ in batch]
+        assert event_ids == sorted(event_ids)
+
+        decoder = EventDeltaDecoder()
+        merged = [parse_event(data) for _, data in batch
+                  if parse_event(data).type == 'plan'][0]
+        assert decoder.decode(merged).plan == plan
+        assert merged.version == 10
+
+    asyncio.run(main())
+
+
+def test_fast_consumer_receives_every_event():
+    async def main():
+        _, events = _delta_stream(5)
+        controller = EventFlowController('t1', _source(events), window=2)
+        received = [event async for event in controller]
+
+        assert received == events
+        assert controller.coalesced == 0
+
+    asyncio.run(main())
+
+
+def test_is_stream_id():
+    assert is_stream_id('0')
+    assert is_stream_id('1700000000000-3')
+    assert not is_stream_id('$')
+    assert not is_stream_id('abc-1')
+    assert not is_stream_id('1-2-3')
+
+
+def test_lag_grows_while_pump_is_blocked():
+    async def main():
+        events = [(f'{1000 + i}-0', MessageEvent(message=f'm{i}')
+                   .model_dump_json()) for i in range(5)]
+        controller = EventFlowController('t1', _source(events), window=2)
+        await controller._wait()
+        while controller._blocked_at is None:
+            await asyncio.sleep(0)
+
+        lag = controller.lag_ms
+        await asyncio.sleep(0.05)
+        assert controller.lag_ms >= lag + 40
+        controller.close()
+
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+import asyncio
+
+from app.domain.models.app_config import McpConfig, MCPServerConfig, \
+    MCPTransport
+from app.domain.services.tools.mcp import MCPSessionPool
+
+
+def _server(command: str, enabled: bool = True) -> MCPServerConfig:
+    # 命令不存在，连接立即失败，不依赖真实的MCP服务
+    return MCPServerConfig(transport=MCPTransport.STDIO,
+                           command=f'/nonexistent/{command}', enabled=enabled)
+
+
+class StubSession:
+    async def send_ping(self):
+        return None
+
+
+def test_sync_adjusts_connections_incrementally():
+    async def main():
+        pool = MCPSessionPool(connect_timeout=5)
+        config = McpConfig(mcpServers={'a': _server('a'), 'b': _server('b')})
+        await pool.sync(config)
+        await pool.wait_ready()
+        a, b = pool._connections['a'], pool._connections['b']
+        assert not a.connected and a.error
+
+        # 同一个配置对象不做任何调整
+        await pool.sync(config)
+        assert pool._connections['b'] is b
+
+        await pool.sync(McpConfig(mcpServers={
+            'a': _server('a'),
+            'b': _server('b2'),
+            'c': _server('c'),
+            'd': _server('d', enabled=False),
+        }))
+        assert set(pool._connections) == {'a', 'b', 'c'}
+        assert pool._connections['a'] is a
+        assert pool._connections['b'] is not b
+
+        await pool.sync(McpConfig(mcpServers={'c': _server('c')}))
+        assert set(pool._connections) == {'c'}
+
+        await pool.shutdown()
+        assert pool._connections == {}
+
+    asyncio.run(main())
+
+
+def test_backoff_resets_only_after_successful_ping():
+    async def main():
+        pool = MCPSessionPool(connect_timeout=5)
+        await pool.sync(McpConfig(mcpServers={'a': _server('a')}))
+        await pool.wait_ready()
+        connection = pool._connections['a']
+        assert connection._failures == 1
+
+        connection._ping_interval = 0.01
+        keepalive = asyncio.create_task(connection._keepalive(StubSession()))
+        await asyncio.sleep(0.05)
+        assert connection._failures == 0
+
+        await pool.shutdown()
+        await keepalive
+
+    asyncio.run(main())
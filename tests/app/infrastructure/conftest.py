@@ -0,0 +1,47 @@
+import pytest
+import redis
+
+from app.infrastructure.external.message_queue.redis_stream_multiplexer import \
+    get_stream_multiplexer
+from app.infrastructure.external.task.redis_task_registry import \
+    get_task_registry
+from app.infrastructure.storage.redis import get_redis
+from core.config import get_settings
+
+# 依赖Redis的测试使用独立的库，测试前后清空
+_TEST_REDIS_DB = 15
+
+
+@pytest.fixture
+def redis_db(monkeypatch):
+    """切换到测试用的Redis库，Redis不可达或开启集群模式时跳过测试
+
+    测试在asyncio.run中自行调用get_redis().init()与shutdown()
+    """
+    settings = get_settings()
+    if settings.redis_cluster:
+        pytest.skip('集群模式下无法切换Redis库')
+
+    client = redis.Redis(host=settings.redis_host, port=settings.redis_port,
+                         db=_TEST_REDIS_DB, password=settings.redis_password,
+                         socket_connect_timeout=1)
+    try:
+        client.ping()
+    except redis.exceptions.ConnectionError:
+        client.close()
+        pytest.skip('Redis不可达')
+
+    client.flushdb()
+    monkeypatch.setattr(settings, 'redis_db', _TEST_REDIS_DB)
+    _clear_singletons()
+    yield client
+
+    client.flushdb()
+    client.close()
+    _clear_singletons()
+
+
+def _clear_singletons():
+    # 单例在创建时绑定Redis客户端与事件循环，测试之间不能复用
+    for cached in (get_redis, get_task_registry, get_stream_multiplexer):
+        cached.cache_clear()
@@ -0,0 +1,100 @@
+import asyncio
+import uuid
+
+from app.infrastructure.external.message_queue.in_memory_message_queue import \
+    InMemoryMessageQueue
+from core.config import get_settings
+
+
+def _queue() -> InMemoryMessageQueue:
+    return InMemoryMessageQueue(f'test:{uuid.uuid4()}')
+
+
+def test_put_and_get_in_order():
+    async def run():
+        queue = _queue()
+        ids = await queue.put_batch(['a', 'b', 'c'])
+
+        assert ids == sorted(ids, key=lambda i: tuple(map(int, i.split('-'))))
+        assert await queue.get() == (ids[0], 'a')
+        assert await queue.get(start_id=ids[0]) == (ids[1], 'b')
+        assert await queue.get_batch(start_id=ids[0], count=5) == [
+            (ids[1], 'b'), (ids[2], 'c')]
+        assert await queue.get(start_id=ids[2]) == (None, None)
+
+    asyncio.run(run())
+
+
+def test_get_blocks_until_put():
+    async def run():
+        queue = _queue()
+        reader = asyncio.create_task(queue.get(block_ms=1000))
+        await asyncio.sleep(0)
+        message_id = await queue.put('hello')
+
+        assert await reader == (message_id, 'hello')
+        assert await queue.get(start_id=message_id, block_ms=10) == (None, None)
+
+    asyncio.run(run())
+
+
+def test_pop_and_ack():
+    async def run():
+        queue = _queue()
+        await queue.put_batch(['a', 'b'])
+
+        first_id, first = await queue.pop()
+        second_id, second = await queue.pop()
+        assert (first, second) == ('a', 'b')
+        assert await queue.pop() == (None, None)
+
+        await queue.ack(first_id)
+        await queue.ack(second_id)
+        assert await queue.is_empty()
+
+    asyncio.run(run())
+
+
+def test_subscribe_yields_batches():
+    async def run():
+        queue = _queue()
+        await queue.put_batch([str(i) for i in range(10)])
+
+        received = []
+        async for _, data in queue.subscribe(batch_size=3):
+            received.append(data)
+            if len(received) == 10:
+                break
+
+        assert received == [str(i) for i in range(10)]
+
+    asyncio.run(run())
+
+
+def test_reads_do_not_recreate_deleted_stream():
+    async def run():
+        queue = _queue()
+        await queue.put('a')
+        InMemoryMessageQueue.delete(queue._stream_name)
+
+        assert await queue.get(block_ms=10) == (None, None)
+        assert await queue.size() == 0
+        assert await queue.pop() == (None, None)
+        assert queue._stream_name not in InMemoryMessageQueue._streams
+        assert queue._stream_name not in InMemoryMessageQueue._waiters
+
+    asyncio.run(run())
+
+
+def test_only_trimmed_streams_are_capped(monkeypatch):
+    async def run():
+        monkeypatch.setattr(get_settings(), 'message_queue_max_length', 3)
+        output, input_ = InMemoryMessageQueue(f'test:{uuid.uuid4()}',
+                                              trim=True), _queue()
+        await output.put_batch([str(i) for i in range(5)])
+        await input_.put_batch([str(i) for i in range(5)])
+
+        assert await output.size() == 3
+        assert await input_.size() == 5
+
+    asyncio.run(run())
@@ -0,0 +1,27 @@
+import pytest
+
+from app.infrastructure.external.message_queue.payload_codec import \
+    MsgpackPayloadCodec, PayloadCodec
+
+pytest.importorskip('msgpack')
+
+
+def test_msgpack_round_trip():
+    codec = MsgpackPayloadCodec(compress_threshold=64)
+    small = '{"type":"message","message":"hi"}'
+    large = '{"type":"message","message":"%s"}' % ('x' * 256)
+
+    for message in (small, large):
+        payload = codec.encode(message)
+        assert payload[:1] != b'{'
+        assert codec.decode(payload) == message
+
+
+def test_msgpack_falls_back_to_text():
+    codec = MsgpackPayloadCodec()
+
+    # 非JSON文本与超出64位的整数按原文存储，默认编解码器也能读取
+    for message in ('not json', '{"value":%d}' % 2 ** 70):
+        payload = codec.encode(message)
+        assert payload == message.encode('utf-8')
+        assert PayloadCodec().decode(payload) == message
@@ -0,0 +1,40 @@
+import asyncio
+
+from app.infrastructure.external.message_queue.redis_stream_message_queue \
+    import RedisStreamMessageQueue
+from app.infrastructure.storage.redis import get_redis
+
+
+def _queue(consumer_name: str) -> RedisStreamMessageQueue:
+    queue = RedisStreamMessageQueue('queue', consumer_name=consumer_name)
+    queue._settings = queue._settings.model_copy(
+        update={'message_queue_claim_idle_ms': 100})
+    return queue
+
+
+def test_pop_reclaims_messages_of_stopped_reader(redis_db):
+    async def run():
+        await get_redis().init()
+        try:
+            stopped, reader = _queue('stopped'), _queue('reader')
+            await stopped.put_batch(['a', 'b'])
+
+            # 取出消息的读取方停止后不再确认
+            message_id, data = await stopped.pop()
+            assert data == 'a'
+
+            # 消息空闲时间未达到claim_idle_ms前不会被其他读取方认领
+            assert (await reader.pop())[1] == 'b'
+            assert await reader.pop() == (None, None)
+
+            await asyncio.sleep(0.15)
+            assert await reader.pop() == (message_id, 'a')
+
+            await reader.ack(message_id)
+            assert await reader.size() == 1
+            await asyncio.sleep(0.15)
+            assert (await reader.pop())[1] == 'b'
+        finally:
+            await get_redis().shutdown()
+
+    asyncio.run(run())
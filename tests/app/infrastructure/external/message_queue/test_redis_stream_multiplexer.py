@@ -0,0 +1,86 @@
+import asyncio
+
+from redis.crc import key_slot
+
+from app.infrastructure.external.message_queue.redis_stream_message_queue \
+    import RedisStreamMessageQueue
+from app.infrastructure.external.message_queue.redis_stream_multiplexer \
+    import RedisStreamMultiplexer
+from app.infrastructure.storage.redis import get_redis
+
+
+def _multiplexer(**settings) -> RedisStreamMultiplexer:
+    multiplexer = RedisStreamMultiplexer()
+    multiplexer._settings = multiplexer._settings.model_copy(update=settings)
+    return multiplexer
+
+
+async def _take(events, count: int) -> list:
+    received = []
+    async for _, data in events:
+        received.append(data)
+        if len(received) == count:
+            return received
+
+
+def test_slots_over_reader_cap_are_polled(redis_db):
+    async def run():
+        redis = get_redis()
+        await redis.init()
+        # 单机Redis上模拟集群：每个流按键计算槽，所有槽位于同一个节点
+        redis.key_slot = lambda key: key_slot(key.encode())
+        redis.node_name = lambda key: 'node'
+        multiplexer = _multiplexer(stream_multiplexer_max_blocking_readers=1,
+                                   stream_multiplexer_block_ms=50,
+                                   stream_multiplexer_poll_ms=20)
+        try:
+            streams = ['stream:{a}', 'stream:{b}']
+            consumers = [asyncio.create_task(
+                _take(multiplexer.subscribe(stream_name), 2))
+                for stream_name in streams]
+            await asyncio.sleep(0.1)
+
+            # 节点上只有一个槽阻塞读取，另一个槽由轮询协程读取
+            assert len(multiplexer._readers) == 1
+            assert len(multiplexer._polled['node']) == 1
+            assert 'node' in multiplexer._pollers
+
+            for i in range(2):
+                for stream_name in streams:
+                    await RedisStreamMessageQueue(stream_name).put(
+                        f'{stream_name}-{i}')
+            results = await asyncio.wait_for(asyncio.gather(*consumers), 5)
+            assert results == [[f'{stream_name}-{i}' for i in range(2)]
+                               for stream_name in streams]
+        finally:
+            await multiplexer.shutdown()
+            await redis.shutdown()
+
+    asyncio.run(run())
+
+
+def test_overflowed_subscriber_rereads_from_stream(redis_db):
+    async def run():
+        await get_redis().init()
+        multiplexer = _multiplexer(stream_multiplexer_queue_size=2,
+                                   stream_multiplexer_block_ms=50)
+        try:
+            queue = RedisStreamMessageQueue('stream')
+            events = multiplexer.subscribe('stream')
+            first = await asyncio.wait_for(
+                asyncio.gather(_take(events, 1), queue.put('0')), 5)
+            assert first[0] == ['0']
+
+            # 订阅方暂停消费，缓冲区溢出后丢弃的消息在恢复消费时从流中补读
+            await queue.put_batch([str(i) for i in range(1, 10)])
+            await asyncio.sleep(0.2)
+            subscription, = multiplexer._subscribers['stream']
+            assert subscription.overflowed
+            received = await asyncio.wait_for(_take(events, 9), 5)
+            assert received == [str(i) for i in range(1, 10)]
+            await events.aclose()
+        finally:
+            await multiplexer.shutdown()
+            await get_redis().shutdown()
+
+    asyncio.run(run())
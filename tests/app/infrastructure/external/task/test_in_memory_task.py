@@ -0,0 +1,123 @@
+import asyncio
+
+from app.domain.external.task import TaskRunner, Task
+from app.infrastructure.external.task.in_memory_task import InMemoryTask
+from app.infrastructure.external.task.in_memory_task_sweeper import \
+    InMemoryTaskSweeper
+
+
+class EchoTaskRunner(TaskRunner):
+    def __init__(self):
+        self.done = False
+
+    async def invoke(self, task: Task) -> None:
+        while not await task.input_stream.is_empty():
+            message_id, data = await task.input_stream.pop()
+            await task.input_stream.ack(message_id)
+            await task.output_stream.put(f'echo:{data}')
+
+    async def destroy(self) -> None:
+        pass
+
+    async def on_done(self, task: Task) -> None:
+        self.done = True
+
+
+def test_task_runs_in_process():
+    async def run():
+        runner = EchoTaskRunner()
+        task = InMemoryTask.create(runner)
+        await task.input_stream.put('hi')
+
+        await task.invoke()
+        await task.wait()
+        await asyncio.sleep(0)
+
+        _, data = await task.output_stream.get()
+        assert data == 'echo:hi'
+        assert runner.done
+        assert await InMemoryTask.get(task.id) is task
+
+        await InMemoryTask.destroy(task.id)
+        assert await InMemoryTask.get(task.id) is None
+
+    asyncio.run(run())
+
+
+class BlockingTaskRunner(EchoTaskRunner):
+    async def invoke(self, task: Task) -> None:
+        await asyncio.sleep(10)
+
+
+def test_cancel_running_task():
+    async def run():
+        task = InMemoryTask.create(BlockingTaskRunner())
+        await task.invoke()
+        await asyncio.sleep(0)
+
+        assert not task.done
+        assert await task.cancel()
+        await task.wait()
+        assert task.done
+
+    asyncio.run(run())
+
+
+def test_cancel_before_task_starts():
+    async def run():
+        task = InMemoryTask.create(BlockingTaskRunner())
+        await task.invoke()
+
+        assert await task.cancel()
+        assert task.cancel_requested
+        await task.wait()
+        assert task.done
+
+    asyncio.run(run())
+
+
+def test_cancelled_wait_interrupts_execution():
+    async def run():
+        task = InMemoryTask.create(BlockingTaskRunner())
+        await task.invoke()
+        await asyncio.sleep(0)
+
+        waiter = asyncio.create_task(task.wait())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            pass
+
+        # 等待方被取消时任务随之结束，且不视为用户取消
+        assert task.done
+        assert not task.cancel_requested
+
+    asyncio.run(run())
+
+
+def test_sweeper_evicts_finished_tasks():
+    async def run():
+        finished = InMemoryTask.create(EchoTaskRunner())
+        await finished.input_stream.put('hi')
+        await finished.invoke()
+        await finished.wait()
+
+        running = InMemoryTask.create(BlockingTaskRunner())
+        await running.invoke()
+        await asyncio.sleep(0)
+
+        sweeper = InMemoryTaskSweeper()
+        sweeper._settings = sweeper._settings.model_copy(
+            update={'task_stream_ttl_seconds': -1})
+        assert await sweeper.sweep() >= 1
+
+        assert await InMemoryTask.get(finished.id) is None
+        assert await finished.output_stream.size() == 0
+        assert await InMemoryTask.get(running.id) is running
+
+        await running.cancel()
+        await running.wait()
+
+    asyncio.run(run())
@@ -0,0 +1,60 @@
+import asyncio
+
+from app.infrastructure.external.task.redis_stream_task import \
+    RedisStreamTask
+from app.infrastructure.external.task.redis_task_event_archiver import \
+    RedisTaskEventArchiver
+from app.infrastructure.storage.redis import get_redis
+
+
+class StubArchiveRepository:
+    def __init__(self):
+        self.events = []
+
+    async def save_events(self, events):
+        self.events.extend(events)
+        return len(events)
+
+
+def test_detects_events_trimmed_before_archive(redis_db):
+    async def run():
+        await get_redis().init()
+        try:
+            repository = StubArchiveRepository()
+            archiver = RedisTaskEventArchiver(repository)
+            stream = RedisStreamTask.output_stream_name('t')
+            for _ in range(5):
+                redis_db.xadd(stream, {'data': '{"type":"message"}'})
+
+            assert await archiver._archive_streams(['t']) == 5
+            assert archiver.gaps == 0
+
+            # 游标之后的事件未归档就被裁剪
+            for _ in range(20):
+                redis_db.xadd(stream, {'data': '{"type":"message"}'},
+                              maxlen=5, approximate=False)
+            assert await archiver._archive_streams(['t']) == 5
+            assert archiver.gaps == 1
+
+            # 归档追上输出流后不再报告缺口
+            redis_db.xadd(stream, {'data': '{"type":"message"}'},
+                          maxlen=5, approximate=False)
+            assert await archiver._archive_streams(['t']) == 1
+            assert archiver.gaps == 1
+            assert [event.event_id for event in repository.events[-5:]] == \
+                   [entry_id.decode() for entry_id, _ in
+                    redis_db.xrange(stream)]
+        finally:
+            await get_redis().shutdown()
+
+    asyncio.run(run())
+
+
+def test_gap_uses_max_deleted_entry_id_when_available():
+    info = {'first-entry': ('5-0', {}), 'max-deleted-entry-id': '3-0'}
+    assert not RedisTaskEventArchiver._has_gap('3-0', info)
+    assert RedisTaskEventArchiver._has_gap('2-0', info)
+    # 没有max-deleted-entry-id时(Redis 7以下)比较首条事件
+    assert RedisTaskEventArchiver._has_gap('2-0', {'first-entry': ('5-0', {})})
+    assert not RedisTaskEventArchiver._has_gap('5-0',
+                                               {'first-entry': ('5-0', {})})
@@ -0,0 +1,90 @@
+import asyncio
+
+from app.infrastructure.external.task.redis_task_scheduler import \
+    RedisTaskScheduler
+from app.infrastructure.storage.redis import get_redis
+
+
+def _scheduler(**settings) -> RedisTaskScheduler:
+    scheduler = RedisTaskScheduler()
+    scheduler._settings = scheduler._settings.model_copy(update=settings)
+    return scheduler
+
+
+def test_weighted_fair_queue_order(redis_db):
+    async def run():
+        await get_redis().init()
+        try:
+            scheduler = _scheduler(task_tenant_weights={'a': 2.0, 'b': 1.0},
+                                   task_max_concurrency=10,
+                                   task_tenant_max_concurrency=10)
+            for task_id in ('a-1', 'a-2', 'a-3'):
+                await scheduler.submit(task_id, 'a')
+            for task_id in ('b-1', 'b-2'):
+                await scheduler.submit(task_id, 'b')
+
+            # 权重为2的租户每个任务的虚拟完成时间增加0.5，后提交的b-1排在a-3之前
+            expected = ['a-1', 'a-2', 'b-1', 'a-3', 'b-2']
+            assert [task_id for task_id, _ in await scheduler.positions()] \
+                   == expected
+            assert await scheduler.dispatch() == expected
+        finally:
+            await get_redis().shutdown()
+
+    asyncio.run(run())
+
+
+def test_tenant_quota_refuses_until_release(redis_db):
+    async def run():
+        await get_redis().init()
+        try:
+            scheduler = _scheduler(task_max_concurrency=10,
+                                   task_tenant_max_concurrency=1)
+            await scheduler.submit('t-1', 'a')
+            await scheduler.submit('t-2', 'a')
+            await scheduler.submit('t-3', 'b')
+
+            # 租户a的配额已满，t-2继续排队，其他租户不受影响
+            assert await scheduler.dispatch() == ['t-1', 't-3']
+            assert await scheduler.dispatch() == []
+            assert await scheduler.positions() == [('t-2', 1)]
+
+            await scheduler.release('t-1')
+            assert await scheduler.dispatch() == ['t-2']
+            assert await scheduler.is_scheduled('t-2')
+            assert not await scheduler.is_scheduled('t-1')
+        finally:
+            await get_redis().shutdown()
+
+    asyncio.run(run())
+
+
+def test_expired_lease_is_reclaimed(redis_db):
+    async def run():
+        await get_redis().init()
+        try:
+            scheduler = _scheduler(task_max_concurrency=10,
+                                   task_tenant_max_concurrency=1,
+                                   task_job_claim_idle_ms=50)
+            await scheduler.submit('t-1', 'a')
+            assert await scheduler.dispatch() == ['t-1']
+
+            await scheduler.submit('t-2', 'a')
+            assert await scheduler.dispatch() == []
+
+            # t-1的占用没有心跳续期，过期后在下一次调度时被回收
+            await asyncio.sleep(0.1)
+            assert await scheduler.dispatch() == ['t-2']
+            assert redis_db.hget(scheduler._tenant_running_key, 'a') == b'1'
+
+            # 被回收的任务仍在执行时重新确认占用，租户计数随之恢复
+            scheduler._settings = scheduler._settings.model_copy(
+                update={'task_job_claim_idle_ms': 60000})
+            await scheduler.acquire('t-1')
+            assert redis_db.hget(scheduler._tenant_running_key, 'a') == b'2'
+            await scheduler.acquire('t-1')
+            assert redis_db.hget(scheduler._tenant_running_key, 'a') == b'2'
+        finally:
+            await get_redis().shutdown()
+
+    asyncio.run(run())
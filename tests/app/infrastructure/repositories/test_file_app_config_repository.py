@@ -0,0 +1,48 @@
+import asyncio
+import os
+
+import pytest
+
+from app.application.errors.exceptions import ConflictError
+from app.infrastructure.repositories.file_app_config_repository import \
+    FileAppConfigRepository
+
+
+def test_load_is_cached_until_file_changes(tmp_path):
+    config_path = tmp_path / 'config.yaml'
+    repository = FileAppConfigRepository(str(config_path), check_interval=0)
+
+    app_config = repository.load()
+    version = repository.get_version()
+    assert repository.load() is app_config
+
+    updated = app_config.model_copy(deep=True)
+    updated.agent_config.max_iterations = 50
+    asyncio.run(repository.save(updated))
+    assert repository.load().agent_config.max_iterations == 50
+    assert repository.get_version() != version
+
+    # 其他进程替换配置文件后重新加载
+    content = config_path.read_text(encoding='utf-8')
+    replaced = tmp_path / 'replaced.yaml'
+    replaced.write_text(content.replace('max_iterations: 50',
+                                        'max_iterations: 70'),
+                        encoding='utf-8')
+    os.replace(replaced, config_path)
+    assert repository.load().agent_config.max_iterations == 70
+
+
+def test_save_rejects_stale_base_version(tmp_path):
+    config_path = tmp_path / 'config.yaml'
+    repository = FileAppConfigRepository(str(config_path), check_interval=0)
+    other = FileAppConfigRepository(str(config_path), check_interval=0)
+
+    base_version = repository.get_version()
+    updated = other.load().model_copy(deep=True)
+    updated.agent_config.max_iterations = 50
+    asyncio.run(other.save(updated, base_version=other.get_version()))
+
+    stale = repository.load().model_copy(deep=True)
+    with pytest.raises(ConflictError):
+        asyncio.run(repository.save(stale, base_version=base_version))
+    assert repository.load().agent_config.max_iterations == 50
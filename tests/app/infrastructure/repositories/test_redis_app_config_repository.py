@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from app.application.errors.exceptions import ConflictError
+from app.infrastructure.repositories.redis_app_config_repository import \
+    RedisAppConfigRepository
+from app.infrastructure.storage.redis import get_redis
+
+
+def _repository(config_path) -> RedisAppConfigRepository:
+    repository = RedisAppConfigRepository()
+    repository._settings = repository._settings.model_copy(
+        update={'app_config_filepath': str(config_path)})
+    return repository
+
+
+async def _wait_for_version(repository: RedisAppConfigRepository,
+                            version: int) -> None:
+    for _ in range(100):
+        if repository.get_version() == version:
+            return
+        await asyncio.sleep(0.01)
+
+
+def test_stale_write_is_rejected(redis_db, tmp_path):
+    async def run():
+        await get_redis().init()
+        writer = _repository(tmp_path / 'config.yaml')
+        stale = _repository(tmp_path / 'config.yaml')
+        try:
+            await writer.init()
+            await stale.init()
+            assert writer.get_version() == stale.get_version() == 1
+
+            updated = writer.load().model_copy(deep=True)
+            updated.agent_config.max_iterations = 7
+            await writer.save(updated, base_version=1)
+
+            # 基于旧版本的修改被拒绝，拒绝后拉取最新配置
+            outdated = stale.load().model_copy(deep=True)
+            outdated.agent_config.max_iterations = 9
+            with pytest.raises(ConflictError):
+                await stale.save(outdated, base_version=1)
+            assert stale.get_version() == 2
+            assert stale.load().agent_config.max_iterations == 7
+
+            outdated.agent_config.max_retries = 5
+            await stale.save(outdated, base_version=stale.get_version())
+            await _wait_for_version(writer, 3)
+            assert writer.get_version() == 3
+            assert writer.load().agent_config.max_retries == 5
+        finally:
+            await writer.shutdown()
+            await stale.shutdown()
+            await get_redis().shutdown()
+
+    asyncio.run(run())
+
+
+def test_follows_version_reset(redis_db, tmp_path):
+    async def run():
+        await get_redis().init()
+        repository = _repository(tmp_path / 'config.yaml')
+        try:
+            await repository.init()
+            updated = repository.load().model_copy(deep=True)
+            updated.agent_config.max_iterations = 7
+            await repository.save(updated, base_version=1)
+            assert repository.get_version() == 2
+
+            # Redis被清空后以本地配置文件重新初始化，版本回退到1
+            redis_db.flushdb()
+            await repository._refresh()
+            assert repository.get_version() == 1
+            assert repository.load().agent_config.max_iterations != 7
+        finally:
+            await repository.shutdown()
+            await get_redis().shutdown()
+
+    asyncio.run(run())
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from app.domain.models.memory import Memory
+from app.infrastructure.repositories.redis_memory_repository import \
+    RedisMemoryRepository
+from app.infrastructure.storage.redis import get_redis
+
+
+def _repository(**settings) -> RedisMemoryRepository:
+    repository = RedisMemoryRepository()
+    repository._settings = repository._settings.model_copy(update=settings)
+    return repository
+
+
+def _message(content: str) -> dict:
+    return {'role': 'user', 'content': content}
+
+
+def test_log_is_folded_into_snapshot(redis_db):
+    async def run():
+        await get_redis().init()
+        try:
+            repository = _repository(memory_snapshot_interval=3)
+            memory = Memory()
+            memory.add_message(_message('a'))
+            memory.add_message(_message('b'))
+            await repository.save('m', memory)
+
+            memory.roll_back()
+            memory.add_message(_message('c'))
+            await repository.save('m', memory)
+
+            # 日志达到快照间隔后重写快照并清空日志
+            assert redis_db.xlen(repository._log_key('m')) == 0
+            assert redis_db.hget(repository._snapshot_key('m'), 'tail') == b'0'
+
+            memory.add_message(_message('a' * 2000))
+            await repository.save('m', memory)
+            assert redis_db.xlen(repository._log_key('m')) == 1
+
+            loaded = await RedisMemoryRepository().load('m')
+            assert loaded.get_messages() == memory.get_messages()
+            assert [m['content'][:1] for m in loaded.get_messages()] == \
+                   ['a', 'c', 'a']
+        finally:
+            await get_redis().shutdown()
+
+    asyncio.run(run())
+
+
+def test_blob_ttl_is_refreshed_on_load(redis_db):
+    async def run():
+        await get_redis().init()
+        try:
+            repository = _repository(memory_blob_ttl_seconds=600)
+            memory = Memory()
+            memory.add_message(_message('hello'))
+            await repository.save('m', memory)
+
+            blob_keys = redis_db.keys('memory:blob:*')
+            assert len(blob_keys) == 1
+            assert 0 < redis_db.ttl(blob_keys[0]) <= 600
+
+            redis_db.expire(blob_keys[0], 5)
+            await _repository(memory_blob_ttl_seconds=600).load('m')
+            assert redis_db.ttl(blob_keys[0]) > 5
+
+            # 内容过期后引用它的记忆无法加载
+            redis_db.delete(blob_keys[0])
+            with pytest.raises(ValueError):
+                await repository.load('m')
+        finally:
+            await get_redis().shutdown()
+
+    asyncio.run(run())
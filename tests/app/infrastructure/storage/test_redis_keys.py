@@ -0,0 +1,18 @@
+from redis.crc import key_slot
+
+from app.infrastructure.storage.redis_keys import task_key, task_id_from_key, \
+    scheduler_key
+
+
+def test_task_keys_share_slot():
+    task_id = 'b0f5c5c2-6d3e-4c55-9a8e-2f1f0c7c1a11'
+    keys = [task_key(kind, task_id)
+            for kind in ('input', 'output', 'lease', 'snapshot', 'checkpoint')]
+
+    assert len({key_slot(key.encode()) for key in keys}) == 1
+    assert task_id_from_key(task_key('output', task_id)) == task_id
+
+
+def test_scheduler_keys_share_slot():
+    keys = [scheduler_key(name) for name in ('queue', 'jobs', 'tokens:1')]
+    assert len({key_slot(key.encode()) for key in keys}) == 1
@@ -0,0 +1,4 @@
+#!/bin/bash
+# Agent 任务 Worker 启动脚本，可与 API 进程分开部署和扩缩容
+
+exec python -m app.worker